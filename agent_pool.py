@@ -0,0 +1,109 @@
+# agent_pool.py
+# Bounded pool of agent instances checked out per request, so concurrent sessions never
+# share an agent's memory or step state.
+
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+AGENT_POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", "4"))
+
+
+class AgentPoolTimeout(Exception):
+    """Raised when no agent became free within the wait-queue timeout."""
+
+
+class AgentPool:
+    """
+    Fixed-size pool of agents built lazily by `factory`.
+
+    Agents are created on demand up to `size`; after that callers queue for a free one
+    for at most `wait_timeout` seconds.
+    """
+
+    def __init__(self, factory, size: int = 4, wait_timeout: float = 30.0):
+        self._factory = factory
+        self.size = max(1, size)
+        self.wait_timeout = wait_timeout
+        self._idle = queue.LifoQueue()  # LIFO keeps recently used agents warm
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._max_waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+
+    def _acquire(self, timeout):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            try:
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        with self._lock:
+            self._waiting += 1
+            self._max_waiting = max(self._max_waiting, self._waiting)
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise AgentPoolTimeout(f"No agent available after {timeout}s (pool size {self.size})")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    @contextmanager
+    def checkout(self, timeout: float = None):
+        """
+        Borrow an agent for the duration of a `with` block.
+
+        Args:
+            timeout: Max seconds to wait for a free agent; defaults to the pool's wait_timeout
+
+        Raises:
+            AgentPoolTimeout: If every agent stayed busy for the whole timeout
+        """
+        started = time.perf_counter()
+        agent = self._acquire(self.wait_timeout if timeout is None else timeout)
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += time.perf_counter() - started
+        try:
+            yield agent
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(agent)
+
+    def stats(self) -> dict:
+        """Utilization and wait-queue metrics."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._idle.qsize(),
+                "utilization": round(self._in_use / self.size, 3),
+                "queue_depth": self._waiting,
+                "max_queue_depth": self._max_waiting,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": round(self._total_wait / self._checkouts * 1000, 1) if self._checkouts else 0.0,
+            }
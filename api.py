@@ -0,0 +1,250 @@
+# api.py
+# Headless HTTP API over the same backend the Streamlit app uses: drink-by-mood, the full
+# recommendation flow, café search and streamed chat, as async JSON endpoints.
+#
+# The backend is blocking (requests, LiteLLM, pooled agents), so each call runs on a bounded
+# worker pool while the event loop keeps serving. A semaphore caps in-flight backend work and
+# answers 503 when the API is saturated instead of queueing forever; every call has a timeout
+# (504). Caches (DiskCache, weather, recommendations), the agent pool and telemetry are shared
+# with the app when both run in one process, and the disk caches across processes.
+#
+# Usage:
+#     uvicorn api:app --port 8000          # or: python api.py
+#     curl "localhost:8000/recommendation?mood=cozy&location=Brooklyn"
+#     curl -N -X POST localhost:8000/chat/stream -H 'Content-Type: application/json' \
+#          -d '{"prompt": "What is ceremonial matcha?"}'
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from agent_pool import AgentPoolTimeout
+from cache_warmer import maybe_start_scheduler
+from cafe_ranking import rank_cafes
+from cafe_search import add_distances, search_matcha_cafes, sort_by_distance
+from mood_drink_map import get_drink_for_mood
+from prompt_compiler import PromptBudgetExceeded
+
+API_MAX_CONCURRENCY = int(os.getenv("WHISKI_API_MAX_CONCURRENCY", "16"))
+API_QUEUE_TIMEOUT = float(os.getenv("WHISKI_API_QUEUE_TIMEOUT", "2"))  # wait for a slot before 503
+
+# Per-endpoint timeouts (seconds); a timed-out call's worker finishes in the background
+API_TIMEOUTS = {
+    "recommendation": float(os.getenv("WHISKI_API_TIMEOUT_RECOMMENDATION", "60")),
+    "cafes": float(os.getenv("WHISKI_API_TIMEOUT_CAFES", "15")),
+    "chat": float(os.getenv("WHISKI_API_TIMEOUT_CHAT", "120")),
+}
+
+# Blocking backend calls run here rather than on the event loop
+_executor = ThreadPoolExecutor(max_workers=API_MAX_CONCURRENCY, thread_name_prefix="api-worker")
+_semaphore = None  # Created lazily on the serving loop
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    maybe_start_scheduler()  # WHISKI_CACHE_WARMER=true keeps the preset matrix warm
+    yield
+
+
+app = FastAPI(title="Whiski API", description="Matcha recommendations, café search and chat", lifespan=_lifespan)
+
+
+class RecommendationRequest(BaseModel):
+    mood: str = Field(..., min_length=1)
+    location: str = Field(..., min_length=1)
+
+
+class ChatRequest(BaseModel):
+    prompt: str = Field(..., min_length=1)
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(API_MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def _acquire_slot():
+    try:
+        await asyncio.wait_for(_get_semaphore().acquire(), API_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="Server busy, retry shortly", headers={"Retry-After": "1"})
+
+
+async def _run_blocking(endpoint: str, func, *args, **kwargs):
+    """
+    Run a blocking backend call on the worker pool under the concurrency limit and timeout.
+
+    The slot is held until the worker finishes, not just until the caller gives up, so
+    timed-out calls still count against API_MAX_CONCURRENCY while they run on.
+    """
+    await _acquire_slot()
+    loop = asyncio.get_running_loop()
+    # Copy the context so telemetry spans opened by the backend nest under this request
+    context = contextvars.copy_context()
+    try:
+        future = loop.run_in_executor(_executor, lambda: context.run(func, *args, **kwargs))
+    except BaseException:
+        _get_semaphore().release()
+        raise
+    future.add_done_callback(lambda _: _get_semaphore().release())
+    try:
+        # Shielded: a timeout must not cancel the future and fire the release early
+        return await asyncio.wait_for(asyncio.shield(future), API_TIMEOUTS[endpoint])
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"{endpoint} timed out after {API_TIMEOUTS[endpoint]}s")
+    except AgentPoolTimeout:
+        raise HTTPException(status_code=503, detail="All agents busy, retry shortly", headers={"Retry-After": "2"})
+    except PromptBudgetExceeded as e:
+        raise HTTPException(status_code=413, detail=f"Prompt over budget: {e}")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+@app.get("/drink")
+async def drink(mood: str = Query(..., min_length=1)):
+    return {"mood": mood, "drink": get_drink_for_mood(mood)}
+
+
+@app.get("/recommendation")
+async def recommendation(mood: str = Query(..., min_length=1), location: str = Query(..., min_length=1)):
+    # Deferred so the API starts without the agent stack
+    from recommendation import RecommendationParseError, recommend
+
+    try:
+        result, weather_report = await _run_blocking("recommendation", recommend, mood, location)
+    except RecommendationParseError as e:
+        raise HTTPException(status_code=502, detail=f"Agent did not provide a structured recommendation ({e.reason})")
+    weather = None
+    if weather_report is not None:
+        weather = {
+            "temperature": weather_report.temperature,
+            "condition": weather_report.condition,
+            "bucket": weather_report.bucket,
+        }
+    return {"mood": mood, "location": location, **result, "weather": weather}
+
+
+@app.post("/recommendation")
+async def recommendation_post(body: RecommendationRequest):
+    return await recommendation(body.mood, body.location)
+
+
+@app.get("/cafes")
+async def cafes(
+    location: str = Query(..., min_length=1),
+    radius: int = Query(3500, gt=0, le=50000),
+    mood: str = Query(None, min_length=1),
+):
+    """Cafés near a location: ranked for `mood` if given, else nearest (then best rated) first."""
+    results = await _run_blocking("cafes", _nearby_cafes, location, radius, mood)
+    return {"location": location, "radius": radius, "mood": mood, "cafes": results}
+
+
+def _nearby_cafes(location: str, radius: int, mood: str = None) -> list:
+    cafes = add_distances(search_matcha_cafes(location, radius), location)
+    return rank_cafes(cafes, mood, location) if mood else sort_by_distance(cafes)
+
+
+async def _chat_events(prompt: str):
+    """
+    Start one chat turn and return an async iterator of (kind, text) events: "delta" chunks,
+    then one "final" answer or an "error". Closing the iterator early interrupts the agent.
+    """
+    from chat_service import stream_chat
+
+    await _acquire_slot()
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    stop = threading.Event()
+
+    def produce():
+        # The whole generator runs on one worker thread so its context managers
+        # (agent checkout, request type, telemetry span) enter and exit in one context
+        chat = stream_chat(prompt)
+        try:
+            for kind, text in chat:
+                loop.call_soon_threadsafe(queue.put_nowait, (kind, text))
+                if stop.is_set():
+                    break
+        except AgentPoolTimeout:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", "All agents busy, retry shortly"))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", f"Chat failed: {e}"))
+        finally:
+            chat.close()  # Interrupts the agent if we stopped early
+            loop.call_soon_threadsafe(queue.put_nowait, (None, None))
+
+    context = contextvars.copy_context()
+    try:
+        worker = loop.run_in_executor(_executor, context.run, produce)
+    except BaseException:
+        _get_semaphore().release()
+        raise
+    # Freed when the worker exits, even if the response never starts iterating events()
+    worker.add_done_callback(lambda _: _get_semaphore().release())
+
+    async def events():
+        deadline = loop.time() + API_TIMEOUTS["chat"]
+        try:
+            while True:
+                try:
+                    kind, text = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    yield ("error", f"chat timed out after {API_TIMEOUTS['chat']}s")
+                    return
+                if kind is None:
+                    return
+                yield (kind, text)
+                if kind != "delta":
+                    return
+        finally:
+            # Client gone, timed out or done: stop the agent (its worker then frees the slot)
+            stop.set()
+
+    return events()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_stream(body: ChatRequest):
+    """
+    Stream one chat turn as server-sent events: `delta` events with raw model chunks, then one
+    `final` event with the answer (or an `error` event). Disconnecting interrupts the agent.
+    """
+    events = await _chat_events(body.prompt)
+    sse = (_sse(kind, text) async for kind, text in events)
+    return StreamingResponse(sse, media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/chat")
+async def chat(body: ChatRequest):
+    """Non-streaming chat: the final answer only."""
+    events = await _chat_events(body.prompt)
+    async for kind, text in events:
+        if kind == "final":
+            return {"answer": text}
+        if kind == "error":
+            raise HTTPException(status_code=504 if "timed out" in text else 502, detail=text)
+    raise HTTPException(status_code=502, detail="Chat ended without an answer")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("WHISKI_API_HOST", "127.0.0.1"), port=int(os.getenv("WHISKI_API_PORT", "8000")))
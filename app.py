@@ -1,21 +1,16 @@
 import os
+import startup_timing
+startup_timing.enable()  # Records import times when WHISKI_STARTUP_TIMING=true
+
 import streamlit as st
 from dotenv import load_dotenv
 load_dotenv()
 
-# Import modular UI system
+# Import modular UI system (scene modules load on first use)
 from ui import init_session_state, navigate_to_scene, get_current_scene, SCENES
-from ui.scenes import (
-    render_welcome_scene,
-    render_mood_selection_scene, 
-    render_location_input_scene,
-    render_custom_location_scene,
-    render_loading_scene,
-    render_results_scene,
-    render_cafe_details_scene,
-    render_chat_scene
-)
-from styles import apply_global_styles, hide_streamlit_ui
+from ui.scenes import render_scene
+from styles import apply_global_styles
+from ui.render_metrics import measure_scene
 
 def main():
     """Main application entry point"""
@@ -29,30 +24,24 @@ def main():
     # Initialize session state
     init_session_state()
     
-    # Apply global styles
-    apply_global_styles()
-    hide_streamlit_ui()
+    # Optional in-process cache warming (WHISKI_CACHE_WARMER=true); started once per process
+    from cache_warmer import maybe_start_scheduler
+    maybe_start_scheduler()
     
     # Get current scene
     current_scene = get_current_scene()
     
-    # Route to appropriate scene
-    if current_scene == SCENES['WELCOME']:
-        render_welcome_scene()
-    elif current_scene == SCENES['MOOD_SELECTION']:
-        render_mood_selection_scene()
-    elif current_scene == SCENES['LOCATION_INPUT']:
-        render_location_input_scene()
-    elif current_scene == SCENES['CUSTOM_LOCATION']:
-        render_custom_location_scene()
-    elif current_scene == SCENES['LOADING']:
-        render_loading_scene()
-    elif current_scene == SCENES['RESULTS']:
-        render_results_scene()
-    elif current_scene == SCENES['CAFE_DETAILS']:
-        render_cafe_details_scene()
-    elif current_scene == SCENES['CHAT']:
-        render_chat_scene()
+    # Count the markdown/HTML bytes this rerun sends, styles included
+    with measure_scene(current_scene):
+        # Apply global styles (minified bundle, includes hiding the Streamlit UI)
+        apply_global_styles()
+        
+        # Route to appropriate scene
+        rendered = render_scene(current_scene)
+    
+    if rendered:
+        startup_timing.mark_phase("first paint")
+        startup_timing.report_once()
     else:
         # Fallback to welcome scene
         st.error(f"Unknown scene: {current_scene}")
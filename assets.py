@@ -0,0 +1,215 @@
+# assets.py
+# Image asset pipeline: resized WebP variants of the app's PNGs at the widths the scenes
+# actually display, encoded once per process and written to static/ under content-hashed names.
+#
+# Streamlit's static file server can't be given custom Cache-Control headers, so the hash in
+# each filename is what makes long-lived caching safe: a proxy/CDN in front of the app can mark
+# /app/static/*-<hash>.* as immutable, and a changed source image always gets a new URL.
+#
+# Usage:
+#     python assets.py build     # write missing variants to static/ (run at deploy; the app
+#                                # otherwise builds them in the background on first view)
+#     python assets.py report    # bytes per scene, original PNG vs. variants
+
+import hashlib
+import io
+import os
+import sys
+import threading
+from dataclasses import dataclass
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT_DIR, "static")
+STATIC_URL = "app/static"
+
+WEBP_QUALITY = int(os.getenv("WHISKI_WEBP_QUALITY", "80"))
+
+# Variant widths per source image: the CSS width each scene renders it at, plus a 2x or
+# mobile size where the layout calls for one
+IMAGE_WIDTHS = {
+    "welcome_image.png": (800, 1600),  # full container width
+    "matcha_cafe.png": (400, 800),     # width=400 in the results scene
+    "bot.png": (350, 700),             # width=700, capped by its one-third column
+}
+
+# Images each scene shows, for the byte report
+SCENE_IMAGES = {
+    "welcome": ["welcome_image.png"],
+    "results": ["matcha_cafe.png"],
+    "chat": ["bot.png"],
+}
+
+# Streamlit's static server sends only these with an image Content-Type; anything else
+# (AVIF included) goes out as text/plain with nosniff, which browsers won't decode
+STATIC_IMAGE_FORMATS = ("webp", "png", "jpg", "jpeg", "gif")
+FORMATS = ("webp",)
+_SAVE_OPTIONS = {"webp": {"quality": WEBP_QUALITY, "method": 6}}  # Pillow encoder settings per format
+_MIME_TYPES = {"webp": "image/webp", "png": "image/png", "jpg": "image/jpeg", "jpeg": "image/jpeg", "gif": "image/gif"}
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    source: str
+    width: int
+    format: str
+    filename: str
+    data: bytes
+
+    @property
+    def url(self) -> str:
+        return f"{STATIC_URL}/{self.filename}"
+
+    @property
+    def mime_type(self) -> str:
+        return _MIME_TYPES[self.format]
+
+
+_lock = threading.Lock()
+_variants = {}  # source -> [ImageVariant], encoded bytes kept for the life of the process
+_building = set()
+
+
+def _encode(image, width: int, fmt: str):
+    """Resize (never upscale) and encode one variant; None if the format isn't supported."""
+    from PIL import Image
+
+    if image.width > width:
+        image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    try:
+        image.save(buffer, fmt.upper(), **_SAVE_OPTIONS.get(fmt, {}))
+    except (KeyError, OSError, ValueError):
+        return None  # No encoder for this format in the installed Pillow
+    return buffer.getvalue()
+
+
+def _build_variants(source: str) -> list:
+    path = os.path.join(ROOT_DIR, source)
+    with open(path, "rb") as image_file:
+        original = image_file.read()
+    stem = os.path.splitext(source)[0]
+    image = None  # Decoded only if some variant isn't on disk yet
+    variants = []
+    for width in IMAGE_WIDTHS.get(source, ()):
+        for fmt in FORMATS:
+            # Hash of source bytes + encoding settings, so any change yields a new URL
+            digest = hashlib.sha256(original + f"{width}:{fmt}:{WEBP_QUALITY}".encode()).hexdigest()[:10]
+            filename = f"{stem}-{width}w-{digest}.{fmt}"
+            static_path = os.path.join(STATIC_DIR, filename)
+            if os.path.exists(static_path):
+                with open(static_path, "rb") as variant_file:
+                    data = variant_file.read()
+            else:
+                if image is None:
+                    from PIL import Image
+                    image = Image.open(io.BytesIO(original))
+                    image.load()
+                data = _encode(image, width, fmt)
+                if data is None:
+                    continue
+                write_static_file(filename, data)  # Best effort; memory copy serves either way
+            variants.append(ImageVariant(source, width, fmt, filename, data))
+    return variants
+
+
+def write_static_file(filename: str, data: bytes) -> bool:
+    """
+    Atomically write a generated file into static/ unless it's already there.
+
+    Returns:
+        bool: True if the file is in static/ afterwards (False on a read-only filesystem)
+    """
+    path = os.path.join(STATIC_DIR, filename)
+    if os.path.exists(path):
+        return True
+    try:
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as static_file:
+            static_file.write(data)
+        os.replace(tmp_path, path)
+    except OSError:
+        return False
+    return True
+
+
+def get_variants(source: str, wait: bool = True) -> list:
+    """
+    Encoded variants of a source image, built on first use and cached for the process.
+
+    Args:
+        source: Source PNG filename
+        wait: If False and the variants aren't built yet, start building them in the
+            background and return an empty list instead of blocking (encoding takes seconds)
+
+    Returns:
+        list[ImageVariant]: Empty if not built yet, Pillow is unavailable or the source can't be read
+    """
+    variants = _variants.get(source)
+    if variants is not None:
+        return variants
+    if not wait:
+        with _lock:
+            if source not in _variants and source not in _building:
+                _building.add(source)
+                threading.Thread(target=_build_into_cache, args=(source,), name=f"assets-{source}", daemon=True).start()
+        return []
+    return _build_into_cache(source)
+
+
+def _build_into_cache(source: str) -> list:
+    # Encoding happens outside the lock so renders of other images never wait on it
+    try:
+        variants = _build_variants(source)
+    except (ImportError, OSError):
+        variants = []
+    with _lock:
+        _variants[source] = variants
+        _building.discard(source)
+    return variants
+
+
+def static_file_exists(variant: ImageVariant) -> bool:
+    return os.path.exists(os.path.join(STATIC_DIR, variant.filename))
+
+
+def scene_byte_report() -> dict:
+    """
+    Bytes each scene's images cost: the original PNGs vs. the largest variant per format.
+
+    Returns:
+        dict: {scene: {'png': bytes, 'webp': bytes}}
+    """
+    report = {}
+    for scene, sources in SCENE_IMAGES.items():
+        totals = {"png": 0}
+        for source in sources:
+            path = os.path.join(ROOT_DIR, source)
+            totals["png"] += os.path.getsize(path) if os.path.exists(path) else 0
+            largest = {}
+            for variant in get_variants(source):
+                largest[variant.format] = max(largest.get(variant.format, 0), len(variant.data))
+            for fmt, size in largest.items():
+                totals[fmt] = totals.get(fmt, 0) + size
+        report[scene] = totals
+    return report
+
+
+def main(argv) -> int:
+    command = argv[1] if len(argv) > 1 else "report"
+    if command == "build":
+        for source in IMAGE_WIDTHS:
+            for variant in get_variants(source):
+                print(f"{variant.filename:<48}{len(variant.data):>10,} bytes")
+        return 0
+    if command == "report":
+        print(f"{'scene':<12}{'png':>12}{'webp':>12}")
+        for scene, totals in scene_byte_report().items():
+            print(f"{scene:<12}" + "".join(f"{totals.get(fmt, 0):>12,}" for fmt in ("png", "webp")))
+        return 0
+    print(f"Unknown command {command!r}; use 'build' or 'report'")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,93 @@
+"""
+Café Distance Micro-Benchmark for Whiski
+Times distance annotation + ordering of candidate cafés (one vectorized haversine pass and a
+lexsort, as cafe_search does) against a per-café Python loop, and a nearest-neighbour query
+on the local café index, for candidate sets from one Places page up to a whole metro area.
+
+No network or API keys needed: cafés are synthetic points around Brooklyn.
+
+Usage:
+    python benchmarks/bench_cafes.py
+    python benchmarks/bench_cafes.py --sizes 20 200 2000 20000 --repeat 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+# The index persists to the shared cache file; keep the benchmark's cafés out of it
+os.environ.setdefault("WHISKI_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="whiski-bench-"), "cache.sqlite3"))
+
+from cafe_index import CafeIndex, coordinates, haversine_m, haversine_m_many
+from cafe_search import DISTANCE_BAND_M, sort_by_distance
+
+ORIGIN = (40.6782, -73.9442)  # Brooklyn
+
+
+def synthetic_cafes(count, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "place_id": f"bench-{i}",
+            "name": f"Café {i}",
+            "rating": round(rng.uniform(3.5, 5.0), 1),
+            "lat": ORIGIN[0] + rng.uniform(-0.15, 0.15),
+            "lng": ORIGIN[1] + rng.uniform(-0.2, 0.2),
+        }
+        for i in range(count)
+    ]
+
+
+def vectorized(cafes):
+    distances = haversine_m_many(*ORIGIN, *coordinates(cafes)).tolist()
+    annotated = [{**cafe, "distance_m": round(d)} for cafe, d in zip(cafes, distances)]
+    return sort_by_distance(annotated)
+
+
+def per_cafe_loop(cafes):
+    annotated = [{**cafe, "distance_m": round(haversine_m(*ORIGIN, cafe["lat"], cafe["lng"]))} for cafe in cafes]
+    return sorted(annotated, key=lambda cafe: (cafe["distance_m"] // DISTANCE_BAND_M, -cafe["rating"]))
+
+
+def time_per_call(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark café distance ordering and index queries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--radius", type=float, default=3500)
+    args = parser.parse_args()
+
+    print(f"{'cafés':>8}{'vectorized µs':>16}{'python loop µs':>16}{'index query µs':>16}{'in radius':>11}")
+    for size in args.sizes:
+        cafes = synthetic_cafes(size)
+        ordered = vectorized(cafes)
+        assert [c["place_id"] for c in ordered] == [c["place_id"] for c in per_cafe_loop(cafes)]
+
+        index = CafeIndex()
+        index.invalidate()
+        index.upsert(cafes)
+        found = index.nearby(*ORIGIN, args.radius)
+
+        print(
+            f"{size:>8}"
+            f"{time_per_call(lambda: vectorized(cafes), args.repeat):>16.1f}"
+            f"{time_per_call(lambda: per_cafe_loop(cafes), args.repeat):>16.1f}"
+            f"{time_per_call(lambda: index.nearby(*ORIGIN, args.radius), args.repeat):>16.1f}"
+            f"{len(found):>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
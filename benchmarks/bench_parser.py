@@ -0,0 +1,124 @@
+"""
+Response Parser Micro-Benchmark for Whiski
+Runs response_parser.parse_recommendation over benchmarks/parser_corpus.jsonl, checks each
+result against the case's expectations and reports per-parse latency next to the previous
+three-stage regex cascade (kept here only as a reference point).
+
+Add replies that misparse in production to the corpus with the expected outcome.
+
+Usage:
+    python benchmarks/bench_parser.py
+    python benchmarks/bench_parser.py --repeat 2000 --verbose
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(BENCH_DIR))
+
+from response_parser import STRUCTURED_CONFIDENCE, parse_recommendation
+
+DEFAULT_CORPUS = os.path.join(BENCH_DIR, "parser_corpus.jsonl")
+
+
+_LEGACY_CONVERSATIONAL = [r"glad i could help", r"is there another", r"would you like", r"anything else", r"other mood", r"follow.?up"]
+
+
+def legacy_parse(response, mood, location):
+    """The conversational check plus regex cascade recommendation.py ran before response_parser."""
+    any(re.search(pattern, response, re.IGNORECASE) for pattern in _LEGACY_CONVERSATIONAL)
+    drink_match = re.search(r'\*\*(?:The )?Drink:\*\*\s*(.*?)(?=\*\*(?:The )?Vibe:|\n\n|$)', response, re.DOTALL | re.IGNORECASE)
+    vibe_match = re.search(r'\*\*(?:The )?Vibe:\*\*\s*(.*?)(?=$)', response, re.DOTALL | re.IGNORECASE)
+    if drink_match and vibe_match:
+        drink = re.sub(r'\*\*([^*]+)\*\*', r'\1', drink_match.group(1).strip())
+        vibe = re.sub(r'\*\*([^*]+)\*\*', r'\1', vibe_match.group(1).strip())
+        if len(drink) > 10 and "matcha" in drink.lower() and len(vibe) > 10:
+            return {"drink": drink, "vibe": vibe}
+    drink_alt = re.search(r'drink:\s*(.*?)(?=vibe:|$)', response, re.DOTALL | re.IGNORECASE)
+    vibe_alt = re.search(r'vibe:\s*(.*?)(?=$)', response, re.DOTALL | re.IGNORECASE)
+    if drink_alt and vibe_alt:
+        drink, vibe = drink_alt.group(1).strip(), vibe_alt.group(1).strip()
+        if len(drink) > 10 and "matcha" in drink.lower() and len(vibe) > 10:
+            return {"drink": drink, "vibe": vibe}
+    if "matcha" in response.lower():
+        matcha_content = re.findall(r'[^.]*matcha[^.]*\.?', response, re.IGNORECASE)
+        if matcha_content:
+            return {"drink": matcha_content[0][:80], "vibe": f"A perfect {mood} atmosphere in {location}"}
+    return None
+
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as corpus_file:
+        return [json.loads(line) for line in corpus_file if line.strip()]
+
+
+def check(case, result):
+    """Return a list of mismatches between a ParseResult and the case's expectations."""
+    expect = case["expect"]
+    problems = []
+    if "method" in expect and result.method != expect["method"]:
+        problems.append(f"method {result.method!r} != {expect['method']!r}")
+    if "failure_reason" in expect and result.failure_reason != expect["failure_reason"]:
+        problems.append(f"failure_reason {result.failure_reason!r} != {expect['failure_reason']!r}")
+    if result.conversational != expect.get("conversational", False):
+        problems.append(f"conversational {result.conversational}")
+    for field in ("drink", "vibe"):
+        needle = expect.get(f"{field}_contains")
+        value = getattr(result, field) or ""
+        if needle and needle.lower() not in value.lower():
+            problems.append(f"{field} {value[:60]!r} lacks {needle!r}")
+    # Structured answers must come out clean, without the agent's code wrapping
+    if result.confidence >= STRUCTURED_CONFIDENCE:
+        for field in ("drink", "vibe"):
+            value = getattr(result, field)
+            if any(marker in value for marker in ("**", "final_answer", "<code>", "\\n", '")')):
+                problems.append(f"{field} not cleaned: {value[:60]!r}")
+    return problems
+
+
+def time_per_call(func, cases, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            func(case["response"], "chill", "Brooklyn, NY")
+    return (time.perf_counter() - started) / (repeat * len(cases)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    cases = load_corpus(args.corpus)
+    failures = 0
+    by_method = {}
+    for case in cases:
+        result = parse_recommendation(case["response"], "chill", "Brooklyn, NY")
+        by_method[result.method] = by_method.get(result.method, 0) + 1
+        problems = check(case, result)
+        if problems:
+            failures += 1
+            print(f"FAIL {case['id']}: {'; '.join(problems)}")
+        elif args.verbose:
+            print(f"ok   {case['id']}: {result.method} ({result.confidence})")
+
+    parser_us = time_per_call(parse_recommendation, cases, args.repeat)
+    legacy_us = time_per_call(legacy_parse, cases, args.repeat)
+
+    print(f"Cases: {len(cases)}  passed: {len(cases) - failures}  failed: {failures}")
+    print("Methods: " + ", ".join(f"{method}={count}" for method, count in sorted(by_method.items())))
+    print(f"{'parser':<16}{'µs/parse':>10}")
+    print(f"{'response_parser':<16}{parser_us:>10.1f}")
+    print(f"{'legacy cascade':<16}{legacy_us:>10.1f}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
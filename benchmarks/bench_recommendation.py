@@ -0,0 +1,103 @@
+"""
+Recommendation Path Benchmark for Whiski
+Compares the CodeAgent path against the direct structured-output path.
+
+Counts LLM calls and tokens by wrapping litellm.completion, which both paths
+(smolagents' LiteLLMModel and recommendation.get_direct_recommendation) go through.
+
+Usage:
+    python benchmarks/bench_recommendation.py --runs 3
+    python benchmarks/bench_recommendation.py --modes direct --moods chill cozy
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Measure the LLM paths themselves, not the shared recommendation cache
+os.environ.setdefault("RECOMMENDATION_CACHE_ENABLED", "false")
+
+import litellm
+from recommendation import get_hedge_stats, get_recommendation, RecommendationParseError
+
+MOODS = ["chill", "anxious", "creative", "reflective", "energized", "cozy"]
+
+_counters = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+_original_completion = litellm.completion
+
+
+def _counting_completion(*args, **kwargs):
+    response = _original_completion(*args, **kwargs)
+    _counters["calls"] += 1
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        _counters["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        _counters["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+    return response
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[int(pct * (len(ordered) - 1))]
+
+
+def run_mode(mode, moods, location, weather, runs):
+    """Run every mood `runs` times in one mode and return per-request samples."""
+    samples = []
+    for _ in range(runs):
+        for mood in moods:
+            for key in _counters:
+                _counters[key] = 0
+            started = time.perf_counter()
+            try:
+                get_recommendation(mood, location, weather, mode=mode)
+                ok = True
+            except RecommendationParseError:
+                ok = False
+            samples.append({
+                "ok": ok,
+                "wall_ms": (time.perf_counter() - started) * 1000,
+                **dict(_counters),
+            })
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=1, help="Repetitions per mood")
+    parser.add_argument("--modes", nargs="+", default=["agent", "direct"], choices=["agent", "direct", "hedged"])
+    parser.add_argument("--moods", nargs="+", default=MOODS)
+    parser.add_argument("--location", default="Brooklyn, NY")
+    parser.add_argument("--weather", default="14.0°C, partly cloudy")
+    args = parser.parse_args()
+
+    litellm.completion = _counting_completion
+
+    header = f"{'mode':<8}{'ok':>6}{'llm calls':>11}{'prompt tok':>12}{'compl tok':>11}{'p50 ms':>10}{'p95 ms':>10}"
+    rows = []
+    for mode in args.modes:
+        samples = run_mode(mode, args.moods, args.location, args.weather, args.runs)
+        wall = [s["wall_ms"] for s in samples]
+        rows.append(
+            f"{mode:<8}"
+            f"{sum(s['ok'] for s in samples):>3}/{len(samples):<2}"
+            f"{statistics.mean(s['calls'] for s in samples):>11.2f}"
+            f"{statistics.mean(s['prompt_tokens'] for s in samples):>12.0f}"
+            f"{statistics.mean(s['completion_tokens'] for s in samples):>11.0f}"
+            f"{_percentile(wall, 0.50):>10.0f}"
+            f"{_percentile(wall, 0.95):>10.0f}"
+        )
+
+    print("Per-request averages (tokens/calls) and wall-clock percentiles")
+    print(header)
+    print("\n".join(rows))
+    if "hedged" in args.modes:
+        print(f"Hedged races: {get_hedge_stats()}")
+
+
+if __name__ == "__main__":
+    main()
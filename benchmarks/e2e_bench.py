@@ -0,0 +1,271 @@
+"""
+End-to-End Latency Benchmark for Whiski
+Drives welcome → mood → location → loading → results → café details → chat through
+Streamlit's AppTest against local stand-ins for Gemini, Places and Open-Meteo
+(benchmarks/stubs.py), so no API keys or network are needed.
+
+Reports p50/p95/p99 per user step, per scene render and per backend call, and exits
+non-zero when any p95 regresses past the stored baseline for the same profile (and, with
+--require-baseline, when there is no baseline for it yet, so a CI gate can't pass vacuously).
+
+Usage:
+    python benchmarks/e2e_bench.py --iterations 20
+    python benchmarks/e2e_bench.py --profile slow_places --iterations 10
+    python benchmarks/e2e_bench.py --profile fast --update-baseline
+    python benchmarks/e2e_bench.py --profile fast --require-baseline   # CI gate
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+from stubs import PROFILES, StubBackend
+
+DEFAULT_BASELINE_PATH = os.path.join(BENCH_DIR, "e2e_baseline.json")
+
+_samples = defaultdict(list)
+
+
+def _record(metric, started):
+    _samples[metric].append((time.perf_counter() - started) * 1000)
+
+
+def _backend_for(url):
+    if "textsearch" in url:
+        return "places_text"
+    if "/details/" in url:
+        return "places_details"
+    if "/v1/forecast" in url:
+        return "weather"
+    if "/v1/search" in url:
+        return "geocoding"
+    return "other_http"
+
+
+def instrument():
+    """Time every outbound HTTP call, LLM call and scene render in this process."""
+    import litellm
+    import requests
+    import ui.scenes as scenes
+
+    original_request = requests.Session.request
+
+    def timed_request(self, method, url, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_request(self, method, url, *args, **kwargs)
+        finally:
+            _record(f"backend:{_backend_for(url)}", started)
+
+    requests.Session.request = timed_request
+
+    original_completion = litellm.completion
+
+    def timed_completion(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_completion(*args, **kwargs)
+        finally:
+            # For streamed calls this is time until the stream opens
+            _record("backend:llm_stream_open" if kwargs.get("stream") else "backend:llm", started)
+
+    litellm.completion = timed_completion
+
+    original_get_renderer = scenes.get_scene_renderer
+
+    def timed_get_renderer(scene_name):
+        renderer = original_get_renderer(scene_name)
+        if renderer is None:
+            return None
+
+        def timed_renderer():
+            started = time.perf_counter()
+            try:
+                renderer()
+            finally:
+                _record(f"scene:{scene_name}", started)
+
+        return timed_renderer
+
+    scenes.get_scene_renderer = timed_get_renderer
+
+
+def reset_caches():
+    """Start an iteration cold: no cached cafés, recommendations, chat answers, geocodes or weather."""
+    from cafe_search import invalidate_cafe_cache
+    from chat_cache import invalidate_chat_cache
+    from geocoding import invalidate_geocode_cache
+    from recommendation_cache import invalidate_recommendations
+    from weather_api import clear_weather_cache
+
+    invalidate_cafe_cache()
+    invalidate_recommendations()
+    invalidate_chat_cache()
+    invalidate_geocode_cache()
+    clear_weather_cache()
+
+
+def run_journey(timeout):
+    """One full user journey; every step is timed as the user would feel it."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=timeout)
+    steps = [
+        ("welcome", "welcome", lambda: at.run()),
+        ("mood_selection", "mood_selection", lambda: at.button(key="start_btn").click().run()),
+        ("location_input", "location_input", lambda: at.button(key="mood_chill").click().run()),
+        # Passes through the loading scene, which waits on the background recommendation
+        ("loading_to_results", "results", lambda: at.button(key="loc_0").click().run()),
+        ("cafe_details", "cafe_details", lambda: at.button(key="find_cafes").click().run()),
+        ("chat", "chat", lambda: at.button(key="chat_from_cafes").click().run()),
+        ("chat_reply", "chat", lambda: at.chat_input[0].set_value("what is hojicha?").run()),
+    ]
+    for step_name, expected_scene, action in steps:
+        started = time.perf_counter()
+        action()
+        _record(f"step:{step_name}", started)
+        if len(at.exception):
+            raise RuntimeError(f"{step_name}: app raised {at.exception[0].value}")
+        scene = at.session_state["current_scene"]
+        if scene != expected_scene:
+            raise RuntimeError(f"{step_name}: expected scene {expected_scene!r}, got {scene!r}")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize():
+    return {
+        metric: {
+            "count": len(values),
+            "p50": round(percentile(values, 50), 1),
+            "p95": round(percentile(values, 95), 1),
+            "p99": round(percentile(values, 99), 1),
+        }
+        for metric, values in sorted(_samples.items())
+    }
+
+
+def print_summary(summary):
+    print(f"{'metric':<36}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for metric, stats in summary.items():
+        print(f"{metric:<36}{stats['count']:>6}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+
+def print_render_bytes():
+    """Markdown/HTML bytes each scene sent per rerun (ui.render_metrics)."""
+    from ui.render_metrics import get_render_stats
+
+    print(f"\n{'scene':<36}{'reruns':>8}{'avg bytes':>12}{'max bytes':>12}{'elements':>10}")
+    for scene, stats in sorted(get_render_stats().items()):
+        print(f"{scene:<36}{stats['reruns']:>8}{stats['avg_bytes']:>12}{stats['max_bytes']:>12}{stats['avg_elements']:>10.1f}")
+
+
+def print_http_stats():
+    """Retries, throttling and breaker trips per outbound endpoint (http_client)."""
+    from http_client import get_http_stats
+
+    stats = get_http_stats()
+    print(f"\n{'endpoint':<20}{'requests':>10}{'failures':>10}{'retries':>9}{'throttled':>11}{'fail fast':>11}")
+    for endpoint, counts in stats["endpoints"].items():
+        if counts["requests"] or counts["fail_fast"]:
+            print(f"{endpoint:<20}{counts['requests']:>10}{counts['failures']:>10}{counts['retries']:>9}"
+                  f"{counts['throttled']:>11}{counts['fail_fast']:>11}")
+    opened = {name: b["opened_count"] for name, b in stats["breakers"].items() if b["opened_count"]}
+    if opened:
+        print(f"breakers opened: {opened}")
+
+
+def compare_to_baseline(summary, baseline, tolerance, slack_ms):
+    """Return human-readable regressions where p95 exceeds baseline * (1 + tolerance) + slack."""
+    regressions = []
+    for metric, stats in summary.items():
+        reference = baseline.get(metric)
+        if reference is None:
+            continue
+        limit = reference["p95"] * (1 + tolerance) + slack_ms
+        if stats["p95"] > limit:
+            regressions.append(f"{metric}: p95 {stats['p95']:.1f} ms > limit {limit:.1f} ms (baseline {reference['p95']:.1f} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--profile", default="default", choices=sorted(PROFILES))
+    parser.add_argument("--warm", action="store_true", help="Keep caches between iterations")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds allowed per AppTest run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--require-baseline", action="store_true", help="Fail if the profile has no stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="Allowed relative p95 growth")
+    parser.add_argument("--slack-ms", type=float, default=25, help="Allowed absolute p95 growth")
+    parser.add_argument("--seed", type=int, default=1234)
+    args = parser.parse_args()
+
+    stubs = StubBackend(args.profile, seed=args.seed).start()
+    cache_dir = tempfile.mkdtemp(prefix="whiski-bench-")
+    # Stub URLs and tuning must be set before any app module is imported (read at import
+    # time); the cache path is only read when the SQLite cache is first used
+    os.environ.update(stubs.environment())
+    os.environ["WHISKI_CACHE_PATH"] = os.path.join(cache_dir, "cache.sqlite3")
+    os.environ["WHISKI_RENDER_METRICS"] = "true"
+    os.environ.setdefault("WHISKI_LOADING_MAX_WAIT", str(args.timeout))
+    os.chdir(REPO_ROOT)  # Scenes load images by relative path
+
+    instrument()
+    failures = 0
+    try:
+        for iteration in range(args.iterations):
+            if not args.warm:
+                reset_caches()
+            try:
+                run_journey(args.timeout)
+            except Exception as e:
+                failures += 1
+                print(f"[bench] iteration {iteration + 1} failed: {e}", file=sys.stderr)
+    finally:
+        stubs.stop()
+
+    summary = summarize()
+    print(f"Profile: {args.profile}  iterations: {args.iterations}  failed: {failures}  warm cache: {args.warm}")
+    print_summary(summary)
+    print_render_bytes()
+    print_http_stats()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    if args.update_baseline:
+        baselines[args.profile] = summary
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline for profile {args.profile!r} written to {args.baseline}")
+        return 1 if failures else 0
+
+    if args.profile not in baselines:
+        print(f"No baseline for profile {args.profile!r}; run with --update-baseline to record one")
+        return 1 if (failures or args.require_baseline) else 0
+
+    regressions = compare_to_baseline(summary, baselines[args.profile], args.tolerance, args.slack_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if (regressions or failures) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Local Stand-in Backends for Whiski Benchmarks
+One threaded HTTP server that imitates the external APIs the app calls:
+
+- Google Places Text Search and Place Details  (/maps/api/place/...)
+- Open-Meteo forecast and geocoding             (/v1/forecast, /v1/search)
+- An OpenAI-compatible chat completions API     (/v1/chat/completions) that LiteLLM
+  reaches via WHISKI_MODEL_ID=openai/whiski-stub, including SSE streaming
+
+Each backend has a latency/error profile so slow or flaky upstreams can be simulated.
+
+Usage (manual testing against `streamlit run app.py`):
+    python benchmarks/stubs.py --port 8765 --profile slow_places
+    # then export the variables printed at startup
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# latency_ms: base delay, jitter_ms: uniform extra delay, error_rate: share of HTTP 500s
+PROFILES = {
+    "default": {
+        "places_text": {"latency_ms": 250, "jitter_ms": 100, "error_rate": 0.0},
+        "places_details": {"latency_ms": 120, "jitter_ms": 60, "error_rate": 0.0},
+        "weather": {"latency_ms": 80, "jitter_ms": 40, "error_rate": 0.0},
+        "geocoding": {"latency_ms": 60, "jitter_ms": 30, "error_rate": 0.0},
+        "llm": {"latency_ms": 900, "jitter_ms": 300, "error_rate": 0.0, "token_interval_ms": 15},
+    },
+    "fast": {
+        "places_text": {"latency_ms": 5, "jitter_ms": 0, "error_rate": 0.0},
+        "places_details": {"latency_ms": 5, "jitter_ms": 0, "error_rate": 0.0},
+        "weather": {"latency_ms": 5, "jitter_ms": 0, "error_rate": 0.0},
+        "geocoding": {"latency_ms": 5, "jitter_ms": 0, "error_rate": 0.0},
+        "llm": {"latency_ms": 10, "jitter_ms": 0, "error_rate": 0.0, "token_interval_ms": 0},
+    },
+    "slow_places": {
+        "places_text": {"latency_ms": 1500, "jitter_ms": 500, "error_rate": 0.0},
+        "places_details": {"latency_ms": 800, "jitter_ms": 400, "error_rate": 0.0},
+        "weather": {"latency_ms": 80, "jitter_ms": 40, "error_rate": 0.0},
+        "geocoding": {"latency_ms": 60, "jitter_ms": 30, "error_rate": 0.0},
+        "llm": {"latency_ms": 900, "jitter_ms": 300, "error_rate": 0.0, "token_interval_ms": 15},
+    },
+    "flaky": {
+        "places_text": {"latency_ms": 250, "jitter_ms": 100, "error_rate": 0.1},
+        "places_details": {"latency_ms": 120, "jitter_ms": 60, "error_rate": 0.2},
+        "weather": {"latency_ms": 80, "jitter_ms": 40, "error_rate": 0.2},
+        "geocoding": {"latency_ms": 60, "jitter_ms": 30, "error_rate": 0.1},
+        "llm": {"latency_ms": 900, "jitter_ms": 300, "error_rate": 0.05, "token_interval_ms": 15},
+    },
+}
+
+CAFE_NAMES = [
+    "Cha Cha Matcha", "Matchaful", "Kettl Tea", "Setsugekka", "Matcha Bar",
+    "Cafe Zaiya", "Hojicha House", "Uji Time", "Green Ritual", "Whisk & Co",
+    "Sencha Studio", "Leaf Lab", "Tea Ceremony", "Okayama Kissa", "Stone Garden",
+    "Moss Cafe", "Bamboo Corner", "Koicha Club", "Usucha Room", "Chasen Cafe",
+]
+
+DRINK_REPLY = (
+    "**The Drink:** Iced oat milk matcha latte with a touch of vanilla 🍵 - smooth, mellow "
+    "and lightly sweet.\n\n**The Vibe:** A sunlit corner café with plants, soft lo-fi music "
+    "and big windows, perfect for slowing down ✨"
+)
+CHAT_REPLY = (
+    "Hojicha is a Japanese green tea roasted over charcoal, which gives it a toasty, "
+    "caramel-like flavor and much less caffeine than matcha."
+)
+
+
+class StubBackend:
+    """Threaded stand-in server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, profile="default", port=0, cafe_count=20, seed=None):
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.cafe_count = cafe_count
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.request_counts = {}
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def environment(self) -> dict:
+        """Environment variables that point the app at this server."""
+        return {
+            "GOOGLE_PLACES_BASE_URL": f"{self.base_url}/maps/api/place",
+            "GOOGLE_PLACES_API_KEY": "stub-places-key",
+            "OPEN_METEO_FORECAST_URL": f"{self.base_url}/v1/forecast",
+            "OPEN_METEO_GEOCODING_URL": f"{self.base_url}/v1/search",
+            "WHISKI_MODEL_ID": "openai/whiski-stub",
+            "WHISKI_MODEL_API_BASE": f"{self.base_url}/v1",
+            "GOOGLE_GEMINI_API_KEY": "stub-llm-key",
+        }
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="whiski-stubs", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ── Behaviour helpers
+
+    def _delay_and_fail(self, backend) -> bool:
+        """Sleep per the profile; returns True if this call should fail."""
+        config = self.profile[backend]
+        with self._random_lock:
+            delay = config["latency_ms"] + self._random.uniform(0, config["jitter_ms"])
+            fail = self._random.random() < config["error_rate"]
+        self.request_counts[backend] = self.request_counts.get(backend, 0) + 1
+        time.sleep(delay / 1000)
+        return fail
+
+    def _text_search(self, query):
+        results = []
+        for i in range(self.cafe_count):
+            results.append({
+                "place_id": f"stub-place-{i}",
+                "name": CAFE_NAMES[i % len(CAFE_NAMES)],
+                "formatted_address": f"{100 + i} Stub Street, Brooklyn, NY",
+                "rating": round(3.8 + (i % 12) / 10, 1),
+                "geometry": {"location": {"lat": 40.68 + i * 0.002, "lng": -73.97 - i * 0.002}},
+                "price_level": 1 + i % 3,
+                "business_status": "OPERATIONAL",
+                "opening_hours": {"open_now": i % 5 != 0},
+                "types": ["cafe", "food", "point_of_interest"],
+            })
+        return {"status": "OK", "results": results}
+
+    def _details(self, query):
+        place_id = query.get("place_id", ["stub-place-0"])[0]
+        index = int(place_id.rsplit("-", 1)[-1]) if place_id.rsplit("-", 1)[-1].isdigit() else 0
+        return {"status": "OK", "result": {
+            "formatted_phone_number": f"(718) 555-{1000 + index:04d}",
+            "website": f"https://example.com/{place_id}",
+            "business_status": "OPERATIONAL",
+            "price_level": 1 + index % 3,
+        }}
+
+    def _chat_reply(self, body) -> str:
+        if body.get("response_format"):
+            return json.dumps({
+                "drink": "Iced oat milk matcha latte with a touch of vanilla 🍵",
+                "vibe": "A sunlit corner café with plants and soft lo-fi music ✨",
+            })
+        text = " ".join(
+            message["content"] if isinstance(message.get("content"), str)
+            else " ".join(part.get("text", "") for part in message.get("content") or [])
+            for message in body.get("messages", [])
+        )
+        answer = DRINK_REPLY if "The Drink" in text else CHAT_REPLY
+        # Same shape a CodeAgent step produces: a thought, then code calling final_answer
+        return f"Thought: I can answer directly.\n<code>\nfinal_answer({json.dumps(answer)})\n</code>"
+
+    def _make_handler(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                routes = {
+                    "/maps/api/place/textsearch/json": ("places_text", backend._text_search),
+                    "/maps/api/place/details/json": ("places_details", backend._details),
+                    "/v1/forecast": ("weather", lambda q: {"current_weather": {"temperature": 14.2, "weathercode": 2}}),
+                    "/v1/search": ("geocoding", lambda q: {"results": [{
+                        "name": q.get("name", ["New York"])[0], "latitude": 40.6782, "longitude": -73.9442,
+                    }]}),
+                }
+                if url.path not in routes:
+                    self._send_json(404, {"error": "not found"})
+                    return
+                name, handler = routes[url.path]
+                if backend._delay_and_fail(name):
+                    self._send_json(500, {"error": "stub failure"})
+                    return
+                self._send_json(200, handler(query))
+
+            def do_POST(self):
+                if not urlparse(self.path).path.endswith("/chat/completions"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if backend._delay_and_fail("llm"):
+                    self._send_json(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                    return
+                reply = backend._chat_reply(body)
+                usage = {"prompt_tokens": sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 4,
+                         "completion_tokens": len(reply) // 4}
+                usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                if body.get("stream"):
+                    self._stream(completion_id, body.get("model", "whiski-stub"), reply, usage)
+                    return
+                self._send_json(200, {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "whiski-stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": reply}}],
+                    "usage": usage,
+                })
+
+            def _stream(self, completion_id, model, reply, usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                interval = backend.profile["llm"].get("token_interval_ms", 0) / 1000
+
+                def send(payload):
+                    self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+                    self.wfile.flush()
+
+                base = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+                words = reply.split(" ")
+                for i, word in enumerate(words):
+                    piece = word if i == 0 else " " + word
+                    send({**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]})
+                    if interval:
+                        time.sleep(interval)
+                send({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+                send({**base, "choices": [], "usage": usage})
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--profile", default="default", choices=sorted(PROFILES))
+    parser.add_argument("--cafes", type=int, default=20, help="Results per Text Search")
+    args = parser.parse_args()
+
+    stubs = StubBackend(args.profile, port=args.port, cafe_count=args.cafes)
+    print(f"Serving stand-in backends on {stubs.base_url} (profile: {args.profile})")
+    for key, value in stubs.environment().items():
+        print(f"export {key}={value}")
+    try:
+        stubs._server.serve_forever()
+    except KeyboardInterrupt:
+        stubs.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+# cache_warmer.py
+# Pre-fills the shared caches for the fixed mood × location-preset matrix, so the first
+# visitor for each combination gets a cache hit instead of paying agent + Places + weather.
+#
+# For each preset the current weather is fetched (its bucket is part of the recommendation
+# key), then the café search and every mood's recommendation variants are generated where
+# they're missing or older than the refresh threshold. Work runs on a bounded pool and stops
+# starting tasks once an API budget is spent (upstream calls per pass: every LLM request and
+# every Places / Open-Meteo request, retries included); missing entries go first, then the
+# stalest, so a small budget still maximizes coverage.
+#
+# Usage:
+#     python cache_warmer.py warm [--concurrency 4] [--budget 100]
+#     python cache_warmer.py report
+#     python cache_warmer.py schedule --interval 3600      # warm now, then every interval
+#
+# WHISKI_CACHE_WARMER=true also runs the scheduler inside the app / API process.
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dotenv import load_dotenv
+import http_client
+from agent_pool import AGENT_POOL_SIZE
+from geocoding import LOCATION_PRESETS
+from mood_drink_map import MOODS
+
+load_dotenv()
+
+CACHE_WARMER_ENABLED = os.getenv("WHISKI_CACHE_WARMER", "false").lower() == "true"
+WARM_INTERVAL = float(os.getenv("WHISKI_CACHE_WARM_INTERVAL_SECONDS", str(60 * 60)))
+WARM_CONCURRENCY = int(os.getenv("WHISKI_CACHE_WARM_CONCURRENCY", "4"))
+# Recommendation tasks running at once; kept below the agent pool size so the warmer never
+# takes every agent and leaves live requests queueing behind it
+WARM_AGENT_SLOTS = int(os.getenv("WHISKI_CACHE_WARM_AGENT_SLOTS", str(max(1, AGENT_POOL_SIZE - 2))))
+WARM_BUDGET = int(os.getenv("WHISKI_CACHE_WARM_BUDGET", "100"))  # upstream calls per pass
+# Entries older than this are regenerated; well inside the 6h cache TTLs
+WARM_REFRESH_AFTER = float(os.getenv("WHISKI_CACHE_WARM_REFRESH_AFTER_SECONDS", str(3 * 60 * 60)))
+
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+_scheduler_stop = threading.Event()
+_last_run = {}
+_agent_slots = threading.BoundedSemaphore(WARM_AGENT_SLOTS)
+
+
+def _current_buckets() -> dict:
+    """Current WeatherReport per preset (None where weather is unavailable)."""
+    from weather_api import get_weather
+
+    return {location: get_weather(location) for location in LOCATION_PRESETS}
+
+
+def coverage_report(weather: dict = None) -> dict:
+    """
+    Coverage and freshness of the matrix for the current weather.
+
+    Args:
+        weather: {location: WeatherReport} already fetched, fetched if not given
+
+    Returns:
+        dict: 'cells' ({(mood, location): {'bucket', 'variants', 'age'}}), 'cafes'
+        ({location: {'count', 'age'}}) and summary fractions 'recommendation_coverage',
+        'cafe_coverage' and 'fresh' (covered and younger than the refresh threshold)
+    """
+    from cafe_search import peek_cafe_cache
+    from recommendation_cache import RECOMMENDATION_VARIANTS, peek_recommendations
+
+    weather = weather if weather is not None else _current_buckets()
+    cells = {}
+    for location in LOCATION_PRESETS:
+        bucket = weather[location].bucket if weather.get(location) else None
+        for mood in MOODS.values():
+            variants, age = peek_recommendations(mood, location, bucket)
+            cells[(mood, location)] = {"bucket": bucket or "unknown", "variants": variants, "age": age}
+    cafes = {}
+    for location in LOCATION_PRESETS:
+        count, age = peek_cafe_cache(location)
+        cafes[location] = {"count": count, "age": age}
+
+    covered = [c for c in cells.values() if c["variants"] >= RECOMMENDATION_VARIANTS]
+    entries = covered + [c for c in cafes.values() if c["count"]]
+    fresh = [c for c in entries if c["age"] is not None and c["age"] < WARM_REFRESH_AFTER]
+    return {
+        "cells": cells,
+        "cafes": cafes,
+        "recommendation_coverage": round(len(covered) / len(cells), 3),
+        "cafe_coverage": round(sum(1 for c in cafes.values() if c["count"]) / len(cafes), 3),
+        "fresh": round(len(fresh) / (len(cells) + len(cafes)), 3),
+        "variants_per_key": RECOMMENDATION_VARIANTS,
+    }
+
+
+def _plan(report: dict, weather: dict) -> list:
+    """Tasks needed, most valuable first: ('cafes', location) / ('recommendation', mood, location)."""
+    needed = report["variants_per_key"]
+    tasks = []  # (priority, age, task)
+    for location, entry in report["cafes"].items():
+        if not entry["count"]:
+            tasks.append((0, 0, ("cafes", location)))
+        elif entry["age"] >= WARM_REFRESH_AFTER:
+            tasks.append((2, -entry["age"], ("cafes", location)))
+    for (mood, location), cell in report["cells"].items():
+        missing = needed - cell["variants"]
+        if missing > 0:
+            # Cells closest to being servable first: one missing variant unlocks hits
+            tasks.extend((1, missing, ("recommendation", mood, location)) for _ in range(missing))
+        elif cell["age"] >= WARM_REFRESH_AFTER:
+            # One new variant rotates out the oldest and restarts the entry's TTL
+            tasks.append((2, -cell["age"], ("recommendation", mood, location)))
+    tasks.sort(key=lambda t: t[:2])
+    return [task for _, _, task in tasks]
+
+
+def _warm_entry(task: tuple, weather: dict) -> bool:
+    """Generate one planned entry; True only if the cache now holds something new for it."""
+    if task[0] == "cafes":
+        from cafe_search import search_matcha_cafes
+
+        return bool(search_matcha_cafes(task[1], refresh=True))
+    from recommendation import generate_recommendation
+    from recommendation_cache import store_recommendation
+
+    _, mood, location = task
+    report = weather.get(location)
+    bucket = report.bucket if report else None
+    with _agent_slots:
+        result = generate_recommendation(mood, location, str(report) if report else "unknown")
+    # Snippet fallbacks aren't cached and a repeat of a cached variant stores nothing
+    return result.structured and store_recommendation(mood, location, bucket, result.as_dict())
+
+
+def _run_task(task: tuple, weather: dict, verbose: bool = False) -> tuple:
+    """(succeeded, upstream calls spent) for one planned task."""
+    with http_client.upstream_calls() as calls:
+        try:
+            ok = _warm_entry(task, weather)
+        except Exception as e:
+            ok = False
+            if verbose:
+                print(f"  {task} failed: {e}", file=sys.stderr)
+    return ok, calls[0]
+
+
+def warm(concurrency: int = None, budget: int = None, verbose: bool = False) -> dict:
+    """
+    One warming pass over the matrix.
+
+    Args:
+        concurrency: Tasks run in parallel (recommendation tasks are further limited to WARM_AGENT_SLOTS)
+        budget: Upstream calls (LLM, Places and Open-Meteo requests) after which no new task starts
+
+    Returns:
+        dict: 'planned' and 'run' tasks, 'calls' (upstream calls spent), 'failed' (tasks that
+        added nothing), 'deferred' (not started, over budget), 'seconds' and the coverage
+        report after the pass
+    """
+    concurrency = concurrency or WARM_CONCURRENCY
+    budget = WARM_BUDGET if budget is None else budget
+    started = time.perf_counter()
+
+    with http_client.upstream_calls() as weather_calls:
+        weather = _current_buckets()
+    tasks = _plan(coverage_report(weather), weather)
+    pending = iter(tasks)
+    run = failed = 0
+    spent = weather_calls[0]
+    # Calls are only known once a task finishes, so tasks in flight can overshoot the budget
+    # by up to `concurrency` tasks' worth; no new task starts after it is spent
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="cache-warmer") as executor:
+        futures = set()
+        while True:
+            while len(futures) < concurrency and spent < budget:
+                task = next(pending, None)
+                if task is None:
+                    break
+                futures.add(executor.submit(_run_task, task, weather, verbose))
+                run += 1
+            if not futures:
+                break
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                ok, task_calls = future.result()
+                spent += task_calls
+                failed += not ok
+
+    result = {
+        "planned": len(tasks),
+        "run": run,
+        "calls": spent,
+        "failed": failed,
+        "deferred": len(tasks) - run,
+        "seconds": round(time.perf_counter() - started, 1),
+        "report": coverage_report(weather),
+    }
+    _last_run.update(result, finished_at=time.time())
+    return result
+
+
+def _scheduler_loop(interval: float):
+    while not _scheduler_stop.is_set():
+        try:
+            warm()
+        except Exception as e:
+            print(f"[cache_warmer] Warming pass failed: {e}", file=sys.stderr)
+        _scheduler_stop.wait(interval)
+
+
+def start_scheduler(interval: float = None) -> bool:
+    """
+    Warm now and then every `interval` seconds on a daemon thread; idempotent per process.
+
+    Returns:
+        bool: True if this call started the scheduler
+    """
+    global _scheduler_thread
+    with _scheduler_lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return False
+        _scheduler_stop.clear()
+        _scheduler_thread = threading.Thread(
+            target=_scheduler_loop, args=(interval or WARM_INTERVAL,), name="cache-warmer", daemon=True
+        )
+        _scheduler_thread.start()
+        return True
+
+
+def stop_scheduler():
+    _scheduler_stop.set()
+
+
+def maybe_start_scheduler() -> bool:
+    """Start the in-process scheduler if WHISKI_CACHE_WARMER=true."""
+    return CACHE_WARMER_ENABLED and start_scheduler()
+
+
+def get_warmer_stats() -> dict:
+    """Summary of the last warming pass in this process (empty before the first)."""
+    stats = {k: v for k, v in _last_run.items() if k != "report"}
+    if "report" in _last_run:
+        report = _last_run["report"]
+        for key in ("recommendation_coverage", "cafe_coverage", "fresh"):
+            stats[key] = report[key]
+    stats["scheduler_running"] = _scheduler_thread is not None and _scheduler_thread.is_alive()
+    return stats
+
+
+def _format_age(age) -> str:
+    if age is None:
+        return "-"
+    return f"{age / 60:.0f}m" if age < 3600 else f"{age / 3600:.1f}h"
+
+
+def print_report(report: dict):
+    needed = report["variants_per_key"]
+    print(f"{'mood':<12}" + "".join(f"{location:>18}" for location in LOCATION_PRESETS))
+    for mood in MOODS.values():
+        row = f"{mood:<12}"
+        for location in LOCATION_PRESETS:
+            cell = report["cells"][(mood, location)]
+            row += f"{cell['variants']}/{needed} {cell['bucket']:<7}{_format_age(cell['age']):>6}".rjust(18)
+        print(row)
+    row = f"{'cafés':<12}"
+    for location in LOCATION_PRESETS:
+        entry = report["cafes"][location]
+        row += f"{entry['count']:>3} {_format_age(entry['age']):>6}".rjust(18)
+    print(row)
+    print(
+        f"\nrecommendation coverage {report['recommendation_coverage']:.0%}, "
+        f"café coverage {report['cafe_coverage']:.0%}, "
+        f"fresh (< {_format_age(WARM_REFRESH_AFTER)}) {report['fresh']:.0%}"
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Warm the recommendation and café caches for the preset matrix")
+    parser.add_argument("command", nargs="?", default="warm", choices=["warm", "report", "schedule"])
+    parser.add_argument("--concurrency", type=int, default=WARM_CONCURRENCY)
+    parser.add_argument("--budget", type=int, default=WARM_BUDGET, help="Max upstream calls per pass")
+    parser.add_argument("--interval", type=float, default=WARM_INTERVAL, help="Seconds between passes (schedule)")
+    args = parser.parse_args(argv)
+
+    if args.command == "report":
+        print_report(coverage_report())
+        return 0
+    while True:
+        result = warm(args.concurrency, args.budget, verbose=True)
+        print(
+            f"Ran {result['run']}/{result['planned']} tasks ({result['calls']} upstream calls) in {result['seconds']}s "
+            f"({result['failed']} failed, {result['deferred']} over budget)\n"
+        )
+        print_report(result["report"])
+        if args.command != "schedule":
+            return 0 if not result["failed"] else 1
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
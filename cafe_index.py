@@ -0,0 +1,283 @@
+# cafe_index.py
+# Local store of matcha cafés keyed by place_id, with a lat/lng grid for nearest-neighbour
+# queries, so "cafés near X" is answered in-process instead of by a live Places search.
+#
+# Every Places search feeds the store (cafés with coordinates, later merged with their
+# details) and marks the grid cells around the searched point as covered. A query whose cell
+# was covered within CAFE_INDEX_FRESH_SECONDS is served from the index alone, an older cell is
+# served and refreshed in the background (by cafe_search), and a never-searched cell goes to
+# Places. Cafés and coverage persist in the shared SQLite cache, so the index survives restarts.
+# In memory, cafés and coverage expire with the same RETENTION_SECONDS TTL as their disk
+# entries (an expired cell counts as never searched), and each grid is an LRU of at most
+# CAFE_INDEX_MAX_CELLS cells; evicting a café cell forgets its cafés until a search re-adds them.
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+from disk_cache import DiskCache
+
+load_dotenv()
+
+CAFE_INDEX_ENABLED = os.getenv("CAFE_INDEX_ENABLED", "true").lower() == "true"
+# Grid cell size; 0.01° is ~1.1 km north-south and ~0.85 km east-west in NYC
+CELL_DEGREES = float(os.getenv("CAFE_INDEX_CELL_DEGREES", "0.01"))
+# Matcha cafés barely change day to day
+FRESH_SECONDS = float(os.getenv("CAFE_INDEX_FRESH_SECONDS", str(24 * 60 * 60)))
+RETENTION_SECONDS = float(os.getenv("CAFE_INDEX_RETENTION_SECONDS", str(30 * 24 * 60 * 60)))
+MAX_CAFES = int(os.getenv("CAFE_INDEX_MAX_CAFES", "5000"))
+MAX_CELLS = int(os.getenv("CAFE_INDEX_MAX_CELLS", "20000"))
+
+# A Places "near X" search is dense around X and thins out towards its radius, so only the
+# cells within this fraction of the radius count as covered by it
+COVERAGE_FRACTION = 0.5
+
+EARTH_RADIUS_M = 6371008.8
+
+# Fields that come from Place Details; a later search result without them keeps the old ones
+_DETAIL_KEYS = ("phone", "website")
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance in meters."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def haversine_m_many(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """Great-circle distances in meters from one point to arrays of points, in one vectorized pass."""
+    phi1 = math.radians(lat)
+    phi2 = np.radians(np.asarray(lats, dtype=float))
+    dlng = np.radians(np.asarray(lngs, dtype=float) - lng)
+    a = np.sin((phi2 - phi1) / 2) ** 2 + math.cos(phi1) * np.cos(phi2) * np.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def coordinates(cafes) -> tuple:
+    """(lats, lngs) arrays for cafés; NaN where a café has no coordinates."""
+    # None becomes NaN with dtype=float, and NaN distances never pass a radius filter
+    lats = np.array([cafe.get("lat") for cafe in cafes], dtype=float)
+    lngs = np.array([cafe.get("lng") for cafe in cafes], dtype=float)
+    return lats, lngs
+
+
+class CafeIndex:
+    """
+    In-memory grid of cafés backed by DiskCache; safe to share across threads.
+
+    Loaded from disk on first use; writes go to memory and disk. Entries in memory expire
+    with the disk TTL, and each grid keeps at most `max_cells` cells (least recently used
+    evicted first).
+    """
+
+    def __init__(self, cell_degrees: float = CELL_DEGREES, fresh_seconds: float = FRESH_SECONDS,
+                 store: DiskCache = None, cells_store: DiskCache = None, max_cells: int = MAX_CELLS):
+        self.cell_degrees = cell_degrees
+        self.fresh_seconds = fresh_seconds
+        self.max_cells = max_cells
+        self._store = store or DiskCache("cafe_index", ttl_seconds=RETENTION_SECONDS, max_entries=MAX_CAFES)
+        self._cells_store = cells_store or DiskCache(
+            "cafe_index_cells", ttl_seconds=RETENTION_SECONDS, max_entries=max_cells
+        )
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._cafes = {}               # place_id -> (café dict, time stored)
+        self._grid = OrderedDict()     # (row, col) -> {place_id}, least recently used first
+        self._covered = OrderedDict()  # (row, col) -> time of the last Places search covering it
+        self._stats = {"queries": 0, "fresh": 0, "stale": 0, "missing": 0, "expired": 0, "evicted_cells": 0}
+        self._query_seconds = 0.0
+
+    def _cell(self, lat: float, lng: float) -> tuple:
+        return math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees)
+
+    def _cell_ranges(self, lat: float, lng: float, radius_m: float):
+        """Rows and columns of the cells overlapping the circle's bounding box."""
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        rows = range(math.floor((lat - dlat) / self.cell_degrees), math.floor((lat + dlat) / self.cell_degrees) + 1)
+        cols = range(math.floor((lng - dlng) / self.cell_degrees), math.floor((lng + dlng) / self.cell_degrees) + 1)
+        return rows, cols
+
+    def _ensure_loaded(self):
+        # Caller holds the lock
+        if self._loaded:
+            return
+        now = time.time()
+        # Oldest first, so the LRU order starts out as storage order
+        for _, cafe, age in sorted(self._store.items(), key=lambda item: -item[2]):
+            self._add(cafe, now - age)
+        for key, searched_at, _ in sorted(self._cells_store.items(), key=lambda item: item[1]):
+            row, col = key.split(",")
+            self._cover((int(row), int(col)), searched_at)
+        self._loaded = True
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return now - stored_at >= self._store.ttl_seconds
+
+    def _add(self, cafe: dict, stored_at: float):
+        # Caller holds the lock
+        place_id = cafe["place_id"]
+        self._discard(place_id)
+        self._cafes[place_id] = (cafe, stored_at)
+        cell = self._cell(cafe["lat"], cafe["lng"])
+        self._grid.setdefault(cell, set()).add(place_id)
+        self._grid.move_to_end(cell)
+        while len(self._grid) > self.max_cells:
+            _, evicted = self._grid.popitem(last=False)
+            for evicted_id in evicted:
+                del self._cafes[evicted_id]
+            self._stats["evicted_cells"] += 1
+
+    def _discard(self, place_id: str):
+        # Caller holds the lock
+        previous = self._cafes.pop(place_id, None)
+        if previous is None:
+            return
+        cell = self._cell(previous[0]["lat"], previous[0]["lng"])
+        ids = self._grid.get(cell)
+        if ids is not None:
+            ids.discard(place_id)
+            if not ids:
+                del self._grid[cell]
+
+    def _cover(self, cell: tuple, searched_at: float):
+        # Caller holds the lock
+        self._covered[cell] = searched_at
+        self._covered.move_to_end(cell)
+        while len(self._covered) > self.max_cells:
+            self._covered.popitem(last=False)
+            self._stats["evicted_cells"] += 1
+
+    def upsert(self, cafes) -> int:
+        """
+        Add or update cafés from a search; ones without place_id or coordinates are skipped.
+
+        Returns:
+            int: Number of cafés stored
+        """
+        stored = []
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            for cafe in cafes:
+                if not cafe.get("place_id") or cafe.get("lat") is None or cafe.get("lng") is None:
+                    continue
+                existing, _ = self._cafes.get(cafe["place_id"], (None, None))
+                if cafe.get("details_pending") and existing is not None and not existing.get("details_pending"):
+                    cafe = {**cafe, **{key: existing.get(key) for key in _DETAIL_KEYS}}
+                    cafe.pop("details_pending")
+                self._add(cafe, now)
+                stored.append(cafe)
+        for cafe in stored:
+            self._store.set(cafe["place_id"], cafe)
+        return len(stored)
+
+    def mark_covered(self, lat: float, lng: float, radius_m: float, searched_at: float = None):
+        """Record a Places search around (lat, lng): the cells near its center are now known."""
+        searched_at = searched_at or time.time()
+        reach = radius_m * COVERAGE_FRACTION
+        rows, cols = self._cell_ranges(lat, lng, reach)
+        cells = {self._cell(lat, lng)}
+        for row in rows:
+            for col in cols:
+                center_lat = (row + 0.5) * self.cell_degrees
+                center_lng = (col + 0.5) * self.cell_degrees
+                if haversine_m(lat, lng, center_lat, center_lng) <= reach:
+                    cells.add((row, col))
+        with self._lock:
+            self._ensure_loaded()
+            for cell in cells:
+                self._cover(cell, searched_at)
+        for row, col in cells:
+            self._cells_store.set(f"{row},{col}", searched_at)
+
+    def coverage(self, lat: float, lng: float) -> str:
+        """
+        How well the index knows this point.
+
+        Returns:
+            str: "fresh" (searched recently), "stale" (searched, refresh due) or "missing"
+            (never searched, or so long ago that the search has expired)
+        """
+        cell = self._cell(lat, lng)
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            searched_at = self._covered.get(cell)
+            if searched_at is not None and self._expired(searched_at, now):
+                del self._covered[cell]
+                self._stats["expired"] += 1
+                searched_at = None
+            if searched_at is None:
+                state = "missing"
+            else:
+                self._covered.move_to_end(cell)
+                state = "fresh" if now - searched_at < self.fresh_seconds else "stale"
+            self._stats[state] += 1
+        return state
+
+    def nearby(self, lat: float, lng: float, radius_m: float, limit: int = None) -> list:
+        """
+        Cafés within `radius_m` of (lat, lng), nearest first.
+
+        Returns:
+            list: Copies of the stored café dicts, with "distance_m" set (expired cafés
+            are dropped, not served)
+        """
+        started = time.perf_counter()
+        now = time.time()
+        rows, cols = self._cell_ranges(lat, lng, radius_m)
+        with self._lock:
+            self._ensure_loaded()
+            candidates, expired = [], []
+            for cell in [(row, col) for row in rows for col in cols if (row, col) in self._grid]:
+                self._grid.move_to_end(cell)
+                for place_id in self._grid[cell]:
+                    cafe, stored_at = self._cafes[place_id]
+                    (expired if self._expired(stored_at, now) else candidates).append(cafe)
+            for cafe in expired:
+                self._discard(cafe["place_id"])
+            self._stats["expired"] += len(expired)
+        results = []
+        if candidates:
+            distances = haversine_m_many(lat, lng, *coordinates(candidates))
+            order = np.argsort(distances, kind="stable")
+            for i in order[distances[order] <= radius_m][:limit]:
+                results.append({**candidates[i], "distance_m": round(float(distances[i]))})
+        with self._lock:
+            self._stats["queries"] += 1
+            self._query_seconds += time.perf_counter() - started
+        return results
+
+    def invalidate(self):
+        """Forget every café and all coverage (memory and disk)."""
+        with self._lock:
+            self._cafes.clear()
+            self._grid.clear()
+            self._covered.clear()
+            self._loaded = False
+        self._store.invalidate()
+        self._cells_store.invalidate()
+
+    def stats(self) -> dict:
+        """Size, coverage and query counters of the index."""
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded()
+            stats = dict(self._stats)
+            stats["cafes"] = len(self._cafes)
+            stats["cafe_cells"] = len(self._grid)
+            stats["covered_cells"] = len(self._covered)
+            stats["fresh_cells"] = sum(1 for t in self._covered.values() if now - t < self.fresh_seconds)
+            stats["avg_query_ms"] = round(self._query_seconds / stats["queries"] * 1000, 3) if stats["queries"] else 0.0
+        lookups = stats["fresh"] + stats["stale"] + stats["missing"]
+        stats["hit_rate"] = round((stats["fresh"] + stats["stale"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+cafe_index = CafeIndex()
@@ -0,0 +1,227 @@
+# cafe_ranking.py
+# Mood-aware ordering of candidate cafés, and the card text that goes with it.
+#
+# Every café becomes a row of features in [0, 1]: rating, proximity, open now, affordability,
+# and quiet / cozy / bright / lively attributes derived from its name, Places types and
+# popularity. A mood is a weight vector over those features, so ranking all candidates is one
+# matrix-vector product plus a sort. Ties fall back to distance and then place_id, so the
+# same candidates and mood always give the same order; results are memoized per
+# (location, mood, candidates) and reruns or repeat searches don't score again.
+
+import math
+import os
+import threading
+import zlib
+from collections import OrderedDict
+import numpy as np
+from dotenv import load_dotenv
+from disk_cache import normalize_location
+
+load_dotenv()
+
+RANKING_CACHE_MAX_ENTRIES = int(os.getenv("CAFE_RANKING_CACHE_MAX_ENTRIES", "256"))
+# Proximity halves every this many meters
+PROXIMITY_HALF_DISTANCE_M = float(os.getenv("CAFE_RANKING_HALF_DISTANCE_M", "1500"))
+
+FEATURES = ("rating", "proximity", "open_now", "affordable", "quiet", "cozy", "bright", "lively")
+ATTRIBUTES = ("quiet", "cozy", "bright", "lively")
+
+# Value a feature takes when Places didn't say (older cached cafés, missing fields)
+_UNKNOWN = {"rating": 0.5, "proximity": 0.0, "open_now": 0.5, "affordable": 0.5}
+
+# Name words and Places types suggesting each attribute
+_ATTRIBUTE_WORDS = {
+    "quiet": ("tea", "zen", "ceremony", "garden", "moss", "stone", "library", "kissa", "room", "sanctuary"),
+    "cozy": ("house", "home", "nook", "corner", "den", "kitchen", "cottage", "hearth", "bakery", "bamboo"),
+    "bright": ("studio", "lab", "loft", "sun", "light", "bright", "bloom", "green", "leaf", "uji"),
+    "lively": ("bar", "club", "market", "hall", "co", "espresso", "roasters", "cha"),
+}
+_ATTRIBUTE_TYPES = {
+    "quiet": ("book_store", "library", "spa"),
+    "cozy": ("bakery",),
+    "bright": ("art_gallery", "florist"),
+    "lively": ("bar", "restaurant", "night_club", "shopping_mall", "meal_takeaway"),
+}
+# Reviews at which a café counts as fully "lively" (busy) rather than tucked away
+_POPULAR_REVIEWS = 1000
+
+# Weights per mood over FEATURES; unknown moods rank on rating and distance only
+MOOD_WEIGHTS = {
+    "chill":      {"rating": 1.0, "proximity": 1.0, "open_now": 0.8, "affordable": 0.3, "quiet": 0.3, "cozy": 0.4, "bright": 0.6, "lively": 0.0},
+    "anxious":    {"rating": 0.8, "proximity": 1.2, "open_now": 1.0, "affordable": 0.2, "quiet": 1.2, "cozy": 0.6, "bright": 0.2, "lively": -0.8},
+    "creative":   {"rating": 0.8, "proximity": 0.6, "open_now": 0.8, "affordable": 0.4, "quiet": 0.2, "cozy": 0.3, "bright": 1.0, "lively": 0.4},
+    "reflective": {"rating": 1.0, "proximity": 0.6, "open_now": 0.6, "affordable": 0.1, "quiet": 1.2, "cozy": 0.4, "bright": 0.1, "lively": -0.6},
+    "energized":  {"rating": 0.8, "proximity": 0.8, "open_now": 1.0, "affordable": 0.5, "quiet": -0.4, "cozy": 0.0, "bright": 0.5, "lively": 1.0},
+    "cozy":       {"rating": 1.0, "proximity": 0.8, "open_now": 0.8, "affordable": 0.3, "quiet": 0.4, "cozy": 1.2, "bright": -0.2, "lively": -0.2},
+}
+DEFAULT_WEIGHTS = {"rating": 1.0, "proximity": 1.0, "open_now": 0.5}
+
+_WEIGHT_VECTORS = {
+    mood: np.array([weights.get(feature, 0.0) for feature in FEATURES])
+    for mood, weights in {**MOOD_WEIGHTS, None: DEFAULT_WEIGHTS}.items()
+}
+
+# Card text for the attribute that counts most for the mood
+ATMOSPHERES = {
+    "quiet": "Zen-inspired space perfect for mindful sipping",
+    "cozy": "Cozy corner spot ideal for creative work",
+    "bright": "Bright, minimalist space with calming vibes",
+    "lively": "Warm gathering place for matcha enthusiasts",
+    None: "Modern café with traditional Japanese touches",
+}
+SPECIALITIES = {
+    "ceremonial": "Traditional matcha ceremonies & modern beverages",
+    "sweets": "Artisanal matcha drinks & Japanese sweets",
+    "premium": "Premium matcha lattes & ceremonial grade tea",
+    "everyday": (
+        "Organic matcha & plant-based milk options",
+        "Signature matcha blends & seasonal specialties",
+    ),
+}
+_CEREMONIAL_WORDS = ("tea", "ceremony", "kissa", "koicha", "usucha", "chasen", "sencha", "hojicha")
+_SWEETS_WORDS = ("bakery", "sweets", "mochi", "dessert", "patisserie")
+
+_cache_lock = threading.Lock()
+_ranking_cache = OrderedDict()  # (location, mood, fingerprint) -> (order, scores, atmospheres)
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _words(cafe: dict) -> set:
+    name = (cafe.get("name") or "").lower().replace("&", " ")
+    return set(name.split()) | set(cafe.get("types") or ())
+
+
+def _attribute_flags(cafe: dict) -> list:
+    words = _words(cafe)
+    return [
+        any(word in words for word in _ATTRIBUTE_WORDS[attribute] + _ATTRIBUTE_TYPES[attribute])
+        for attribute in ATTRIBUTES
+    ]
+
+
+def feature_matrix(cafes) -> np.ndarray:
+    """One row per café, one column per FEATURES entry, all in [0, 1]."""
+    def column(key):
+        return np.array([cafe.get(key) for cafe in cafes], dtype=float)
+
+    ratings = np.clip((column("rating") - 3.0) / 2.0, 0.0, 1.0)
+    proximity = 0.5 ** (column("distance_m") / PROXIMITY_HALF_DISTANCE_M)
+    open_now = column("open_now")
+    affordable = (4.0 - column("price_level")) / 3.0
+
+    flags = np.array([_attribute_flags(cafe) for cafe in cafes], dtype=float).reshape(len(cafes), len(ATTRIBUTES))
+    reviews = np.nan_to_num(column("user_ratings_total"), nan=0.0)
+    popularity = np.clip(np.log10(reviews + 1) / math.log10(_POPULAR_REVIEWS + 1), 0.0, 1.0)
+    quiet, cozy, bright, lively = flags.T
+    # Busy places are livelier and less quiet than their name suggests
+    lively = np.maximum(lively, popularity)
+    quiet = quiet * (1.0 - 0.5 * popularity)
+
+    columns = {
+        "rating": ratings, "proximity": proximity, "open_now": open_now, "affordable": affordable,
+        "quiet": quiet, "cozy": cozy, "bright": bright, "lively": lively,
+    }
+    matrix = np.column_stack([columns[feature] for feature in FEATURES])
+    for i, feature in enumerate(FEATURES):
+        matrix[:, i] = np.nan_to_num(matrix[:, i], nan=_UNKNOWN.get(feature, 0.0))
+    return np.clip(matrix, 0.0, 1.0)
+
+
+def _fingerprint(cafes) -> tuple:
+    return tuple(
+        (cafe.get("place_id") or cafe.get("name"), cafe.get("rating"), cafe.get("distance_m"),
+         cafe.get("open_now"), cafe.get("price_level"), cafe.get("business_status"))
+        for cafe in cafes
+    )
+
+
+def _score(cafes, mood: str):
+    """(order, scores, atmospheres) for cafés that aren't permanently closed."""
+    matrix = feature_matrix(cafes)
+    weights = _WEIGHT_VECTORS.get(mood, _WEIGHT_VECTORS[None])
+    scores = matrix @ weights
+    # Temporarily closed cafés sink to the end; permanently closed ones are dropped
+    status = [cafe.get("business_status") for cafe in cafes]
+    scores = scores - np.array([s == "CLOSED_TEMPORARILY" for s in status], dtype=float) * weights.sum()
+    keep = np.array([s != "CLOSED_PERMANENTLY" for s in status])
+
+    attribute_columns = [FEATURES.index(attribute) for attribute in ATTRIBUTES]
+    contributions = matrix[:, attribute_columns] * weights[attribute_columns]
+    best = contributions.argmax(axis=1)
+    atmospheres = [ATTRIBUTES[b] if contributions[i, b] > 0 else None for i, b in enumerate(best)]
+
+    distances = np.nan_to_num(np.array([cafe.get("distance_m") for cafe in cafes], dtype=float), nan=np.inf)
+    ids = np.array([str(cafe.get("place_id") or cafe.get("name") or "") for cafe in cafes])
+    # Last key sorts first: best score, then nearest, then place_id
+    order = np.lexsort((ids, distances, -np.round(scores, 6)))
+    order = [int(i) for i in order if keep[i]]
+    return order, [round(float(s), 3) for s in scores], atmospheres
+
+
+def rank_cafes(cafes, mood: str, location: str = "") -> list:
+    """
+    Order cafés for a mood, best match first.
+
+    Args:
+        cafes: Café dicts (with "distance_m" from cafe_search.add_distances for proximity)
+        mood: Selected mood; unknown moods rank by rating, distance and opening hours
+        location: Searched location, part of the cache key
+
+    Returns:
+        list: Copies of the cafés with "mood_score" and "atmosphere" (the attribute that
+        counts most for the mood, or None) set; permanently closed cafés are left out
+    """
+    if not cafes:
+        return []
+    mood = (mood or "").lower()
+    key = (normalize_location(location), mood, _fingerprint(cafes))
+    with _cache_lock:
+        ranked = _ranking_cache.get(key)
+        if ranked is not None:
+            _ranking_cache.move_to_end(key)
+            _cache_stats["hits"] += 1
+    if ranked is None:
+        ranked = _score(cafes, mood)
+        with _cache_lock:
+            _cache_stats["misses"] += 1
+            _ranking_cache[key] = ranked
+            while len(_ranking_cache) > RANKING_CACHE_MAX_ENTRIES:
+                _ranking_cache.popitem(last=False)
+    order, scores, atmospheres = ranked
+    return [{**cafes[i], "mood_score": scores[i], "atmosphere": atmospheres[i]} for i in order]
+
+
+def describe_cafe(cafe: dict) -> dict:
+    """
+    Card text for a ranked café.
+
+    Returns:
+        dict: 'speciality', 'atmosphere' and 'price_range' ("$" to "$$$$", "$$" if unknown)
+    """
+    words = _words(cafe)
+    price_level = cafe.get("price_level")
+    if any(word in words for word in _CEREMONIAL_WORDS):
+        speciality = SPECIALITIES["ceremonial"]
+    elif any(word in words for word in _SWEETS_WORDS):
+        speciality = SPECIALITIES["sweets"]
+    elif price_level is not None and price_level >= 3:
+        speciality = SPECIALITIES["premium"]
+    else:
+        # Stable across processes, unlike hash()
+        everyday = SPECIALITIES["everyday"]
+        key = str(cafe.get("place_id") or cafe.get("name") or "")
+        speciality = everyday[zlib.crc32(key.encode()) % len(everyday)]
+    return {
+        "speciality": speciality,
+        "atmosphere": ATMOSPHERES.get(cafe.get("atmosphere"), ATMOSPHERES[None]),
+        "price_range": "$" * price_level if price_level else "$$",
+    }
+
+
+def get_ranking_stats() -> dict:
+    """Hit/miss counters and size of the ranking memo."""
+    with _cache_lock:
+        stats = dict(_cache_stats, entries=len(_ranking_cache))
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    return stats
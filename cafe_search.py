@@ -1,63 +1,397 @@
 # cafe_search.py
 
+import contextvars
+import math
 import requests
 import os
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dotenv import load_dotenv
-from telemetry import langfuse
-from langfuse import observe, get_client
+import http_client
+from cafe_index import CAFE_INDEX_ENABLED, cafe_index, coordinates, haversine_m_many
+from disk_cache import DiskCache, normalize_location
+from geocoding import geocode_location
+from telemetry import observe
 
 load_dotenv()
 GOOGLE_PLACES_API_KEY = os.getenv("GOOGLE_PLACES_API_KEY")
 
-@observe(name="api.googlemaps_search_matcha_cafes", as_type="tool")
-def search_matcha_cafes(location: str, radius=3500):
-    url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
+PLACES_BASE_URL = os.getenv("GOOGLE_PLACES_BASE_URL", "https://maps.googleapis.com/maps/api/place")
+TEXT_SEARCH_URL = f"{PLACES_BASE_URL}/textsearch/json"
+DETAILS_URL = f"{PLACES_BASE_URL}/details/json"
+DETAILS_FIELDS = "formatted_phone_number,website,business_status,price_level"
+
+# Details fan-out width; timeouts, retries and the Places rate limit live in http_client
+DETAILS_MAX_WORKERS = int(os.getenv("CAFE_DETAILS_MAX_WORKERS", "8"))
+
+# A next_page_token only becomes valid a moment after it's issued; retry it this many times
+PAGE_TOKEN_RETRIES = int(os.getenv("CAFE_PAGE_TOKEN_RETRIES", "3"))
+PAGE_TOKEN_RETRY_DELAY = float(os.getenv("CAFE_PAGE_TOKEN_RETRY_DELAY", "0.7"))
+
+# Persistent result cache keyed by normalized location + radius
+CAFE_CACHE_TTL = float(os.getenv("CAFE_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+CAFE_CACHE_MAX_ENTRIES = int(os.getenv("CAFE_CACHE_MAX_ENTRIES", "500"))
+_cafe_cache = DiskCache("cafe_search", ttl_seconds=CAFE_CACHE_TTL, max_entries=CAFE_CACHE_MAX_ENTRIES)
+
+# Most cafés an index answer returns (a Places page is 20)
+CAFE_INDEX_MAX_RESULTS = int(os.getenv("CAFE_INDEX_MAX_RESULTS", "60"))
+
+# Cafés within the same band of distance count as equally close, and rating decides
+DISTANCE_BAND_M = float(os.getenv("CAFE_DISTANCE_BAND_M", "250"))
+
+# Set per search (add_distances, cafe_ranking), so never written to the index
+_QUERY_FIELDS = ("distance_m", "mood_score", "atmosphere")
+
+# Bounded worker pool shared by all Streamlit sessions in this process
+_details_executor = ThreadPoolExecutor(max_workers=DETAILS_MAX_WORKERS, thread_name_prefix="places-details")
+
+# One background Places refresh at a time for stale index cells
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cafe-index-refresh")
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+# Rolling latency samples (ms) for the text search, each details call and the whole fan-out
+_LATENCY_WINDOW = 500
+_latency_lock = threading.Lock()
+_latency_samples = {
+    "text_search": deque(maxlen=_LATENCY_WINDOW),
+    "details_call": deque(maxlen=_LATENCY_WINDOW),
+    "details_fanout": deque(maxlen=_LATENCY_WINDOW),
+}
+
+
+def _record_latency(kind: str, started: float):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _latency_lock:
+        _latency_samples[kind].append(elapsed_ms)
+
+
+def get_latency_stats() -> dict:
+    """
+    Summarize recent Places latencies.
+
+    Returns:
+        dict: {kind: {'count', 'avg_ms', 'p50_ms', 'p95_ms', 'max_ms'}} for
+        'text_search', 'details_call' and 'details_fanout'
+    """
+    stats = {}
+    with _latency_lock:
+        snapshot = {kind: sorted(samples) for kind, samples in _latency_samples.items()}
+    for kind, samples in snapshot.items():
+        if not samples:
+            stats[kind] = {"count": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+            continue
+        stats[kind] = {
+            "count": len(samples),
+            "avg_ms": round(sum(samples) / len(samples), 1),
+            "p50_ms": round(samples[int(0.50 * (len(samples) - 1))], 1),
+            "p95_ms": round(samples[int(0.95 * (len(samples) - 1))], 1),
+            "max_ms": round(samples[-1], 1),
+        }
+    return stats
+
 
-    params = {
-        "query": f"matcha cafe near {location}",
-        "radius": radius,
+def _get_place_details(place_id: str) -> dict:
+    """Fetch phone/website for one place; returns {} if the lookup fails or times out."""
+    details_params = {
+        "place_id": place_id,
+        "fields": DETAILS_FIELDS,
         "key": GOOGLE_PLACES_API_KEY,
     }
+    started = time.perf_counter()
+    try:
+        details_response = http_client.get("places_details", DETAILS_URL, params=details_params)
+        details_data = details_response.json()
+        if details_data.get("status") == "OK":
+            return details_data.get("result", {})
+    except (requests.RequestException, ValueError):
+        pass  # Continue without details if API call fails
+    finally:
+        _record_latency("details_call", started)
+    return {}
+
+
+def _cafe_cache_key(location: str, radius) -> str:
+    return f"{normalize_location(location)}|{radius}"
+
+
+def peek_cafe_cache(location: str, radius=3500):
+    """
+    Cached café count and age for this search, without affecting hit stats.
+
+    Returns:
+        tuple: (number of cafés, age in seconds or None if nothing is cached)
+    """
+    entry = _cafe_cache.peek(_cafe_cache_key(location, radius))
+    if entry is None:
+        return 0, None
+    cafes, age = entry
+    return len(cafes), age
+
+
+def get_cafe_cache_stats() -> dict:
+    """Hit/miss counters and size of the café search cache, plus the local café index."""
+    stats = _cafe_cache.stats()
+    stats["index"] = cafe_index.stats()
+    return stats
+
+
+def invalidate_cafe_cache(location: str = None, radius=3500) -> int:
+    """
+    Drop cached café results for one location, or all locations (and the local café
+    index) when `location` is None.
+
+    Returns:
+        int: Number of cache entries removed
+    """
+    if location is None:
+        cafe_index.invalidate()
+        return _cafe_cache.invalidate()
+    return _cafe_cache.invalidate(_cafe_cache_key(location, radius))
+
+
+def _search_index(location: str, radius):
+    """
+    Cafés near `location` from the local index, or None if Places has to be asked.
+
+    A stale answer is still returned, with a background refresh from Places queued.
+    """
+    if not CAFE_INDEX_ENABLED:
+        return None
+    point = geocode_location(location)
+    if point is None:
+        return None  # Unresolved location; let Places interpret the text
+    coverage = cafe_index.coverage(point.latitude, point.longitude)
+    if coverage == "missing":
+        return None
+    if coverage == "stale":
+        _schedule_refresh(location, radius)
+    return cafe_index.nearby(point.latitude, point.longitude, radius, limit=CAFE_INDEX_MAX_RESULTS)
+
+
+def _schedule_refresh(location: str, radius):
+    key = _cafe_cache_key(location, radius)
+    with _refresh_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def _refresh():
+        try:
+            cafes = _fetch_matcha_cafes(location, radius)
+            if cafes:
+                _cafe_cache.set(key, cafes)
+        except (requests.RequestException, ValueError):
+            pass  # Still stale; the next query retries
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(key)
 
-    response = requests.get(url, params=params)
-    data = response.json()
-
-    cafes = []
-    for place in data.get("results", []):
-        # Get additional details if place_id is available
-        place_id = place.get("place_id")
-        phone = None
-        website = None
-        
-        # Get place details for phone number and more info
-        if place_id and GOOGLE_PLACES_API_KEY:
-            details_url = "https://maps.googleapis.com/maps/api/place/details/json"
-            details_params = {
-                "place_id": place_id,
-                "fields": "formatted_phone_number,website,business_status,price_level",
-                "key": GOOGLE_PLACES_API_KEY,
-            }
-            try:
-                details_response = requests.get(details_url, params=details_params)
-                details_data = details_response.json()
-                if details_data.get("status") == "OK":
-                    result = details_data.get("result", {})
-                    phone = result.get("formatted_phone_number")
-                    website = result.get("website")
-            except:
-                pass  # Continue without details if API call fails
-        
-        cafes.append({
-            "name": place.get("name"),
-            "address": place.get("formatted_address"),
-            "rating": place.get("rating"),
-            "phone": phone,
-            "website": website,
-            "place_id": place_id,
-            "map_link": f"https://maps.google.com/?q={place.get('name').replace(' ', '+')}",
-        })
+    _refresh_executor.submit(_refresh)
 
+
+def _index_search_results(location: str, radius, data: dict, cafes: list):
+    """Feed a Places search into the local index and mark its area as covered."""
+    if not CAFE_INDEX_ENABLED or data.get("status") not in ("OK", "ZERO_RESULTS"):
+        return
+    cafe_index.upsert(cafes)
+    point = geocode_location(location)
+    if point is not None:
+        cafe_index.mark_covered(point.latitude, point.longitude, float(radius))
+
+
+@observe(name="api.googlemaps_search_matcha_cafes", as_type="tool")
+def search_matcha_cafes(location: str, radius=3500, refresh=False):
+    cache_key = _cafe_cache_key(location, radius)
+    cached = None if refresh else _cafe_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    indexed = None if refresh else _search_index(location, radius)
+    if indexed is not None:
+        return indexed
+
+    try:
+        cafes = _fetch_matcha_cafes(location, radius)
+    except (requests.RequestException, ValueError):
+        stale = _stale_cafes(cache_key)
+        if stale is None:
+            raise
+        return stale
+    if cafes:  # Don't cache empty/failed searches
+        _cafe_cache.set(cache_key, cafes)
     return cafes
 
-langfuse = get_client()
-langfuse.flush()
\ No newline at end of file
+
+def _stale_cafes(cache_key: str):
+    """Results for a search even if expired, served while Places is failing (None if never cached)."""
+    stale = _cafe_cache.peek(cache_key, include_expired=True)
+    return stale[0] if stale else None
+
+
+def get_cafe_page(location: str, radius=3500, page_token=None):
+    """
+    One Text Search page of cafés, without waiting for their details, for progressive rendering.
+
+    Cafés still missing phone/website carry "details_pending"; fill them with iter_cafe_details().
+    A cached full search is returned as-is (details included) when asking for the first page.
+
+    Args:
+        location: Location to search around
+        radius: Search radius in meters
+        page_token: next_page_token from the previous page, None for the first page
+
+    Returns:
+        tuple: (list of café dicts, next_page_token or None when there are no more pages)
+    """
+    if page_token is None:
+        cached = _cafe_cache.get(_cafe_cache_key(location, radius))
+        if cached is not None:
+            return cached, None
+        indexed = _search_index(location, radius)
+        if indexed is not None:
+            return indexed, None
+    try:
+        data = _text_search(location, radius, page_token)
+    except (requests.RequestException, ValueError):
+        stale = None if page_token else _stale_cafes(_cafe_cache_key(location, radius))
+        if stale is None:
+            raise
+        return stale, None
+    cafes = [_cafe_from_place(place) for place in data.get("results", [])]
+    if page_token is None:
+        _index_search_results(location, radius, data, cafes)
+    elif CAFE_INDEX_ENABLED:
+        cafe_index.upsert(cafes)
+    return cafes, data.get("next_page_token")
+
+
+def add_distances(cafes, location: str) -> list:
+    """
+    Set "distance_m" on each café from the geocoded location, in one vectorized pass.
+
+    Returns:
+        list: Copies of the cafés; "distance_m" is None for cafés without coordinates
+        (or all of them if the location can't be resolved)
+    """
+    point = geocode_location(location)
+    if point is None or not cafes:
+        return [{**cafe, "distance_m": None} for cafe in cafes]
+    distances = haversine_m_many(point.latitude, point.longitude, *coordinates(cafes)).tolist()
+    return [
+        {**cafe, "distance_m": None if math.isnan(distance) else round(distance)}
+        for cafe, distance in zip(cafes, distances)
+    ]
+
+
+def sort_by_distance(cafes) -> list:
+    """
+    Nearest first in DISTANCE_BAND_M bands, higher rating first within a band; cafés
+    without a distance go last.
+    """
+    if not cafes:
+        return []
+    distances = np.array([cafe.get("distance_m") for cafe in cafes], dtype=float)
+    ratings = np.array([cafe.get("rating") for cafe in cafes], dtype=float)
+    bands = np.nan_to_num(np.floor(distances / DISTANCE_BAND_M), nan=np.inf)
+    order = np.lexsort((-np.nan_to_num(ratings, nan=0.0), bands))
+    return [cafes[i] for i in order]
+
+
+def iter_cafe_details(cafes):
+    """
+    Look up details for every café that still needs them, concurrently.
+
+    Yields:
+        tuple: (index into `cafes`, café dict with phone/website) as each lookup completes;
+        a failed lookup yields the café without details so it stops showing as pending
+    """
+    futures = {}
+    for index, cafe in enumerate(cafes):
+        if not cafe.get("details_pending"):
+            continue
+        if GOOGLE_PLACES_API_KEY and cafe.get("place_id"):
+            # A copy of the caller's context, so the lookups count toward its spans and call meter
+            futures[_details_executor.submit(contextvars.copy_context().run, _get_place_details, cafe["place_id"])] = index
+        else:
+            yield index, _with_details(cafe, {})
+    for future in as_completed(futures):
+        index = futures[future]
+        details = future.result()
+        cafe = _with_details(cafes[index], details)
+        if details and CAFE_INDEX_ENABLED:
+            cafe_index.upsert([{key: value for key, value in cafe.items() if key not in _QUERY_FIELDS}])
+        yield index, cafe
+
+
+def _text_search(location: str, radius, page_token=None) -> dict:
+    if page_token:
+        params = {"pagetoken": page_token, "key": GOOGLE_PLACES_API_KEY}
+    else:
+        params = {
+            "query": f"matcha cafe near {location}",
+            "radius": radius,
+            "key": GOOGLE_PLACES_API_KEY,
+        }
+
+    for attempt in range(PAGE_TOKEN_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            response = http_client.get("places_text", TEXT_SEARCH_URL, params=params)
+            data = response.json()
+        finally:
+            _record_latency("text_search", started)
+        if page_token and data.get("status") == "INVALID_REQUEST" and attempt < PAGE_TOKEN_RETRIES:
+            time.sleep(PAGE_TOKEN_RETRY_DELAY)  # Token not active yet
+            continue
+        return data
+
+
+def _cafe_from_place(place: dict) -> dict:
+    coordinates = (place.get("geometry") or {}).get("location") or {}
+    return {
+        "name": place.get("name"),
+        "address": place.get("formatted_address"),
+        "rating": place.get("rating"),
+        "lat": coordinates.get("lat"),
+        "lng": coordinates.get("lng"),
+        # Ranking features (cafe_ranking)
+        "price_level": place.get("price_level"),
+        "business_status": place.get("business_status"),
+        "open_now": (place.get("opening_hours") or {}).get("open_now"),
+        "types": place.get("types") or [],
+        "user_ratings_total": place.get("user_ratings_total"),
+        "phone": None,
+        "website": None,
+        "place_id": place.get("place_id"),
+        "map_link": f"https://maps.google.com/?q={(place.get('name') or '').replace(' ', '+')}",
+        "details_pending": True,
+    }
+
+
+def _with_details(cafe: dict, details: dict) -> dict:
+    cafe = {key: value for key, value in cafe.items() if key != "details_pending"}
+    cafe["phone"] = details.get("formatted_phone_number")
+    cafe["website"] = details.get("website")
+    # Details are newer than the search result where they overlap
+    for key in ("business_status", "price_level"):
+        if details.get(key) is not None:
+            cafe[key] = details[key]
+    return cafe
+
+
+def _fetch_matcha_cafes(location: str, radius=3500):
+    data = _text_search(location, radius)
+    cafes = [_cafe_from_place(place) for place in data.get("results", [])]
+
+    # Look up details for every result concurrently, keeping the original result order
+    started = time.perf_counter()
+    for index, cafe in iter_cafe_details(cafes):
+        cafes[index] = cafe
+    if GOOGLE_PLACES_API_KEY and any(cafe["place_id"] for cafe in cafes):
+        _record_latency("details_fanout", started)
+
+    _index_search_results(location, radius, data, cafes)
+    return cafes
@@ -0,0 +1,247 @@
+# chat_cache.py
+# Shared cache of chat answers for general questions asked in slightly different words
+# ("what is hojicha", "whats hojicha?"), so repeats skip the agent run.
+#
+# Prompts are normalized to their content words (lowercased, contractions and plurals folded,
+# filler and stop words dropped) and shingled into single words plus word bigrams, so word
+# order counts ("is hojicha stronger than matcha" is not "is matcha stronger than hojicha").
+# Near-duplicates are found with MinHash signatures and LSH banding, then confirmed by exact
+# Jaccard similarity of the shingle sets against CHAT_CACHE_SIMILARITY.
+# Only context-free prompts are cached: anything about the user, the session, earlier turns
+# or the current time ("my mood", "is it strong?", "open now") always goes to the agent.
+# Entries are keyed on a prompt version (model + system prompt), expire after
+# CHAT_CACHE_TTL_SECONDS and persist in the shared SQLite cache (LRU beyond max entries).
+
+import hashlib
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+import numpy as np
+from dotenv import load_dotenv
+from disk_cache import DiskCache
+from model_config import MODEL_ID
+from templates.main_system_prompt import WHISKI_SYSTEM_PROMPT
+
+load_dotenv()
+
+CHAT_CACHE_ENABLED = os.getenv("WHISKI_CHAT_CACHE", "true").lower() == "true"
+CHAT_CACHE_TTL = float(os.getenv("WHISKI_CHAT_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+CHAT_CACHE_MAX_ENTRIES = int(os.getenv("WHISKI_CHAT_CACHE_MAX_ENTRIES", "2000"))
+CHAT_CACHE_SIMILARITY = float(os.getenv("WHISKI_CHAT_CACHE_SIMILARITY", "0.8"))  # Jaccard of shingles
+CHAT_CACHE_MAX_PROMPT_CHARS = 300  # Longer prompts are too specific to repeat
+
+# 16 bands of 4 rows: pairs at Jaccard 0.8 become candidates ~99.9% of the time, at 0.3 ~12%
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240611)  # Fixed so signatures are the same in every process
+_HASH_A = _rng.integers(1, _MERSENNE_PRIME, MINHASH_BANDS * MINHASH_ROWS, dtype=np.int64)
+_HASH_B = _rng.integers(0, _MERSENNE_PRIME, MINHASH_BANDS * MINHASH_ROWS, dtype=np.int64)
+
+# Bump when normalization changes, so entries keyed on old word sets are not matched
+_NORMALIZER_VERSION = "2"
+
+_FILLER_PHRASES = re.compile(
+    r"\b(?:tell me|can you|could you|would you|will you|do you know|explain to me|let me know|i want to know|"
+    r"i wonder|i was wondering|whiski)\b"
+)
+_CONTRACTIONS = {
+    "whats": "what", "hows": "how", "wheres": "where", "whos": "who", "whys": "why", "whens": "when",
+    "isnt": "not", "arent": "not", "dont": "not", "doesnt": "not", "cant": "not", "wont": "not",
+    "shouldnt": "not", "wouldnt": "not", "couldnt": "not", "didnt": "not",
+}
+_STOP_WORDS = frozenset(
+    "a an the is are was were be been am do does did of to in on at for and or with about as by "
+    "from into than then so some any there have has had please hey hi hello ok okay really just actually".split()
+)
+# Words that tie an answer to this user, this session, an earlier turn or the current time
+_CONTEXT_WORDS = frozenset(
+    "i im ive id me my mine we us our you your yours it its this that these those them they "
+    "he she him her his here near nearby around local today tonight tomorrow yesterday now "
+    "currently weather mood location recommend recommended recommendation earlier before "
+    "again above previous last same".split()
+)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+_disk = DiskCache("chat_answers", ttl_seconds=CHAT_CACHE_TTL, max_entries=CHAT_CACHE_MAX_ENTRIES)
+_lock = threading.Lock()
+_loaded = False
+_entries = OrderedDict()  # key -> {'shingles', 'answer', 'stored_at', 'bands'}, least recently used first
+_buckets = {}             # (band, band hash) -> {key}
+_stats = {"lookups": 0, "hits": 0, "misses": 0, "skipped": 0, "stores": 0, "evictions": 0, "expired": 0}
+_LATENCY_WINDOW = 500
+_lookup_samples = deque(maxlen=_LATENCY_WINDOW)  # ms per lookup
+_hit_similarities = deque(maxlen=_LATENCY_WINDOW)
+
+
+def _compute_prompt_version() -> str:
+    """Hash of the model and system prompt, so prompt edits invalidate cached answers."""
+    digest = hashlib.sha256()
+    digest.update(MODEL_ID.encode())
+    digest.update(WHISKI_SYSTEM_PROMPT.encode())
+    digest.update(_NORMALIZER_VERSION.encode())
+    return digest.hexdigest()[:12]
+
+
+PROMPT_VERSION = _compute_prompt_version()
+
+
+def _stem(word: str) -> str:
+    # Plurals only: "lattes" -> "latte", "differences" -> "difference", not "glass"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _words(prompt: str) -> list:
+    text = (prompt or "").lower().replace("’", "").replace("'", "")
+    text = _FILLER_PHRASES.sub(" ", text)
+    return [_CONTRACTIONS.get(word, word) for word in _WORD_RE.findall(text)]
+
+
+def normalize_prompt(prompt: str) -> frozenset:
+    """Shingles of a prompt's content words (each word and each adjacent pair, in order)."""
+    words = [_stem(word) for word in _words(prompt) if word not in _STOP_WORDS]
+    return frozenset(words + [f"{first} {second}" for first, second in zip(words, words[1:])])
+
+
+def is_cacheable(prompt: str) -> bool:
+    """True for short, context-free questions whose answer can be shared between users."""
+    if not CHAT_CACHE_ENABLED or not prompt or len(prompt) > CHAT_CACHE_MAX_PROMPT_CHARS:
+        return False
+    words = _words(prompt)
+    return bool(words) and not any(word in _CONTEXT_WORDS for word in words)
+
+
+def _band_keys(shingles: frozenset) -> tuple:
+    """LSH band keys of the MinHash signature of a shingle set."""
+    hashes = np.array([zlib.crc32(s.encode()) % _MERSENNE_PRIME for s in sorted(shingles)], dtype=np.int64)
+    signature = ((_HASH_A[:, None] * hashes[None, :] + _HASH_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+    bands = signature.reshape(MINHASH_BANDS, MINHASH_ROWS)
+    return tuple((band, hash(row.tobytes())) for band, row in enumerate(bands))
+
+
+def _cache_key(shingles: frozenset) -> str:
+    return f"{PROMPT_VERSION}|{'/'.join(sorted(shingles))}"
+
+
+def _add(key: str, shingles: frozenset, answer: str, stored_at: float):
+    # Caller holds the lock
+    if key in _entries:
+        _remove(key)
+    bands = _band_keys(shingles)
+    _entries[key] = {"shingles": shingles, "answer": answer, "stored_at": stored_at, "bands": bands}
+    for band in bands:
+        _buckets.setdefault(band, set()).add(key)
+    while len(_entries) > CHAT_CACHE_MAX_ENTRIES:
+        _remove(next(iter(_entries)))
+        _stats["evictions"] += 1
+
+
+def _remove(key: str):
+    # Caller holds the lock
+    entry = _entries.pop(key)
+    for band in entry["bands"]:
+        bucket = _buckets.get(band)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del _buckets[band]
+
+
+def _ensure_loaded():
+    # Caller holds the lock
+    global _loaded
+    if _loaded:
+        return
+    now = time.time()
+    for key, value, age in _disk.items():
+        if key.startswith(f"{PROMPT_VERSION}|"):
+            _add(key, frozenset(value["shingles"]), value["answer"], now - age)
+    _loaded = True
+
+
+def lookup(prompt: str):
+    """
+    Cached answer for a near-duplicate of this prompt.
+
+    Returns:
+        str | None: The answer stored for the most similar cached prompt at or above
+        CHAT_CACHE_SIMILARITY, or None (also for prompts that aren't cacheable)
+    """
+    if not is_cacheable(prompt):
+        with _lock:
+            _stats["skipped"] += 1
+        return None
+    started = time.perf_counter()
+    shingles = normalize_prompt(prompt)
+    bands = _band_keys(shingles) if shingles else ()
+    now = time.time()
+    best_key, best_similarity = None, 0.0
+    with _lock:
+        _ensure_loaded()
+        _stats["lookups"] += 1
+        candidates = set().union(*(_buckets.get(band, ()) for band in bands))
+        for key in candidates:
+            entry = _entries[key]
+            if now - entry["stored_at"] > CHAT_CACHE_TTL:
+                _remove(key)
+                _stats["expired"] += 1
+                continue
+            similarity = len(shingles & entry["shingles"]) / len(shingles | entry["shingles"])
+            if similarity > best_similarity:
+                best_key, best_similarity = key, similarity
+        answer = None
+        if best_key is not None and best_similarity >= CHAT_CACHE_SIMILARITY:
+            _entries.move_to_end(best_key)
+            answer = _entries[best_key]["answer"]
+            _stats["hits"] += 1
+            _hit_similarities.append(best_similarity)
+        else:
+            _stats["misses"] += 1
+        _lookup_samples.append((time.perf_counter() - started) * 1000)
+    return answer
+
+
+def store(prompt: str, answer: str):
+    """Cache a finished answer for a cacheable prompt (no-op otherwise)."""
+    if not answer or not answer.strip() or not is_cacheable(prompt):
+        return
+    shingles = normalize_prompt(prompt)
+    if not shingles:
+        return
+    key = _cache_key(shingles)
+    with _lock:
+        _ensure_loaded()
+        _add(key, shingles, answer, time.time())
+        _stats["stores"] += 1
+    _disk.set(key, {"shingles": sorted(shingles), "prompt": prompt, "answer": answer})
+
+
+def invalidate_chat_cache() -> int:
+    """Drop every cached chat answer (all prompt versions)."""
+    global _loaded
+    with _lock:
+        _entries.clear()
+        _buckets.clear()
+        _loaded = False
+    return _disk.invalidate()
+
+
+def get_chat_cache_stats() -> dict:
+    """Hit rate, lookup latency and size of the chat answer cache."""
+    with _lock:
+        stats = dict(_stats)
+        samples = sorted(_lookup_samples)
+        similarities = list(_hit_similarities)
+        stats["entries"] = len(_entries)
+    stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else 0.0
+    stats["avg_hit_similarity"] = round(sum(similarities) / len(similarities), 3) if similarities else 0.0
+    stats["lookup_p50_ms"] = round(samples[int(0.50 * (len(samples) - 1))], 3) if samples else 0.0
+    stats["lookup_p95_ms"] = round(samples[int(0.95 * (len(samples) - 1))], 3) if samples else 0.0
+    stats["prompt_version"] = PROMPT_VERSION
+    stats["similarity_threshold"] = CHAT_CACHE_SIMILARITY
+    return stats
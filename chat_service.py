@@ -0,0 +1,149 @@
+# chat_service.py
+# Streamlit-free streaming chat: runs a pooled agent with streamed model output and
+# records time-to-first-token alongside total latency.
+
+import os
+import re
+import threading
+import time
+from collections import deque
+from dotenv import load_dotenv
+import chat_cache
+from prompt_compiler import request_type
+from telemetry import observe
+
+load_dotenv()
+
+CHAT_STREAMING_ENABLED = os.getenv("WHISKI_CHAT_STREAMING", "true").lower() == "true"
+
+_LATENCY_WINDOW = 500
+_metrics_lock = threading.Lock()
+_chat_samples = deque(maxlen=_LATENCY_WINDOW)  # {'ttft_ms', 'total_ms', 'cancelled', 'cached'}
+
+
+def _record_chat_latency(ttft_ms, total_ms, cancelled, cached=False):
+    with _metrics_lock:
+        _chat_samples.append({"ttft_ms": ttft_ms, "total_ms": total_ms, "cancelled": cancelled, "cached": cached})
+
+
+def get_chat_latency_stats() -> dict:
+    """
+    Summarize recent streamed chat turns.
+
+    Returns:
+        dict: count, cancelled, cached (answered from chat_cache), and p50/p95 of
+        time-to-first-token and total latency (ms)
+    """
+    with _metrics_lock:
+        samples = list(_chat_samples)
+
+    def _pcts(values):
+        if not values:
+            return {"p50_ms": 0.0, "p95_ms": 0.0}
+        values = sorted(values)
+        return {
+            "p50_ms": round(values[int(0.50 * (len(values) - 1))], 1),
+            "p95_ms": round(values[int(0.95 * (len(values) - 1))], 1),
+        }
+
+    return {
+        "count": len(samples),
+        "cancelled": sum(s["cancelled"] for s in samples),
+        "cached": sum(s["cached"] for s in samples),
+        "time_to_first_token": _pcts([s["ttft_ms"] for s in samples if s["ttft_ms"] is not None]),
+        "total": _pcts([s["total_ms"] for s in samples if not s["cancelled"]]),
+    }
+
+
+def uses_chat_cache(prompt: str, memory=None) -> bool:
+    """
+    Whether a turn may be answered from (and stored in) chat_cache: only cacheable prompts
+    opening a conversation, since later ones may lean on earlier turns ("what about iced?").
+    """
+    return chat_cache.is_cacheable(prompt) and (memory is None or not memory.has_turns)
+
+
+_FINAL_ANSWER_START = re.compile(r'final_answer\(\s*(?:[rf]?"""|[rf]?\'\'\'|[rf]?"|[rf]?\')?', re.IGNORECASE)
+_CODE_TAGS = re.compile(r"</?code>|```(?:py|python)?", re.IGNORECASE)
+
+
+def visible_text(buffer: str) -> str:
+    """
+    Turn the agent's raw streamed output into text fit for a live preview.
+
+    CodeAgent replies look like `Thought: ... <code>final_answer("...")</code>`, so once the
+    final_answer call starts we show only its argument; before that, the thought without tags.
+    """
+    match = _FINAL_ANSWER_START.search(buffer)
+    if match:
+        text = buffer[match.end():]
+        text = re.sub(r'(?:"""|\'\'\'|"|\')?\s*\)?\s*(?:</code>)?\s*$', "", text)
+        return text.replace("\\n", "\n")
+    return _CODE_TAGS.sub("", buffer).replace("Thought:", "").strip()
+
+
+@observe(name="chat.stream_chat", as_type="generation")
+def stream_chat(prompt: str, memory=None, context: dict = None):
+    """
+    Stream one chat turn from a pooled agent, or from chat_cache for a near-duplicate of a
+    general question already answered.
+
+    Args:
+        prompt: The user's message
+        memory: The session's ConversationMemory; the finished turn is added to it
+        context: Session selections for the prompt header (see conversation_memory)
+
+    Yields:
+        tuple: ("delta", text) for each streamed model chunk, then ("final", answer) once.
+        Closing the generator early (user navigated away) interrupts the agent.
+
+    Raises:
+        AgentPoolTimeout: If no agent became free in time
+    """
+    # Deferred so the chat scene loads without the agent stack
+    from smolagents.memory import FinalAnswerStep
+    from smolagents.models import ChatMessageStreamDelta
+    from whiski_agent import agent_pool
+
+    started = time.perf_counter()
+    cacheable = uses_chat_cache(prompt, memory)
+    cached = chat_cache.lookup(prompt) if cacheable else None
+    if cached is not None:
+        if memory is not None:
+            memory.add_turn(prompt, cached)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        _record_chat_latency(elapsed_ms, elapsed_ms, cancelled=False, cached=True)
+        yield ("final", cached)
+        return
+
+    first_output_at = None
+    finished = False
+    with agent_pool.checkout() as agent, request_type("chat"):
+        agent.stream_outputs = True  # Pool agents are shared across requests; restored below
+        task = memory.build_prompt(prompt, context) if memory is not None else prompt
+        run = agent.run(task, stream=True)
+        try:
+            final_answer = ""
+            for event in run:
+                if isinstance(event, ChatMessageStreamDelta):
+                    if event.content:
+                        if first_output_at is None:
+                            first_output_at = time.perf_counter()
+                        yield ("delta", event.content)
+                elif isinstance(event, FinalAnswerStep):
+                    final_answer = getattr(event, "output", getattr(event, "final_answer", ""))
+            if first_output_at is None:
+                first_output_at = time.perf_counter()
+            finished = True
+            if cacheable:
+                chat_cache.store(prompt, str(final_answer))
+            if memory is not None:
+                memory.add_turn(prompt, str(final_answer))
+            yield ("final", str(final_answer))
+        finally:
+            if not finished:
+                agent.interrupt()
+            run.close()
+            agent.stream_outputs = False
+            ttft_ms = (first_output_at - started) * 1000 if first_output_at else None
+            _record_chat_latency(ttft_ms, (time.perf_counter() - started) * 1000, cancelled=not finished)
@@ -0,0 +1,149 @@
+# conversation_memory.py
+# Session-scoped chat memory that keeps each chat prompt a bounded size.
+#
+# Pooled agents start every run with empty memory, so the conversation is carried in the
+# prompt itself: a one-line session context (mood, location, recommendation), a compact
+# summary of older exchanges, the most recent exchanges verbatim, then the new message.
+# When the verbatim turns outgrow their share of the budget the oldest is folded into the
+# summary as a clipped one-liner; when the summary outgrows its share its oldest lines are
+# dropped. Folding is extractive (no LLM call), so memory costs nothing but tokens, and the
+# history part of a prompt stays around WHISKI_CHAT_MEMORY_BUDGET however long the chat runs.
+
+import os
+import threading
+from collections import deque
+from dotenv import load_dotenv
+from prompt_compiler import estimate_tokens
+
+load_dotenv()
+
+CHAT_MEMORY_BUDGET = int(os.getenv("WHISKI_CHAT_MEMORY_BUDGET", "1200"))  # tokens of summary + recent turns
+CHAT_MEMORY_RECENT_TURNS = int(os.getenv("WHISKI_CHAT_MEMORY_RECENT_TURNS", "4"))
+# Share of the budget the folded summary may use; the rest goes to verbatim turns
+SUMMARY_SHARE = 0.3
+
+TURN_MAX_CHARS = 1500     # A single verbatim message is clipped to this
+FOLDED_MAX_CHARS = 140    # Each side of an exchange once folded into the summary
+CONTEXT_MAX_CHARS = 160   # Each session context value
+
+
+def _clip(text: str, limit: int) -> str:
+    """Whitespace-normalized text cut at a word boundary to at most `limit` characters."""
+    text = " ".join(str(text).split())
+    if len(text) <= limit:
+        return text
+    cut = text[:limit].rsplit(" ", 1)[0]
+    return cut + "…"
+
+
+def format_session_context(context: dict) -> str:
+    """
+    One line describing the user's selections, for the top of every chat prompt.
+
+    Args:
+        context: Any of 'mood', 'location', 'weather', 'drink', 'vibe'; empty values are skipped
+    """
+    labels = (("mood", "mood"), ("location", "location"), ("weather", "weather"),
+              ("drink", "recommended drink"), ("vibe", "café vibe"))
+    parts = [
+        f"{label}: {_clip(context[key], CONTEXT_MAX_CHARS)}"
+        for key, label in labels if context and context.get(key)
+    ]
+    return "; ".join(parts)
+
+
+class ConversationMemory:
+    """Recent chat turns verbatim plus a folded summary of older ones, under a token budget."""
+
+    def __init__(self, budget: int = CHAT_MEMORY_BUDGET, recent_turns: int = CHAT_MEMORY_RECENT_TURNS):
+        self.budget = budget
+        self.recent_turns = max(1, recent_turns)
+        self._lock = threading.Lock()
+        self._recent = deque()   # (user, assistant, tokens)
+        self._summary = deque()  # (line, tokens)
+        self._recent_tokens = 0
+        self._summary_tokens = 0
+        self.turns = 0
+        self.folded = 0
+        self.dropped = 0
+
+    def add_turn(self, user: str, assistant: str):
+        """Record a finished exchange, folding older ones to stay within budget."""
+        user, assistant = _clip(user, TURN_MAX_CHARS), _clip(assistant, TURN_MAX_CHARS)
+        tokens = estimate_tokens(f"User: {user}\nWhiski: {assistant}")
+        with self._lock:
+            self._recent.append((user, assistant, tokens))
+            self._recent_tokens += tokens
+            self.turns += 1
+            recent_budget = self.budget * (1 - SUMMARY_SHARE)
+            while len(self._recent) > 1 and (
+                len(self._recent) > self.recent_turns or self._recent_tokens > recent_budget
+            ):
+                self._fold_oldest()
+
+    def _fold_oldest(self):
+        # Caller holds the lock
+        user, assistant, tokens = self._recent.popleft()
+        self._recent_tokens -= tokens
+        line = f"- User: {_clip(user, FOLDED_MAX_CHARS)} / Whiski: {_clip(assistant, FOLDED_MAX_CHARS)}"
+        line_tokens = estimate_tokens(line)
+        self._summary.append((line, line_tokens))
+        self._summary_tokens += line_tokens
+        self.folded += 1
+        while len(self._summary) > 1 and self._summary_tokens > self.budget * SUMMARY_SHARE:
+            _, dropped_tokens = self._summary.popleft()
+            self._summary_tokens -= dropped_tokens
+            self.dropped += 1
+
+    def build_prompt(self, prompt: str, context: dict = None) -> str:
+        """
+        The agent task for a new message: session context and history, then the message.
+
+        Returns the message unchanged when there is no context and no history yet.
+        """
+        header = format_session_context(context)
+        with self._lock:
+            summary = [line for line, _ in self._summary]
+            recent = [(user, assistant) for user, assistant, _ in self._recent]
+            dropped = self.dropped
+        if not (header or summary or recent):
+            return prompt
+
+        parts = ["Conversation context (use it to answer; reply only to the new message)."]
+        if header:
+            parts.append(f"Session: {header}")
+        if summary:
+            earlier = "Earlier in this chat:"
+            if dropped:
+                earlier += f" ({dropped} older exchanges omitted)"
+            parts.append("\n".join([earlier, *summary]))
+        if recent:
+            parts.append("\n".join(["Recent messages:", *(f"User: {u}\nWhiski: {a}" for u, a in recent)]))
+        parts.append(f"New message: {prompt}")
+        return "\n\n".join(parts)
+
+    @property
+    def has_turns(self) -> bool:
+        """True once any exchange is recorded (its later prompts depend on the history)."""
+        with self._lock:
+            return bool(self._recent or self._summary)
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+            self._summary.clear()
+            self._recent_tokens = self._summary_tokens = 0
+            self.turns = self.folded = self.dropped = 0
+
+    def stats(self) -> dict:
+        """Turn counts and the tokens history currently adds to each prompt."""
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "recent": len(self._recent),
+                "folded": self.folded,
+                "dropped": self.dropped,
+                "recent_tokens": self._recent_tokens,
+                "summary_tokens": self._summary_tokens,
+                "budget": self.budget,
+            }
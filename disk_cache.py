@@ -0,0 +1,187 @@
+# disk_cache.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def default_cache_path() -> str:
+    """
+    The SQLite file shared by every cache namespace in the process (survives restarts).
+
+    Read when a cache is first used, not at import, so WHISKI_CACHE_PATH can be set later.
+    """
+    return os.getenv(
+        "WHISKI_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "whiski_cache.sqlite3"),
+    )
+
+
+def normalize_location(location: str) -> str:
+    """
+    Normalize a free-text location so equivalent inputs share a cache key.
+
+    "  Brooklyn,NY " and "brooklyn, ny" both become "brooklyn, ny".
+    """
+    if not location:
+        return ""
+    parts = [" ".join(part.split()) for part in location.lower().split(",")]
+    return ", ".join(part for part in parts if part).strip(" .")
+
+
+class DiskCache:
+    """
+    Small persistent key/value cache backed by SQLite.
+
+    Values are stored as JSON with a TTL; once `max_entries` is exceeded the
+    least recently used entries are evicted. Safe to share across threads.
+    The database is opened on first use, so defining a cache at import time is free.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: float, max_entries: int = 1000, path: str = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.path = path  # None: default_cache_path() once the cache is first used
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds the lock
+        if self._conn is not None:
+            return self._conn
+        self.path = self.path or default_cache_path()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+        with conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    PRIMARY KEY (namespace, key)
+                )
+                """
+            )
+        self._conn = conn
+        return conn
+
+    def get(self, key: str):
+        """Return the cached value for `key`, or None if it is missing or expired."""
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            row = conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key),
+            )
+            self.hits += 1
+        return json.loads(row[0])
+
+    def peek(self, key: str, include_expired: bool = False):
+        """
+        Look at an entry without counting a hit/miss or refreshing its LRU position.
+
+        Args:
+            key: Cache key
+            include_expired: Also return entries past their TTL (stale fallback while an
+                upstream is down); they stay until LRU eviction or invalidate()
+
+        Returns:
+            tuple | None: (value, age in seconds), or None if missing (or expired)
+        """
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key),
+            ).fetchone()
+        if row is None:
+            return None
+        age = time.time() - row[1]
+        if age > self.ttl_seconds and not include_expired:
+            return None
+        return json.loads(row[0]), age
+
+    def items(self) -> list:
+        """
+        Every live entry in this namespace, without touching hit stats or LRU order.
+
+        Returns:
+            list: (key, value, age in seconds) tuples
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key, value, created_at FROM cache_entries WHERE namespace = ? AND created_at >= ?",
+                (self.namespace, now - self.ttl_seconds),
+            ).fetchall()
+        return [(key, json.loads(value), now - created_at) for key, value, created_at in rows]
+
+    def set(self, key: str, value):
+        """Store a JSON-serializable value and evict LRU entries beyond `max_entries`."""
+        now = time.time()
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, json.dumps(value), now, now),
+            )
+            conn.execute(
+                """
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.namespace, self.namespace, self.max_entries),
+            )
+
+    def invalidate(self, key: str = None) -> int:
+        """
+        Remove one entry, or every entry in this namespace when `key` is None.
+
+        Returns:
+            int: Number of entries removed
+        """
+        with self._lock, self._connection() as conn:
+            if key is None:
+                cursor = conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            else:
+                cursor = conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.namespace, key)
+                )
+        return cursor.rowcount
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size for this namespace."""
+        with self._lock:
+            entries = self._connection().execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
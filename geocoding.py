@@ -0,0 +1,113 @@
+# geocoding.py
+
+import os
+import requests
+from dataclasses import asdict, dataclass
+from dotenv import load_dotenv
+import http_client
+from disk_cache import DiskCache, normalize_location
+
+load_dotenv()
+
+GEOCODING_URL = os.getenv("OPEN_METEO_GEOCODING_URL", "https://geocoding-api.open-meteo.com/v1/search")
+
+# Open-Meteo searches place names only, so "Brooklyn, NY" is searched as "Brooklyn" and the
+# rest of the string picks among this many candidates by state, region or country
+GEOCODE_CANDIDATES = 10
+
+# Places barely move, so geocodes are cached for a long time
+_geocode_cache = DiskCache("geocode", ttl_seconds=30 * 24 * 60 * 60, max_entries=2000)
+
+# Locations Open-Meteo found nothing for are remembered briefly, so a typo isn't looked up every rerun
+GEOCODE_MISS_TTL = float(os.getenv("GEOCODE_MISS_TTL_SECONDS", str(60 * 60)))
+_miss_cache = DiskCache("geocode_misses", ttl_seconds=GEOCODE_MISS_TTL, max_entries=2000)
+
+
+@dataclass(frozen=True)
+class GeoPoint:
+    latitude: float
+    longitude: float
+    name: str
+
+
+# One-tap locations offered in the location scene
+LOCATION_PRESETS = ("Brooklyn, NY", "Manhattan, NY", "Queens, NY")
+
+# Qualifiers people type that Open-Meteo spells out (it returns admin1 "New York", not "NY")
+_US_STATES = dict(zip(
+    "al ak az ar ca co ct de dc fl ga hi id il in ia ks ky la me md ma mi mn ms mo mt ne nv nh nj "
+    "nm ny nc nd oh ok or pa ri sc sd tn tx ut vt va wa wv wi wy".split(),
+    ["alabama", "alaska", "arizona", "arkansas", "california", "colorado", "connecticut", "delaware",
+     "district of columbia", "florida", "georgia", "hawaii", "idaho", "illinois", "indiana", "iowa",
+     "kansas", "kentucky", "louisiana", "maine", "maryland", "massachusetts", "michigan", "minnesota",
+     "mississippi", "missouri", "montana", "nebraska", "nevada", "new hampshire", "new jersey",
+     "new mexico", "new york", "north carolina", "north dakota", "ohio", "oklahoma", "oregon",
+     "pennsylvania", "rhode island", "south carolina", "south dakota", "tennessee", "texas", "utah",
+     "vermont", "virginia", "washington", "west virginia", "wisconsin", "wyoming"],
+))
+_COUNTRY_ALIASES = {"usa": "us", "u.s.a": "us", "u.s": "us", "uk": "gb"}
+
+
+def _qualifier_score(result: dict, qualifiers) -> int:
+    """How many of the location's trailing components (state, region, country) a match agrees with."""
+    fields = {
+        str(result.get(field) or "").lower()
+        for field in ("admin1", "admin2", "admin3", "admin4", "country", "country_code")
+    }
+    score = 0
+    for qualifier in qualifiers:
+        spelled = {qualifier, _US_STATES.get(qualifier), _COUNTRY_ALIASES.get(qualifier)}
+        score += bool(fields & spelled)
+    return score
+
+
+def geocode_location(location: str):
+    """
+    Resolve a free-text location ("Brooklyn, NY") to coordinates.
+
+    Args:
+        location: Location string as entered or selected by the user
+
+    Returns:
+        GeoPoint | None: Coordinates of the best match, or None if the location can't be
+        resolved (callers skip weather and distances rather than guess a place)
+    """
+    key = normalize_location(location)
+    if not key:
+        return None
+
+    cached = _geocode_cache.get(key)
+    if cached is not None:
+        return GeoPoint(**cached)
+    if _miss_cache.get(key) is not None:
+        return None
+
+    # Search the place name, then let "NY" / "Texas" / "Japan" choose among the candidates
+    name = location.split(",")[0].strip()
+    qualifiers = key.split(", ")[1:]
+    try:
+        response = http_client.get(
+            "geocoding",
+            GEOCODING_URL,
+            params={"name": name, "count": GEOCODE_CANDIDATES if qualifiers else 1, "language": "en", "format": "json"},
+        )
+        results = response.json().get("results") or []
+    except (requests.RequestException, ValueError):
+        # An expired geocode is still the right place while Open-Meteo is down
+        stale = _geocode_cache.peek(key, include_expired=True)
+        return GeoPoint(**stale[0]) if stale else None
+
+    if not results:
+        _miss_cache.set(key, True)
+        return None
+
+    # Ties keep Open-Meteo's order (by relevance and population)
+    match = max(results, key=lambda result: _qualifier_score(result, qualifiers))
+    point = GeoPoint(latitude=match["latitude"], longitude=match["longitude"], name=match.get("name", name))
+    _geocode_cache.set(key, asdict(point))
+    return point
+
+
+def invalidate_geocode_cache() -> int:
+    """Drop every cached geocode, resolved or not."""
+    return _geocode_cache.invalidate() + _miss_cache.invalidate()
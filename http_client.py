@@ -0,0 +1,329 @@
+# http_client.py
+# Shared outbound HTTP layer for every backend module (Places, Open-Meteo, Langfuse).
+#
+# One pooled keep-alive session; each named endpoint has its own timeout and retry budget,
+# and each upstream service a token bucket (our quota) and a circuit breaker. Retries use
+# exponential backoff with full jitter and only happen for connection errors, timeouts and
+# 429/5xx replies. After BREAKER_FAILURE_THRESHOLD consecutive failures an upstream's breaker
+# opens and calls fail fast with CircuitOpenError for BREAKER_COOLDOWN seconds; then one trial
+# call is let through and its outcome closes or re-opens the breaker. Callers catch
+# requests.RequestException (which every error here subclasses) and serve cached or degraded data.
+
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+RETRY_BASE_DELAY = float(os.getenv("HTTP_RETRY_BASE_DELAY", "0.2"))
+RETRY_MAX_DELAY = float(os.getenv("HTTP_RETRY_MAX_DELAY", "2"))
+RATE_LIMIT_MAX_WAIT = float(os.getenv("HTTP_RATE_LIMIT_MAX_WAIT", "2"))  # longest wait for a token
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("HTTP_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN_SECONDS", "30"))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(requests.RequestException):
+    """The upstream's breaker is open; the call was not attempted."""
+
+
+class RateLimitedError(requests.RequestException):
+    """No rate-limit token became available within RATE_LIMIT_MAX_WAIT."""
+
+
+@dataclass(frozen=True)
+class Upstream:
+    rate_per_second: float = None  # None: unlimited
+    burst: int = 1
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    upstream: str
+    timeout: float
+    retries: int
+
+    @property
+    def max_duration(self) -> float:
+        """Worst case for one call: every attempt timing out plus maximum backoff."""
+        return (self.retries + 1) * self.timeout + self.retries * RETRY_MAX_DELAY
+
+
+UPSTREAMS = {
+    # Google Places quota is per project; Text Search and Details draw from the same bucket
+    "places": Upstream(
+        rate_per_second=float(os.getenv("PLACES_RATE_LIMIT_PER_SECOND", "10")),
+        burst=int(os.getenv("PLACES_RATE_LIMIT_BURST", "20")),
+    ),
+    "open_meteo": Upstream(
+        rate_per_second=float(os.getenv("OPEN_METEO_RATE_LIMIT_PER_SECOND", "8")),
+        burst=int(os.getenv("OPEN_METEO_RATE_LIMIT_BURST", "16")),
+    ),
+    "langfuse": Upstream(),
+}
+
+ENDPOINTS = {
+    "places_text": Endpoint("places", float(os.getenv("CAFE_SEARCH_TIMEOUT", "5")), retries=2),
+    # Details fan out 20 at a time and degrade to "phone not available", so retry less
+    "places_details": Endpoint("places", float(os.getenv("CAFE_DETAILS_TIMEOUT", "3")), retries=1),
+    "weather": Endpoint("open_meteo", float(os.getenv("WEATHER_TIMEOUT", "3")), retries=2),
+    "geocoding": Endpoint("open_meteo", float(os.getenv("GEOCODING_TIMEOUT", "3")), retries=1),
+    # Export batches are dropped on failure rather than retried (the exporter keeps draining)
+    "telemetry": Endpoint("langfuse", float(os.getenv("TELEMETRY_EXPORT_TIMEOUT", "5")), retries=0),
+}
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait: float) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            float: Seconds waited (0.0 if a token was ready)
+
+        Raises:
+            RateLimitedError: If no token would be available within `max_wait`
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                raise RateLimitedError(f"Rate limit: next token in {wait:.2f}s")
+            # Reserve the token now (possibly going negative) so waiters queue in order
+            self._tokens -= 1
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open (fail fast) → half-open (one trial) → closed."""
+
+    def __init__(self, failure_threshold: int, cooldown: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.opened_count = 0
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened_count += 1
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """A trial call ended without an upstream verdict (e.g. a malformed request)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    @property
+    def is_open(self) -> bool:
+        """True while failing fast; False once the cooldown has passed (a trial is due)."""
+        with self._lock:
+            return self.state == "open" and time.monotonic() - self._opened_at < self.cooldown
+
+    def current_state(self) -> str:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.cooldown:
+                return "half_open"
+            return self.state
+
+
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=len(UPSTREAMS), pool_maxsize=HTTP_POOL_MAXSIZE)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)  # Local stand-in servers (benchmarks)
+
+_buckets = {
+    name: TokenBucket(upstream.rate_per_second, upstream.burst)
+    for name, upstream in UPSTREAMS.items() if upstream.rate_per_second
+}
+_breakers = {name: CircuitBreaker(BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN) for name in UPSTREAMS}
+
+_stats_lock = threading.Lock()
+_STAT_KEYS = ("requests", "failures", "retries", "throttled", "rate_limited", "fail_fast")
+_stats = {name: dict.fromkeys(_STAT_KEYS, 0) for name in ENDPOINTS}
+_throttle_seconds = dict.fromkeys(ENDPOINTS, 0.0)
+_call_meter = contextvars.ContextVar("whiski_upstream_calls", default=None)
+
+
+def _count(endpoint: str, key: str, amount=1):
+    with _stats_lock:
+        _stats[endpoint][key] += amount
+
+
+@contextmanager
+def upstream_calls():
+    """
+    Count the upstream calls made inside this block: every HTTP attempt sent through this
+    client plus the LLM requests reported with record_call(). Threads started with a copy of
+    the block's context add to the same count.
+
+    Yields:
+        list: One-element counter, final once the block exits
+    """
+    counter = [0]
+    token = _call_meter.set(counter)
+    try:
+        yield counter
+    finally:
+        _call_meter.reset(token)
+
+
+def record_call():
+    """Add one call to the enclosing upstream_calls() block, if any."""
+    counter = _call_meter.get()
+    if counter is not None:
+        with _stats_lock:
+            counter[0] += 1
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2^attempt)]."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def request(endpoint: str, method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request under the endpoint's timeout, retry, rate-limit and breaker policy.
+
+    Args:
+        endpoint: Name in ENDPOINTS (e.g. "places_text")
+        method: HTTP method
+        url: Request URL
+        **kwargs: Passed to requests (params, json, headers, ...)
+
+    Returns:
+        requests.Response: The first non-retryable response (may still be a 4xx)
+
+    Raises:
+        CircuitOpenError: The upstream's breaker is open
+        RateLimitedError: Our own quota for the upstream is exhausted
+        requests.RequestException: The last error once retries are used up
+    """
+    policy = ENDPOINTS[endpoint]
+    breaker = _breakers[policy.upstream]
+    bucket = _buckets.get(policy.upstream)
+    kwargs.setdefault("timeout", policy.timeout)
+
+    error = None
+    for attempt in range(policy.retries + 1):
+        # Cheap check first so calls to a down upstream don't spend (or wait for) quota
+        if breaker.is_open:
+            _count(endpoint, "fail_fast")
+            raise error or CircuitOpenError(f"{policy.upstream} circuit open")
+        if bucket is not None:
+            try:
+                waited = bucket.acquire(RATE_LIMIT_MAX_WAIT)
+            except RateLimitedError:
+                _count(endpoint, "rate_limited")
+                raise
+            if waited:
+                _count(endpoint, "throttled")
+                with _stats_lock:
+                    _throttle_seconds[endpoint] += waited
+        if not breaker.allow():
+            # Half-open with its single trial call already in flight
+            _count(endpoint, "fail_fast")
+            raise error or CircuitOpenError(f"{policy.upstream} circuit open")
+
+        _count(endpoint, "requests")
+        record_call()
+        try:
+            response = _session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        except BaseException:
+            breaker.release_trial()
+            raise
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+            error = requests.HTTPError(f"{response.status_code} from {policy.upstream}", response=response)
+
+        _count(endpoint, "failures")
+        breaker.record_failure()
+        if attempt < policy.retries:
+            _count(endpoint, "retries")
+            time.sleep(_backoff(attempt))
+    raise error
+
+
+def get(endpoint: str, url: str, **kwargs) -> requests.Response:
+    return request(endpoint, "GET", url, **kwargs)
+
+
+def post(endpoint: str, url: str, **kwargs) -> requests.Response:
+    return request(endpoint, "POST", url, **kwargs)
+
+
+def is_available(endpoint: str) -> bool:
+    """False while the endpoint's upstream breaker is open (calls would fail fast)."""
+    return not _breakers[ENDPOINTS[endpoint].upstream].is_open
+
+
+def get_http_stats() -> dict:
+    """
+    Outbound call counters per endpoint and breaker state per upstream.
+
+    Returns:
+        dict: 'endpoints' ({name: {'requests', 'failures', 'retries', 'throttled',
+        'throttle_seconds', 'rate_limited', 'fail_fast'}}) and 'breakers'
+        ({upstream: {'state', 'opened_count'}})
+    """
+    with _stats_lock:
+        endpoints = {
+            name: {**counts, "throttle_seconds": round(_throttle_seconds[name], 3)}
+            for name, counts in _stats.items()
+        }
+    breakers = {
+        name: {"state": breaker.current_state(), "opened_count": breaker.opened_count}
+        for name, breaker in _breakers.items()
+    }
+    return {"endpoints": endpoints, "breakers": breakers}
@@ -0,0 +1,13 @@
+# model_config.py
+# Shared LLM settings for the CodeAgent and the direct (agent-free) recommendation path.
+
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_ID = os.getenv("WHISKI_MODEL_ID", "gemini/gemini-2.5-flash")
+MODEL_API_KEY = os.getenv("GOOGLE_GEMINI_API_KEY")
+MODEL_API_BASE = os.getenv("WHISKI_MODEL_API_BASE")  # Optional override, e.g. a local stand-in server
+MODEL_TIMEOUT = float(os.getenv("WHISKI_MODEL_TIMEOUT", "30"))
+MODEL_MAX_RETRIES = int(os.getenv("WHISKI_MODEL_MAX_RETRIES", "3"))
@@ -1,20 +1,26 @@
 # mood_drink_map.py
 
-from telemetry import langfuse
-from langfuse import observe, get_client
+from telemetry import observe
+
+# Mood grid shown in the mood selection scene (emoji -> mood), in display order
+MOODS = {
+    "😌": "chill",
+    "😰": "anxious",
+    "🎨": "creative",
+    "🧘": "reflective",
+    "⚡": "energized",
+    "☕": "cozy",
+}
+
+MOOD_DRINKS = {
+    "chill": "Iced matcha latte with oat milk",
+    "anxious": "Warm hojicha tea – calming and low caffeine",
+    "creative": "Matcha with lavender or rose syrup",
+    "reflective": "Hot matcha latte with almond milk",
+    "energized": "Matcha lemonade – fresh and zesty",
+    "cozy": "Warm ceremonial matcha with oat milk",
+}
 
 #@observe(name="tool.get_drink_for_mood", as_type="tool")  #langfuse tracing tool for mood
 def get_drink_for_mood(mood: str) -> str:
-    mood = mood.lower()
-    mapping = {
-        "chill": "Iced matcha latte with oat milk",
-        "anxious": "Warm hojicha tea – calming and low caffeine",
-        "creative": "Matcha with lavender or rose syrup",
-        "reflective": "Hot matcha latte with almond milk",
-        "energized": "Matcha lemonade – fresh and zesty",
-        "cozy": "Warm ceremonial matcha with oat milk",
-    }
-    return mapping.get(mood, "Classic matcha latte")
-
-#langfuse = get_client()
-#langfuse.flush()
\ No newline at end of file
+    return MOOD_DRINKS.get(mood.lower(), "Classic matcha latte")
@@ -0,0 +1,257 @@
+# prompt_compiler.py
+# Prompt assembly and token accounting: templates are read from disk once, and every LLM
+# request is sized by section (system, tools, memory, user, steps) against a per-request-type
+# budget. Only memory (messages before the current task) is ever trimmed; the task and the
+# agent's steps on it so far always stay, and a request still over budget is rejected.
+
+import contextvars
+import functools
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+# Approximate prompt tokens allowed per request type; memory is trimmed to fit, and a
+# request whose system + user sections alone exceed the budget is rejected
+PROMPT_BUDGETS = {
+    "recommendation": int(os.getenv("WHISKI_PROMPT_BUDGET_RECOMMENDATION", "6000")),
+    "direct": int(os.getenv("WHISKI_PROMPT_BUDGET_DIRECT", "1500")),
+    "chat": int(os.getenv("WHISKI_PROMPT_BUDGET_CHAT", "8000")),
+    "agent": int(os.getenv("WHISKI_PROMPT_BUDGET_AGENT", "8000")),
+}
+
+# Print the per-section breakdown of every request (over-budget requests are always reported)
+PROMPT_LOG_BREAKDOWN = os.getenv("WHISKI_PROMPT_LOG", "false").lower() == "true"
+
+SECTIONS = ("system", "tools", "memory", "user", "steps")
+
+# Lines at least this long that appear more than once in one request count as duplicated
+DUPLICATE_MIN_CHARS = 40
+
+_WORD_RE = re.compile(r"\w+")
+_SYMBOL_RE = re.compile(r"[^\w\s]")
+_SYSTEM_SECTION_RE = re.compile(r"\n_{5,}\n")
+
+_request_type = contextvars.ContextVar("whiski_prompt_request_type", default="agent")
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+class PromptBudgetExceeded(Exception):
+    """Raised when a request is over budget even with all agent memory trimmed (task and steps alone)."""
+
+    def __init__(self, breakdown):
+        super().__init__(f"Prompt for {breakdown.request_type} needs ~{breakdown.total} tokens, budget {breakdown.budget}")
+        self.breakdown = breakdown
+
+
+@dataclass
+class PromptBreakdown:
+    request_type: str
+    budget: int
+    sections: dict = field(default_factory=lambda: dict.fromkeys(SECTIONS, 0))
+    duplicate_tokens: int = 0
+    trimmed_messages: int = 0
+
+    @property
+    def total(self) -> int:
+        return sum(self.sections.values())
+
+    @property
+    def over_budget(self) -> bool:
+        return self.total > self.budget
+
+    def summary(self) -> str:
+        parts = ", ".join(f"{name} {tokens}" for name, tokens in self.sections.items())
+        extra = f", {self.duplicate_tokens} duplicated" if self.duplicate_tokens else ""
+        if self.trimmed_messages:
+            extra += f", {self.trimmed_messages} memory messages trimmed"
+        return f"[prompt] {self.request_type}: ~{self.total}/{self.budget} tokens ({parts}{extra})"
+
+
+@functools.lru_cache(maxsize=None)
+def load_template(name: str) -> str:
+    """Read a template from templates/ once per process."""
+    with open(os.path.join(TEMPLATES_DIR, name), "r") as tf:
+        return tf.read()
+
+
+@functools.lru_cache(maxsize=1024)
+def estimate_tokens(text: str) -> int:
+    """
+    Local approximation of a BPE token count: about four characters per token for words,
+    one token per punctuation mark or emoji. Within ~15% of Gemini/GPT counts for English prose.
+    """
+    if not text:
+        return 0
+    words = sum((len(word) + 3) // 4 for word in _WORD_RE.findall(text))
+    return words + len(_SYMBOL_RE.findall(text))
+
+
+@contextmanager
+def request_type(name: str):
+    """Attribute LLM requests made inside this block to `name` (and its budget)."""
+    token = _request_type.set(name)
+    try:
+        yield
+    finally:
+        _request_type.reset(token)
+
+
+def _message_role_text(message):
+    """(role, text) for a smolagents ChatMessage or an OpenAI-style dict."""
+    if isinstance(message, dict):
+        role, content = message.get("role"), message.get("content")
+    else:
+        role, content = getattr(message, "role", None), getattr(message, "content", None)
+    role = getattr(role, "value", role) or ""
+    if isinstance(content, list):
+        content = "\n".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(role), content or ""
+
+
+@functools.lru_cache(maxsize=64)
+def _split_system(text: str):
+    """Split a system prompt into (general, tool guidance) text by its ____ separated sections."""
+    general, tools = [], []
+    for section in _SYSTEM_SECTION_RE.split(text):
+        header = section.strip().split("\n", 1)[0]
+        (tools if "TOOL" in header else general).append(section)
+    return "\n".join(general), "\n".join(tools)
+
+
+def _classify(messages):
+    """
+    Section name per message: system prompt, the current task (user), earlier memory (before
+    the task), or steps (the agent's own actions and observations on the task, after it).
+    """
+    roles = [_message_role_text(message) for message in messages]
+    task_index = None
+    for index in range(len(roles) - 1, -1, -1):
+        role, text = roles[index]
+        if role == "user" and text.lstrip().startswith("New task"):
+            task_index = index
+            break
+    if task_index is None:
+        # Plain request (direct path): the last user message is the prompt
+        task_index = max((i for i, (role, _) in enumerate(roles) if role == "user"), default=None)
+    sections = []
+    for index, (role, _) in enumerate(roles):
+        if role == "system":
+            sections.append("system")
+        elif index == task_index:
+            sections.append("user")
+        elif task_index is not None and index > task_index:
+            sections.append("steps")
+        else:
+            sections.append("memory")
+    return roles, sections
+
+
+@functools.lru_cache(maxsize=1024)
+def _long_lines(text: str) -> tuple:
+    normalized = (" ".join(line.split()).lower() for line in text.splitlines())
+    return tuple(line for line in normalized if len(line) >= DUPLICATE_MIN_CHARS)
+
+
+def _duplicate_tokens(texts) -> int:
+    """Tokens spent on long lines repeated within one request (e.g. persona pasted twice)."""
+    seen = set()
+    duplicated = 0
+    for text in texts:
+        for line in _long_lines(text):
+            if line in seen:
+                duplicated += estimate_tokens(line)
+            else:
+                seen.add(line)
+    return duplicated
+
+
+def _measure(roles, sections, tools, request_name, budget) -> PromptBreakdown:
+    breakdown = PromptBreakdown(request_type=request_name, budget=budget)
+    for (_, text), section in zip(roles, sections):
+        if section == "system":
+            general, tool_text = _split_system(text)
+            breakdown.sections["system"] += estimate_tokens(general)
+            breakdown.sections["tools"] += estimate_tokens(tool_text)
+        else:
+            breakdown.sections[section] += estimate_tokens(text)
+    for tool in tools or ():
+        # Tool-calling models also receive each tool's name, description and input schema
+        breakdown.sections["tools"] += estimate_tokens(
+            f"{getattr(tool, 'name', '')} {getattr(tool, 'description', '')} {getattr(tool, 'inputs', '')}"
+        )
+    return breakdown
+
+
+def _record(breakdown: PromptBreakdown):
+    with _stats_lock:
+        stats = _stats.setdefault(breakdown.request_type, {
+            "requests": 0, "over_budget": 0, "trimmed_messages": 0, "duplicate_tokens": 0,
+            "max_total": 0, "tokens": dict.fromkeys(SECTIONS, 0),
+        })
+        stats["requests"] += 1
+        stats["over_budget"] += breakdown.over_budget
+        stats["trimmed_messages"] += breakdown.trimmed_messages
+        stats["duplicate_tokens"] += breakdown.duplicate_tokens
+        stats["max_total"] = max(stats["max_total"], breakdown.total)
+        for section, tokens in breakdown.sections.items():
+            stats["tokens"][section] += tokens
+
+
+def compile_messages(messages: list, request_name: str = None, tools=None):
+    """
+    Size a request's messages against its budget, trimming the oldest agent memory to fit.
+
+    Args:
+        messages: smolagents ChatMessages or OpenAI-style dicts, in send order
+        request_name: Request type for the budget; defaults to the enclosing request_type() block
+        tools: Tools sent alongside the messages (tool-calling models only)
+
+    Returns:
+        tuple: (messages to send, PromptBreakdown)
+
+    Raises:
+        PromptBudgetExceeded: If system + tools + the task and its steps alone exceed the budget
+    """
+    request_name = request_name or _request_type.get()
+    budget = PROMPT_BUDGETS.get(request_name, PROMPT_BUDGETS["agent"])
+    messages = list(messages)
+    roles, sections = _classify(messages)
+    breakdown = _measure(roles, sections, tools, request_name, budget)
+
+    # Drop the oldest memory first; the system prompt, the current task and the steps taken
+    # on it always stay, since trimming those would lose the agent's place mid-run
+    while breakdown.over_budget and "memory" in sections:
+        index = sections.index("memory")
+        breakdown.sections["memory"] -= estimate_tokens(roles[index][1])
+        breakdown.trimmed_messages += 1
+        del messages[index], roles[index], sections[index]
+    breakdown.duplicate_tokens = _duplicate_tokens(text for _, text in roles)
+
+    _record(breakdown)
+    if breakdown.over_budget:
+        print(breakdown.summary(), file=sys.stderr)
+        raise PromptBudgetExceeded(breakdown)
+    if PROMPT_LOG_BREAKDOWN or breakdown.trimmed_messages:
+        print(breakdown.summary(), file=sys.stderr)
+    return messages, breakdown
+
+
+def get_prompt_stats() -> dict:
+    """Per request type: request count, average tokens by section, and budget events."""
+    with _stats_lock:
+        snapshot = {name: dict(stats, tokens=dict(stats["tokens"])) for name, stats in _stats.items()}
+    for name, stats in snapshot.items():
+        requests = stats["requests"]
+        stats["avg_tokens"] = {section: round(tokens / requests) for section, tokens in stats.pop("tokens").items()}
+        stats["avg_total"] = sum(stats["avg_tokens"].values())
+        stats["budget"] = PROMPT_BUDGETS.get(name, PROMPT_BUDGETS["agent"])
+    return snapshot
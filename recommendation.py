@@ -0,0 +1,423 @@
+# recommendation.py
+# Streamlit-free recommendation pipeline: the CodeAgent path and a direct structured-output path.
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+import http_client
+from model_config import MODEL_ID, MODEL_API_KEY, MODEL_API_BASE, MODEL_TIMEOUT, MODEL_MAX_RETRIES
+from prompt_compiler import compile_messages, load_template, request_type
+from recommendation_cache import get_cached_recommendation, store_recommendation
+from response_parser import ParseResult, parse_recommendation
+from telemetry import observe
+from weather_api import get_weather
+
+load_dotenv()
+
+# "agent" runs the full CodeAgent loop, "direct" makes one schema-constrained LLM call and
+# falls back to the agent if that call fails or its reply doesn't validate, "hedged" runs the
+# agent on the template prompt and the direct re-prompt at once and keeps the first valid reply
+RECOMMENDATION_MODE = os.getenv("WHISKI_RECOMMENDATION_MODE", "agent").lower()
+
+# Hedged mode: how long the direct leg may wait for a pooled agent before the race is
+# skipped (it never queues behind real requests), and how many legs can run at once
+HEDGE_CHECKOUT_TIMEOUT = float(os.getenv("WHISKI_HEDGE_CHECKOUT_TIMEOUT", "0.5"))
+HEDGE_MAX_WORKERS = int(os.getenv("WHISKI_HEDGE_MAX_WORKERS", "8"))
+
+RECOMMENDATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "drink": {"type": "string", "description": "One specific matcha drink with a brief description"},
+        "vibe": {"type": "string", "description": "One specific café atmosphere description"},
+    },
+    "required": ["drink", "vibe"],
+    "additionalProperties": False,
+}
+
+
+class RecommendationParseError(Exception):
+    """Raised when the model replied but no drink/vibe could be extracted."""
+
+    def __init__(self, response: str, reason: str = None):
+        super().__init__(f"Agent did not provide structured recommendation ({reason or 'unknown'})")
+        self.response = response
+        self.reason = reason
+
+
+@observe(name="agent_generation", as_type="generation")
+def call_whiski_agent(prompt: str) -> str:
+    """
+    Child span: encapsulates the LLM/agent call so Langfuse records a 'generation'
+    with input prompt and raw output.
+    """
+    from whiski_agent import run_agent  # Deferred so the direct path never loads smolagents
+    with request_type("recommendation"):
+        return run_agent(prompt)
+
+
+@observe(name="parse_response", as_type="tool")
+def parse_agent_response(response: str, mood: str, location: str) -> ParseResult:
+    """
+    Child span: encapsulates parsing so Langfuse records a 'tool' with the unstructured
+    LLM text as input and the ParseResult (method, confidence, failure reason) as output.
+    """
+    return parse_recommendation(response, mood=mood, location=location)
+
+
+def _direct_agent_prompt(mood: str, location: str, weather_context: str) -> str:
+    return (
+        f"Recommend a specific matcha drink and café vibe for someone feeling {mood} "
+        f"in {location} with {weather_context} weather. "
+        f"Format: **The Drink:** [recommendation] **The Vibe:** [description]"
+    )
+
+
+def get_agent_recommendation(mood: str, location: str, weather_context: str) -> ParseResult:
+    """
+    Recommendation through the CodeAgent using prompt_template_gemini.txt.
+
+    Returns:
+        ParseResult: Parsed reply; may be the low-confidence snippet fallback
+
+    Raises:
+        RecommendationParseError: If the agent's reply can't be parsed
+    """
+    # Fill template with actual values
+    filled_task = load_template("prompt_template_gemini.txt").format(
+        mood=mood,
+        location=location,
+        weather=weather_context
+    )
+
+    # Get response from agent (child span for generation)
+    response = call_whiski_agent(filled_task)
+    result = parse_agent_response(response, mood, location)
+
+    if result.conversational and not result.structured:
+        # A conversational reply rather than a recommendation; re-prompt with a more direct approach
+        response = call_whiski_agent(_direct_agent_prompt(mood, location, weather_context))
+        result = parse_agent_response(response, mood, location)
+
+    if not result.ok:
+        raise RecommendationParseError(response, result.failure_reason)
+    return result
+
+
+# ── Hedged mode
+
+_hedge_executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_WORKERS, thread_name_prefix="whiski-hedge")
+_hedge_lock = threading.Lock()
+_hedge_stats = {
+    "races": 0,
+    "wins_template": 0,
+    "wins_direct": 0,
+    "no_structured_winner": 0,
+    "hedge_skipped": 0,  # direct leg found no free agent, so the template ran alone
+    "losers_interrupted": 0,
+    "loser_agent_seconds": 0.0,
+    "loser_tokens": 0,
+}
+
+
+class _HedgeLeg:
+    """One side of a hedged race; holds the agent it runs on so the loser can be interrupted."""
+
+    def __init__(self, name: str, prompt: str, checkout_timeout: float = None):
+        self.name = name
+        self.prompt = prompt
+        self.checkout_timeout = checkout_timeout
+        self.agent = None
+        self.cancelled = False
+        self.tokens = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def attach(self, agent) -> bool:
+        with self._lock:
+            if self.cancelled:
+                return False
+            self.agent = agent
+            return True
+
+    def detach(self):
+        with self._lock:
+            self.agent = None
+
+    def cancel(self) -> bool:
+        """Stop this leg; True if a running agent was interrupted."""
+        with self._lock:
+            self.cancelled = True
+            if self.agent is None:
+                return False
+            self.agent.interrupt()  # Takes effect at the agent's next step boundary
+            return True
+
+
+def _run_tokens(agent) -> int:
+    """Tokens the agent's last run consumed, when its monitor reports them."""
+    try:
+        usage = agent.monitor.get_total_token_counts()
+    except AttributeError:
+        return 0
+    if isinstance(usage, dict):
+        return usage.get("input", 0) + usage.get("output", 0)
+    return getattr(usage, "input_tokens", 0) + getattr(usage, "output_tokens", 0)
+
+
+@observe(name="hedged_agent_generation", as_type="generation")
+def _run_hedge_leg(leg: _HedgeLeg, mood: str, location: str):
+    """
+    Run one leg on its own pooled agent.
+
+    Returns:
+        tuple | None: (raw response, ParseResult), or None if the leg was cancelled before starting
+    """
+    from whiski_agent import agent_pool
+
+    started = time.perf_counter()
+    try:
+        with agent_pool.checkout(timeout=leg.checkout_timeout) as agent:
+            if not leg.attach(agent):
+                return None
+            try:
+                with request_type("recommendation"):
+                    response = str(agent.run(leg.prompt))
+            finally:
+                leg.detach()
+                leg.tokens = _run_tokens(agent)
+    finally:
+        leg.elapsed = time.perf_counter() - started
+    return response, parse_agent_response(response, mood, location)
+
+
+def _record_loser(leg: _HedgeLeg):
+    with _hedge_lock:
+        _hedge_stats["loser_agent_seconds"] += leg.elapsed
+        _hedge_stats["loser_tokens"] += leg.tokens
+
+
+def get_hedged_agent_recommendation(mood: str, location: str, weather_context: str) -> ParseResult:
+    """
+    Race the template prompt against the direct re-prompt on two pooled agents.
+
+    The first reply that parses as a structured recommendation wins and the other agent is
+    interrupted. Costs up to one extra agent run per request in exchange for not paying the
+    sequential re-prompt round trip after a conversational reply.
+
+    Raises:
+        RecommendationParseError: If neither reply can be parsed
+    """
+    from agent_pool import AgentPoolTimeout
+
+    legs = [
+        _HedgeLeg("template", load_template("prompt_template_gemini.txt").format(
+            mood=mood,
+            location=location,
+            weather=weather_context
+        )),
+        _HedgeLeg("direct", _direct_agent_prompt(mood, location, weather_context), HEDGE_CHECKOUT_TIMEOUT),
+    ]
+    # Each leg gets a copy of this context so its spans nest under the current trace
+    futures = {
+        _hedge_executor.submit(contextvars.copy_context().run, _run_hedge_leg, leg, mood, location): leg
+        for leg in legs
+    }
+
+    winner = fallback = error = None
+    last_response, last_failure = "", None
+    skipped = False
+    for future in as_completed(futures):
+        leg = futures[future]
+        try:
+            outcome = future.result()
+        except AgentPoolTimeout as e:
+            skipped = skipped or leg.name == "direct"
+            error = error or e
+            continue
+        except Exception as e:
+            error = error or e
+            continue
+        if outcome is None:
+            continue
+        response, result = outcome
+        last_response, last_failure = response, result.failure_reason
+        if result.structured:
+            winner = (leg, result)
+            break
+        # Keep a low-confidence reply in case nothing better arrives; prefer the template's
+        if result.ok and (fallback is None or leg.name == "template"):
+            fallback = (leg, result)
+
+    interrupted = 0
+    if winner is not None:
+        for future, leg in futures.items():
+            if leg is not winner[0]:
+                interrupted += leg.cancel()
+                future.add_done_callback(lambda _, leg=leg: _record_loser(leg))
+
+    with _hedge_lock:
+        _hedge_stats["races"] += 1
+        _hedge_stats["hedge_skipped"] += skipped
+        _hedge_stats["losers_interrupted"] += interrupted
+        if winner is not None:
+            _hedge_stats[f"wins_{winner[0].name}"] += 1
+        else:
+            _hedge_stats["no_structured_winner"] += 1
+
+    if winner is not None:
+        return winner[1]
+    if fallback is not None:
+        return fallback[1]
+    if not last_response and error is not None:
+        raise error
+    raise RecommendationParseError(last_response, last_failure)
+
+
+def get_hedge_stats() -> dict:
+    """How often each hedged leg wins, and what the discarded legs cost."""
+    with _hedge_lock:
+        stats = dict(_hedge_stats)
+    races = stats["races"]
+    stats["template_win_rate"] = round(stats["wins_template"] / races, 3) if races else 0.0
+    stats["direct_win_rate"] = round(stats["wins_direct"] / races, 3) if races else 0.0
+    stats["loser_agent_seconds"] = round(stats["loser_agent_seconds"], 2)
+    stats["avg_loser_tokens_per_race"] = round(stats["loser_tokens"] / races, 1) if races else 0.0
+    return stats
+
+
+def parse_structured_response(content: str) -> ParseResult:
+    """
+    Validate a JSON {drink, vibe} reply from the direct path.
+
+    Returns:
+        ParseResult: Structured result, or a failed one (snippet fallbacks don't count here)
+    """
+    result = parse_recommendation(content)
+    if result.ok and not result.structured:
+        return ParseResult(method=result.method, failure_reason="unstructured", conversational=result.conversational)
+    return result
+
+
+@observe(name="direct_generation", as_type="generation")
+def get_direct_recommendation(mood: str, location: str, weather_context: str):
+    """
+    One LiteLLM call constrained to the {drink, vibe} JSON schema, no CodeAgent.
+
+    Returns:
+        ParseResult: Parsed reply; check .ok before using it
+    """
+    import litellm  # Deferred like the agent import; only paid for on first use
+
+    prompt = load_template("prompt_template_direct.txt").format(
+        mood=mood,
+        location=location,
+        weather=weather_context
+    )
+    messages, _ = compile_messages([{"role": "user", "content": prompt}], "direct")
+    http_client.record_call()  # LLM requests go through LiteLLM, not http_client
+    response = litellm.completion(
+        model=MODEL_ID,
+        api_key=MODEL_API_KEY,
+        api_base=MODEL_API_BASE,
+        timeout=MODEL_TIMEOUT,
+        num_retries=MODEL_MAX_RETRIES,
+        messages=messages,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "matcha_recommendation", "schema": RECOMMENDATION_SCHEMA, "strict": True},
+        },
+    )
+    return parse_structured_response(response.choices[0].message.content)
+
+
+def generate_recommendation(mood: str, location: str, weather_context: str, mode: str = None) -> ParseResult:
+    """
+    Generate a recommendation with the configured mode, bypassing the cache.
+
+    Args:
+        mood: Selected mood
+        location: User location
+        weather_context: Weather as a short description (e.g. "12.4°C, light rain")
+        mode: "agent", "direct" or "hedged"; defaults to WHISKI_RECOMMENDATION_MODE
+
+    Returns:
+        ParseResult: The parsed reply; only `structured` results are worth caching
+
+    Raises:
+        RecommendationParseError: If the agent's reply can't be parsed
+    """
+    mode = (mode or RECOMMENDATION_MODE).lower()
+    result = None
+    if mode == "direct":
+        try:
+            result = get_direct_recommendation(mood, location, weather_context)
+        except Exception:
+            # Timeouts, provider errors and schema rejections all fall through to the agent
+            result = None
+    if result is None or not result.ok:
+        if mode == "hedged":
+            result = get_hedged_agent_recommendation(mood, location, weather_context)
+        else:
+            result = get_agent_recommendation(mood, location, weather_context)
+    return result
+
+
+def get_recommendation(mood: str, location: str, weather_context: str, mode: str = None,
+                       weather_bucket: str = None, refresh: bool = False) -> dict:
+    """
+    Get a {drink, vibe} recommendation using the configured mode.
+
+    Served from the shared recommendation cache when this (mood, location, weather bucket)
+    already has enough variants; otherwise generated and added as a new variant.
+
+    Args:
+        mood: Selected mood
+        location: User location
+        weather_context: Weather as a short description (e.g. "12.4°C, light rain")
+        mode: "agent", "direct" or "hedged"; defaults to WHISKI_RECOMMENDATION_MODE
+        weather_bucket: "cold", "mild" or "hot" (None if weather is unavailable)
+        refresh: Skip the cache lookup and always generate
+
+    Returns:
+        dict: Recommendation with 'drink' and 'vibe' keys
+
+    Raises:
+        RecommendationParseError: If the agent's reply can't be parsed
+    """
+    cached = None if refresh else get_cached_recommendation(mood, location, weather_bucket)
+    if cached is not None:
+        return cached
+
+    result = generate_recommendation(mood, location, weather_context, mode)
+    # Only confident parses are shared; a snippet fallback is served once but never cached
+    if result.structured:
+        store_recommendation(mood, location, weather_bucket, result.as_dict())
+    return result.as_dict()
+
+
+@observe(name="agent_result_pairing_workflow", as_type="workflow")
+def recommend(mood: str, location: str, weather_report=None):
+    """
+    The full recommendation flow shared by the UI and the API: current weather, then a
+    {drink, vibe} recommendation for it.
+
+    Args:
+        mood: Selected mood
+        location: User location
+        weather_report: WeatherReport already fetched for this location, if any
+
+    Returns:
+        tuple: (recommendation dict, WeatherReport or None if weather is unavailable)
+
+    Raises:
+        RecommendationParseError: If the agent's reply can't be parsed
+    """
+    if weather_report is None:
+        weather_report = get_weather(location)
+    weather_context = str(weather_report) if weather_report else "unknown"
+    weather_bucket = weather_report.bucket if weather_report else None
+    recommendation = get_recommendation(mood, location, weather_context, weather_bucket=weather_bucket)
+    return recommendation, weather_report
@@ -0,0 +1,136 @@
+# recommendation_cache.py
+# Shared cache of parsed {drink, vibe} recommendations keyed by (mood, location, weather bucket).
+#
+# Each key holds the last RECOMMENDATION_VARIANTS variants. The TTL slides: storing a new variant
+# rewrites the entry and restarts its TTL, and the oldest variant rotates out, so a variant lives
+# at most RECOMMENDATION_VARIANTS stores (the cache warmer's refreshes) past its own. An entry
+# that has already expired is never extended; the next store starts it over.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+from disk_cache import DiskCache, normalize_location
+from model_config import MODEL_ID
+from prompt_compiler import load_template
+from templates.main_system_prompt import WHISKI_SYSTEM_PROMPT
+
+load_dotenv()
+
+RECOMMENDATION_CACHE_ENABLED = os.getenv("RECOMMENDATION_CACHE_ENABLED", "true").lower() == "true"
+RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", str(6 * 60 * 60)))
+RECOMMENDATION_CACHE_MAX_ENTRIES = int(os.getenv("RECOMMENDATION_CACHE_MAX_ENTRIES", "500"))
+
+# Variants kept per key; until a key has this many, lookups miss so the LLM adds variety
+RECOMMENDATION_VARIANTS = int(os.getenv("RECOMMENDATION_CACHE_VARIANTS", "3"))
+
+_PROMPT_FILES = ["prompt_template_gemini.txt", "prompt_template_direct.txt"]
+
+
+def _compute_prompt_version() -> str:
+    """Hash of everything that shapes a recommendation, so prompt edits invalidate old entries."""
+    digest = hashlib.sha256()
+    digest.update(MODEL_ID.encode())
+    digest.update(WHISKI_SYSTEM_PROMPT.encode())
+    for name in _PROMPT_FILES:
+        digest.update(load_template(name).encode())
+    return digest.hexdigest()[:12]
+
+
+PROMPT_VERSION = _compute_prompt_version()
+
+_cache = DiskCache("recommendations", ttl_seconds=RECOMMENDATION_CACHE_TTL, max_entries=RECOMMENDATION_CACHE_MAX_ENTRIES)
+_lock = threading.Lock()
+_rotation = OrderedDict()  # key -> next variant index, least recently served first
+_stats = {"hits": 0, "misses": 0, "stores": 0}
+
+
+def make_cache_key(mood: str, location: str, weather_bucket: str = None) -> str:
+    """Key on prompt version, canonical mood, normalized location and weather bucket."""
+    return "|".join([
+        PROMPT_VERSION,
+        (mood or "").strip().lower(),
+        normalize_location(location),
+        weather_bucket or "unknown",
+    ])
+
+
+def get_cached_recommendation(mood: str, location: str, weather_bucket: str = None):
+    """
+    Return the next cached variant for this key, rotating through the stored variants.
+
+    Returns:
+        dict | None: {'drink', 'vibe'}, or None if the key still needs more variants
+    """
+    if not RECOMMENDATION_CACHE_ENABLED:
+        return None
+    key = make_cache_key(mood, location, weather_bucket)
+    entry = _cache.get(key)
+    variants = entry["variants"] if entry else []
+    with _lock:
+        if len(variants) < RECOMMENDATION_VARIANTS:
+            _stats["misses"] += 1
+            return None
+        _stats["hits"] += 1
+        index = _rotation.pop(key, 0)
+        _rotation[key] = index + 1
+        while len(_rotation) > RECOMMENDATION_CACHE_MAX_ENTRIES:
+            _rotation.popitem(last=False)
+    return dict(variants[index % len(variants)])
+
+
+def store_recommendation(mood: str, location: str, weather_bucket: str, recommendation: dict) -> bool:
+    """
+    Add a freshly generated {drink, vibe} as another variant for this key (restarts its TTL).
+
+    Returns:
+        bool: True if a new variant was stored, False if it was already cached or caching is off
+    """
+    if not RECOMMENDATION_CACHE_ENABLED:
+        return False
+    key = make_cache_key(mood, location, weather_bucket)
+    variant = {"drink": recommendation["drink"], "vibe": recommendation["vibe"]}
+    with _lock:
+        # peek, not get: a store isn't a lookup and shouldn't count as a cache hit or miss
+        found = _cache.peek(key, include_expired=True)
+        entry = found[0] if found and found[1] <= RECOMMENDATION_CACHE_TTL else {"variants": []}
+        if variant in entry["variants"]:
+            return False  # Nothing new; the entry and its TTL stay as they were
+        entry["variants"] = (entry["variants"] + [variant])[-RECOMMENDATION_VARIANTS:]
+        _cache.set(key, entry)
+        _stats["stores"] += 1
+    return True
+
+
+def peek_recommendations(mood: str, location: str, weather_bucket: str = None):
+    """
+    Cached variants for this key and the age of the last store, without affecting hit stats.
+
+    Returns:
+        tuple: (number of variants, age in seconds or None if nothing is cached)
+    """
+    entry = _cache.peek(make_cache_key(mood, location, weather_bucket))
+    if entry is None:
+        return 0, None
+    value, age = entry
+    return len(value["variants"]), age
+
+
+def invalidate_recommendations() -> int:
+    """Drop every cached recommendation (all prompt versions)."""
+    with _lock:
+        _rotation.clear()
+    return _cache.invalidate()
+
+
+def get_recommendation_cache_stats() -> dict:
+    """Hit rate of recommendation lookups plus size/config of the underlying cache."""
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+    stats["prompt_version"] = PROMPT_VERSION
+    stats["variants_per_key"] = RECOMMENDATION_VARIANTS
+    stats["cache"] = _cache.stats()
+    return stats
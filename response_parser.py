@@ -0,0 +1,194 @@
+# response_parser.py
+# Single-pass parser for agent/LLM recommendation replies.
+#
+# Recognizes the template's **The Drink:** / **The Vibe:** structure, plain "Drink:" labels
+# and JSON objects, with or without the CodeAgent's <code>final_answer("...")</code> wrapping,
+# and reports how confident it is instead of silently falling back.
+
+import json
+import re
+from dataclasses import dataclass
+
+# Confidence per extraction method; callers treat >= STRUCTURED_CONFIDENCE as a real answer
+METHOD_CONFIDENCE = {"json": 1.0, "markers": 0.95, "labels": 0.8, "snippet": 0.3, "none": 0.0}
+STRUCTURED_CONFIDENCE = 0.8
+
+_QUESTION_PATTERNS = ("another", "other", "would you", "anything else")
+
+# Structural tokens can only start at these anchors, so the reply is scanned once for a few
+# literals and the token grammar is tried only where one occurs (plus at the very start).
+_ANCHOR_RE = re.compile(r"\*\*|\n|\{|</?code>|```|final_answer\(")
+_TOKEN_RE = re.compile(
+    r"""
+      (?P<bold>\*\*[ \t]*(?:the[ \t]+)?(?P<bold_field>drink|vibe)[ \t]*:?[ \t]*\*\*[ \t]*:?)
+    | (?P<label>\n?[ \t>\-]*(?:\*[ \t]+)?(?:the[ \t]+)?(?P<label_field>drink|vibe)[ \t]*:)
+    | (?P<json>\{\s*"(?:drink|vibe)")
+    | (?P<code></?code>|```[a-z]*|final_answer\(\s*(?:[rf]?\"\"\"|[rf]?"|[rf]?')?)
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+_CONVERSATIONAL_RE = re.compile(r"glad i could help|is there another|would you like|anything else|other mood|follow.?up")
+_BOLD_RE = re.compile(r"\*\*([^*]+)\*\*")
+_JSON_DECODER = json.JSONDecoder()
+
+
+@dataclass(frozen=True)
+class ParseResult:
+    drink: str = None
+    vibe: str = None
+    method: str = "none"
+    confidence: float = 0.0
+    failure_reason: str = None
+    conversational: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.failure_reason is None and bool(self.drink) and bool(self.vibe)
+
+    @property
+    def structured(self) -> bool:
+        """True for a real drink/vibe answer rather than the low-confidence snippet fallback."""
+        return self.ok and self.confidence >= STRUCTURED_CONFIDENCE
+
+    def as_dict(self) -> dict:
+        return {"drink": self.drink, "vibe": self.vibe}
+
+
+def validation_failure(drink, vibe):
+    """
+    Check that drink/vibe look like an actual recommendation rather than a question.
+
+    Returns:
+        str | None: Failure reason, or None if valid
+    """
+    if not isinstance(drink, str) or not isinstance(vibe, str):
+        return "missing_field"
+    if len(drink.strip()) <= 10 or len(vibe.strip()) <= 10:
+        return "too_short"
+    lowered = drink.lower()
+    if "matcha" not in lowered:
+        return "not_matcha"
+    for pattern in _QUESTION_PATTERNS:
+        if pattern in lowered:
+            return "question"
+    return None
+
+
+def is_valid_recommendation(drink, vibe) -> bool:
+    """True if drink/vibe look like an actual recommendation rather than a question."""
+    return validation_failure(drink, vibe) is None
+
+
+def _clean(text: str) -> str:
+    """Undo final_answer string escapes and inline bold, and trim quote/paren leftovers."""
+    if "\\" in text:
+        text = text.replace("\\n", "\n").replace('\\"', '"')
+    if "**" in text:
+        text = _BOLD_RE.sub(r"\1", text)
+    return text.strip().strip("\"')").strip()
+
+
+def _tokens(response: str):
+    """Yield structural token matches in order, trying the grammar only at anchor positions."""
+    match = _TOKEN_RE.match(response)
+    end = 0
+    if match:
+        end = match.end()
+        yield match
+    for anchor in _ANCHOR_RE.finditer(response):
+        if anchor.start() < end:
+            continue
+        match = _TOKEN_RE.match(response, anchor.start())
+        if match:
+            end = match.end()
+            yield match
+
+
+def _snippet(response: str):
+    """First sentence mentioning matcha (the legacy last-resort fallback)."""
+    lowered = response.lower()
+    index = lowered.find("matcha")
+    if index < 0:
+        return None
+    start = response.rfind(".", 0, index) + 1
+    end = response.find(".", index)
+    snippet = response[start:end + 1 if end >= 0 else len(response)].strip()
+    return snippet[:80] + ("..." if len(snippet) > 80 else "")
+
+
+def parse_recommendation(response: str, mood: str = None, location: str = None) -> ParseResult:
+    """
+    Parse a recommendation reply in one tokenizing pass.
+
+    Args:
+        response: Raw agent or LLM output
+        mood: Used only for the snippet fallback's generic vibe
+        location: Used only for the snippet fallback's generic vibe
+
+    Returns:
+        ParseResult: drink/vibe with the method used, a confidence score and, on
+        failure, a machine-readable reason
+    """
+    if not response or not response.strip():
+        return ParseResult(failure_reason="empty")
+
+    fields = {}  # field -> (method, content_start)
+    boundaries = []  # start offsets of every token, used to cut field contents
+    json_start = None
+    conversational_match = _CONVERSATIONAL_RE.search(response.lower())
+    conversational = conversational_match is not None
+    if conversational:
+        # A trailing "Would you like another pairing?" ends the field it follows
+        boundaries.append(conversational_match.start())
+
+    for match in _tokens(response):
+        boundaries.append(match.start())
+        kind = match.lastgroup
+        if kind == "bold" or kind == "label":
+            field = match.group(f"{kind}_field").lower()
+            method = "markers" if kind == "bold" else "labels"
+            current = fields.get(field)
+            # Bold markers win over plain labels; otherwise keep the first occurrence
+            if current is None or (current[0] == "labels" and method == "markers"):
+                fields[field] = (method, match.end())
+        elif kind == "json" and json_start is None:
+            json_start = match.start()
+
+    # JSON object (direct structured-output path, or the agent replying in JSON)
+    if json_start is not None:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(response, json_start)
+        except ValueError:
+            data = None
+        if isinstance(data, dict) and "drink" in data and "vibe" in data:
+            drink, vibe = data.get("drink"), data.get("vibe")
+            reason = validation_failure(drink, vibe)
+            if reason is None:
+                return ParseResult(drink.strip(), vibe.strip(), "json", METHOD_CONFIDENCE["json"], None, conversational)
+
+    if "drink" in fields and "vibe" in fields:
+        contents = {}
+        for field, (method, start) in fields.items():
+            end = min((b for b in boundaries if b >= start), default=len(response))
+            text = response[start:end]
+            if field == "drink" and "\n\n" in text.strip():
+                text = text.strip().split("\n\n", 1)[0]
+            contents[field] = _clean(text)
+        method = "markers" if fields["drink"][0] == "markers" and fields["vibe"][0] == "markers" else "labels"
+        reason = validation_failure(contents["drink"], contents["vibe"])
+        if reason is None:
+            return ParseResult(contents["drink"], contents["vibe"], method, METHOD_CONFIDENCE[method], None, conversational)
+        structure_failure = reason
+    else:
+        structure_failure = "no_structure"
+
+    snippet = _snippet(response)
+    if snippet:
+        vibe = f"A perfect {mood or 'matcha'} atmosphere in {location or 'your neighborhood'} to enjoy your matcha! 🍵"
+        return ParseResult(snippet, vibe, "snippet", METHOD_CONFIDENCE["snippet"], None, conversational)
+
+    return ParseResult(
+        method="none",
+        failure_reason="conversational" if conversational and structure_failure == "no_structure" else structure_failure,
+        conversational=conversational,
+    )
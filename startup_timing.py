@@ -0,0 +1,145 @@
+# startup_timing.py
+# Opt-in cold-start profiler: per-module import times in the style of `python -X importtime`,
+# plus named startup phases (first paint, first use of each scene).
+
+import importlib.abc
+import os
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STARTUP_TIMING_ENABLED = os.getenv("WHISKI_STARTUP_TIMING", "false").lower() == "true"
+STARTUP_REPORT_PATH = os.getenv("WHISKI_STARTUP_REPORT")  # Also write the report here if set
+
+_process_start = time.perf_counter()
+_records_lock = threading.Lock()
+_import_records = []  # (module, self_us, cumulative_us, depth) in completion order, like -X importtime
+_timings = {}  # name -> ms
+_local = threading.local()
+_reported = False
+
+
+class _TimedLoader:
+    """Wraps a module loader and records how long exec_module takes."""
+
+    def __init__(self, loader, name):
+        self._loader = loader
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        depth = len(stack)
+        stack.append(0.0)  # accumulated cumulative time of child imports
+        started = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            cumulative = time.perf_counter() - started
+            children = stack.pop()
+            if stack:
+                stack[-1] += cumulative
+            # Put the real loader back so nothing downstream sees the wrapper
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+            with _records_lock:
+                _import_records.append((
+                    self._name,
+                    int((cumulative - children) * 1_000_000),
+                    int(cumulative * 1_000_000),
+                    depth,
+                ))
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """Delegates to the real finders and wraps the loader they return."""
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and not isinstance(spec.loader, _TimedLoader):
+            spec.loader = _TimedLoader(spec.loader, fullname)
+        return spec
+
+
+def enable():
+    """Start recording imports (no-op unless WHISKI_STARTUP_TIMING=true). Safe to call on every rerun."""
+    if not STARTUP_TIMING_ENABLED:
+        return
+    if not any(isinstance(finder, _TimingFinder) for finder in sys.meta_path):
+        sys.meta_path.insert(0, _TimingFinder())
+
+
+def mark_phase(name: str):
+    """Record the time since process start for a named phase, the first time it happens."""
+    if not STARTUP_TIMING_ENABLED:
+        return
+    with _records_lock:
+        _timings.setdefault(name, (time.perf_counter() - _process_start) * 1000)
+
+
+def record_timing(name: str, elapsed_seconds: float):
+    """Record a one-off duration such as the first import of a scene module."""
+    if not STARTUP_TIMING_ENABLED:
+        return
+    with _records_lock:
+        _timings.setdefault(name, elapsed_seconds * 1000)
+
+
+def format_report(top: int = 25) -> str:
+    """
+    Build the startup report.
+
+    Args:
+        top: Number of slowest top-level imports to summarize
+
+    Returns:
+        str: Phase timings, slowest imports, then the full -X importtime style table
+    """
+    with _records_lock:
+        records = list(_import_records)
+        timings = dict(_timings)
+
+    lines = ["[startup] phases (ms):"]
+    for name, ms in sorted(timings.items(), key=lambda item: item[1]):
+        lines.append(f"[startup]   {name:<40} {ms:>9.1f}")
+
+    top_level = sorted((r for r in records if r[3] == 0), key=lambda r: r[2], reverse=True)[:top]
+    lines.append(f"[startup] slowest top-level imports (cumulative ms):")
+    for name, _, cumulative_us, _ in top_level:
+        lines.append(f"[startup]   {name:<40} {cumulative_us / 1000:>9.1f}")
+
+    lines.append("import time: self [us] | cumulative | imported package")
+    for name, self_us, cumulative_us, depth in records:
+        lines.append(f"import time: {self_us:>9} | {cumulative_us:>10} | {'  ' * depth}{name}")
+    return "\n".join(lines)
+
+
+def report_once():
+    """Print (and optionally save) the report the first time it's called in this process."""
+    global _reported
+    if not STARTUP_TIMING_ENABLED or _reported:
+        return
+    _reported = True
+    report = format_report()
+    print(report, file=sys.stderr)
+    if STARTUP_REPORT_PATH:
+        with open(STARTUP_REPORT_PATH, "w") as report_file:
+            report_file.write(report + "\n")
@@ -3,123 +3,194 @@ Styles Module for Whiski Matcha Mood Pairer
 Contains all CSS styling and UI configuration for the Streamlit app.
 """
 
+import functools
+import re
 import streamlit as st
 
+GLOBAL_CSS = """
+    .scene-container {
+        text-align: center;
+        padding: 50px 20px;
+        min-height: 60vh;
+        display: flex;
+        flex-direction: column;
+        justify-content: center;
+    }
+    
+    .mood-button {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        color: white;
+        border: none;
+        border-radius: 15px;
+        padding: 20px;
+        margin: 10px;
+        font-size: 18px;
+        cursor: pointer;
+        transition: transform 0.2s;
+    }
+    
+    .location-button {
+        background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
+        color: white;
+        border: none;
+        border-radius: 10px;
+        padding: 15px 30px;
+        margin: 8px;
+        font-size: 16px;
+        width: 100%;
+    }
+    
+    .start-button {
+        background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
+        color: white;
+        border: none;
+        border-radius: 25px;
+        padding: 15px 40px;
+        font-size: 20px;
+        font-weight: bold;
+    }
+    
+    .progress-bar {
+        height: 4px;
+        background: #e0e0e0;
+        border-radius: 2px;
+        margin: 20px 0;
+    }
+    
+    .progress-fill {
+        height: 100%;
+        background: linear-gradient(90deg, #4CAF50, #66BB6A);
+        border-radius: 2px;
+        transition: width 0.3s ease;
+    }
+"""
+
+HIDE_UI_CSS = """
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    header {visibility: hidden;}
+"""
+
+WELCOME_CSS = """
+    .stApp {
+        background-color: #bdcb9aff;
+    }
+    .splash-img {
+        display: flex;
+        justify-content: center;
+        align-items: top;
+        height: 100vh;
+    }
+    .splash-img > img {
+        width: 75vw;
+        height: 75vh;
+        object-fit: cover;
+    }
+    .start-splash-button {
+        position: fixed;
+        bottom: 2rem;
+        left: 50%;
+        transform: translateX(-50%);
+        padding: 0.75rem 3rem;
+        font-size: 1.5rem;
+        background-color: white;
+        color: black;
+        border: none;
+        border-radius: 50px;
+        cursor: pointer;
+        box-shadow: 0 4px 15px rgba(0,0,0,0.2);
+        z-index: 1000;
+    }
+    .start-splash-button:hover {
+        transform: translateX(-50%) translateY(-2px);
+        box-shadow: 0 6px 20px rgba(0,0,0,0.3);
+    }
+"""
+
+LOADING_CSS = """
+    /* Hide specific UI elements from previous scenes */
+    .stButton:not([data-testid*="progress"]) {
+        display: none !important;
+    }
+    
+    /* Hide any text inputs or form elements */
+    [data-testid="stTextInput"], 
+    [data-testid="stSelectbox"],
+    .stRadio {
+        display: none !important;
+    }
+    
+    .loading-spinner {
+        width: 60px;
+        height: 60px;
+        border: 4px solid #f3f3f3;
+        border-top: 4px solid #557937ff;
+        border-radius: 50%;
+        animation: spin 1s linear infinite;
+        margin: 0 auto;
+    }
+    
+    @keyframes spin {
+        0% { transform: rotate(0deg); }
+        100% { transform: rotate(360deg); }
+    }
+"""
+
+# Stylesheets by name; each is minified once per process
+STYLE_BUNDLES = {
+    "global": GLOBAL_CSS + HIDE_UI_CSS,
+    "hide_ui": HIDE_UI_CSS,
+    "welcome": WELCOME_CSS,
+    "loading": LOADING_CSS,
+}
+
+# Bundles already contained in another bundle
+_BUNDLE_INCLUDES = {"global": ("hide_ui",)}
+
+_CSS_COMMENTS = re.compile(r"/\*.*?\*/", re.DOTALL)
+_CSS_SPACE_AROUND = re.compile(r"\s*([{};,>])\s*")
+_CSS_SPACE_AFTER_COLON = re.compile(r":\s+")
+
+def minify_css(css):
+    """Strip comments and redundant whitespace (spaces before ':' are kept; they change selectors)"""
+    css = _CSS_COMMENTS.sub("", css)
+    css = " ".join(css.split())
+    css = _CSS_SPACE_AROUND.sub(r"\1", css)
+    css = _CSS_SPACE_AFTER_COLON.sub(":", css)
+    return css.replace(";}", "}").strip()
+
+@functools.lru_cache(maxsize=None)
+def _style_block(names):
+    """
+    One <style> block with the minified CSS of the named bundles, built once per process
+
+    Inline rather than a stylesheet in static/: Streamlit serves .css from static/ as
+    text/plain with nosniff, and browsers refuse to apply it.
+    """
+    included = {part for name in names for part in _BUNDLE_INCLUDES.get(name, ())}
+    unique = [name for name in dict.fromkeys(names) if name not in included]
+    return f"<style>{''.join(minify_css(STYLE_BUNDLES[name]) for name in unique)}</style>"
+
+def inject_styles(*names):
+    """
+    Apply style bundles for this run as a single <style> element
+
+    Streamlit drops any element a rerun doesn't emit again, so styles can't be skipped after
+    the first run; each call emits them once, minified, with duplicate bundles removed.
+    """
+    st.markdown(_style_block(names), unsafe_allow_html=True)
+
 def apply_global_styles():
-    """Apply global CSS styles to the Streamlit app"""
-    st.markdown("""
-    <style>
-        .scene-container {
-            text-align: center;
-            padding: 50px 20px;
-            min-height: 60vh;
-            display: flex;
-            flex-direction: column;
-            justify-content: center;
-        }
-        
-        .mood-button {
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            color: white;
-            border: none;
-            border-radius: 15px;
-            padding: 20px;
-            margin: 10px;
-            font-size: 18px;
-            cursor: pointer;
-            transition: transform 0.2s;
-        }
-        
-        .location-button {
-            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
-            color: white;
-            border: none;
-            border-radius: 10px;
-            padding: 15px 30px;
-            margin: 8px;
-            font-size: 16px;
-            width: 100%;
-        }
-        
-        .start-button {
-            background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
-            color: white;
-            border: none;
-            border-radius: 25px;
-            padding: 15px 40px;
-            font-size: 20px;
-            font-weight: bold;
-        }
-        
-        .progress-bar {
-            height: 4px;
-            background: #e0e0e0;
-            border-radius: 2px;
-            margin: 20px 0;
-        }
-        
-        .progress-fill {
-            height: 100%;
-            background: linear-gradient(90deg, #4CAF50, #66BB6A);
-            border-radius: 2px;
-            transition: width 0.3s ease;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    """Apply global CSS styles to the Streamlit app (includes hiding the default Streamlit UI)"""
+    inject_styles("global")
 
 def apply_welcome_styles():
     """Apply styles specific to the welcome/splash scene"""
-    st.markdown(
-        """
-        <style>
-          .stApp {
-            background-color: #bdcb9aff;
-          }
-          .splash-img {
-            display: flex;
-            justify-content: center;
-            align-items: top;
-            height: 100vh;
-          }
-          .splash-img > img {
-            width: 75vw;
-            height: 75vh;
-            object-fit: cover;
-          }
-          .start-splash-button {
-            position: fixed;
-            bottom: 2rem;
-            left: 50%;
-            transform: translateX(-50%);
-            padding: 0.75rem 3rem;
-            font-size: 1.5rem;
-            background-color: white;
-            color: black;
-            border: none;
-            border-radius: 50px;
-            cursor: pointer;
-            box-shadow: 0 4px 15px rgba(0,0,0,0.2);
-            z-index: 1000;
-          }
-          .start-splash-button:hover {
-            transform: translateX(-50%) translateY(-2px);
-            box-shadow: 0 6px 20px rgba(0,0,0,0.3);
-          }
-        </style>
-        """,
-        unsafe_allow_html=True,
-    )
+    inject_styles("welcome")
 
 def hide_streamlit_ui():
-    """Hide default Streamlit UI elements"""
-    hide_streamlit_style = """
-    <style>
-    #MainMenu {visibility: hidden;}
-    footer {visibility: hidden;}
-    header {visibility: hidden;}
-    </style>
-    """
-    st.markdown(hide_streamlit_style, unsafe_allow_html=True)
+    """Hide default Streamlit UI elements (already part of the global bundle)"""
+    inject_styles("hide_ui")
 
 def get_scene_header_style(title, subtitle="", font_size="48px"):
     """Generate consistent header styling for scenes"""
@@ -1,39 +1,303 @@
+import atexit
+import base64
+import contextvars
+import functools
+import inspect
+import json
 import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+
+import requests
 from dotenv import load_dotenv
-from langfuse import get_client, observe, Langfuse
+import http_client
 
 load_dotenv()
 
 public = os.getenv("LANGFUSE_PUBLIC_KEY")
 secret = os.getenv("LANGFUSE_SECRET_KEY")
-LANGFUSE_HOST = os.getenv("LANGFUSE_HOST")
+LANGFUSE_HOST = (os.getenv("LANGFUSE_HOST") or "https://cloud.langfuse.com").rstrip("/")
+
+# Tracing is a no-op (decorators return the function untouched) without credentials
+TELEMETRY_ENABLED = bool(public and secret) and os.getenv("WHISKI_TELEMETRY", "true").lower() == "true"
 if not (public and secret):
-    print("[telemetry] Warning: Missing LANGFUSE_PUBLIC_KEY or LANGFUSE_SECRET_KEY in environment")
+    print("[telemetry] Warning: Missing LANGFUSE_PUBLIC_KEY or LANGFUSE_SECRET_KEY in environment; tracing disabled")
+
+# Export tuning: spans wait in a bounded queue and are sent in batches by one background thread
+TELEMETRY_QUEUE_SIZE = int(os.getenv("TELEMETRY_QUEUE_SIZE", "2000"))
+TELEMETRY_BATCH_SIZE = int(os.getenv("TELEMETRY_BATCH_SIZE", "50"))
+TELEMETRY_FLUSH_INTERVAL = float(os.getenv("TELEMETRY_FLUSH_INTERVAL_SECONDS", "2"))
+TELEMETRY_SHUTDOWN_TIMEOUT = float(os.getenv("TELEMETRY_SHUTDOWN_TIMEOUT", "5"))
+TELEMETRY_MAX_FIELD_CHARS = int(os.getenv("TELEMETRY_MAX_FIELD_CHARS", "4000"))
+
+INGESTION_URL = f"{LANGFUSE_HOST}/api/public/ingestion"
+
+_queue = queue.Queue(maxsize=TELEMETRY_QUEUE_SIZE)
+_current_span = contextvars.ContextVar("whiski_current_span", default=None)
+_stats_lock = threading.Lock()
+_stats = {"enqueued": 0, "dropped": 0, "exported": 0, "rejected": 0, "failed": 0, "batches": 0}
+_export_latencies = deque(maxlen=200)
+_exporter_lock = threading.Lock()
+_exporter = None
+_stop = threading.Event()
+
+
+def _now_iso(timestamp: float = None) -> str:
+    return datetime.fromtimestamp(timestamp or time.time(), tz=timezone.utc).isoformat()
+
+
+def _serialize(value):
+    """JSON-friendly, size-capped copy of a span input/output."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if not isinstance(value, str):
+        try:
+            value = json.dumps(value, default=str, ensure_ascii=False)
+        except (TypeError, ValueError):
+            value = str(value)
+    if len(value) > TELEMETRY_MAX_FIELD_CHARS:
+        return value[:TELEMETRY_MAX_FIELD_CHARS] + "…"
+    return value
+
+
+def _enqueue(event: dict):
+    """Hand an ingestion event to the exporter; never blocks, drops when the queue is full."""
+    _ensure_exporter()
+    try:
+        _queue.put_nowait(event)
+        with _stats_lock:
+            _stats["enqueued"] += 1
+    except queue.Full:
+        with _stats_lock:
+            _stats["dropped"] += 1
+
+
+def _emit_observation(span: dict, as_type: str, output, error: BaseException = None):
+    end_time = time.time()
+    body = {
+        "id": span["id"],
+        "traceId": span["trace_id"],
+        "parentObservationId": span["parent_id"],
+        "name": span["name"],
+        "startTime": _now_iso(span["start"]),
+        "endTime": _now_iso(end_time),
+        "input": span["input"],
+        "output": _serialize(output),
+        "metadata": {"whiski_type": as_type},
+    }
+    if error is not None:
+        body["level"] = "ERROR"
+        body["statusMessage"] = _serialize(repr(error))
+    event_type = "generation-create" if as_type == "generation" else "span-create"
+    _enqueue({"id": str(uuid.uuid4()), "type": event_type, "timestamp": _now_iso(end_time), "body": body})
+
+    # Root spans also create the trace they belong to
+    if span["parent_id"] is None:
+        _enqueue({
+            "id": str(uuid.uuid4()),
+            "type": "trace-create",
+            "timestamp": _now_iso(end_time),
+            "body": {
+                "id": span["trace_id"],
+                "name": span["name"],
+                "timestamp": _now_iso(span["start"]),
+                "input": span["input"],
+                "output": body["output"],
+            },
+        })
+
+
+def _start_span(name: str, args, kwargs) -> dict:
+    parent = _current_span.get()
+    return {
+        "id": str(uuid.uuid4()),
+        "trace_id": parent["trace_id"] if parent else str(uuid.uuid4()),
+        "parent_id": parent["id"] if parent else None,
+        "name": name,
+        "start": time.time(),
+        "input": _serialize({"args": list(args), "kwargs": kwargs} if kwargs else list(args)),
+    }
+
+
+def observe(name: str = None, as_type: str = "span"):
+    """
+    Trace a function as a Langfuse observation (span, tool, workflow or generation).
+
+    Nested calls become child observations of the enclosing traced call. Spans are
+    queued for the background exporter, so tracing never waits on the network.
+    Returns the function unchanged when telemetry is disabled.
+    """
+    def _decorator(func):
+        if not TELEMETRY_ENABLED:
+            return func
+        span_name = name or func.__name__
 
-# Initialize Langfuse client (v3 recommended pattern)
-langfuse = Langfuse(
-    public_key=public,
-    secret_key=secret,
-    host=LANGFUSE_HOST
-)
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def _generator_wrapper(*args, **kwargs):
+                span = _start_span(span_name, args, kwargs)
+                generator = func(*args, **kwargs)
+                items = 0
+                try:
+                    while True:
+                        # The span is current only while the generator body runs, never across
+                        # a yield, so the consumer (possibly in another context) doesn't inherit it
+                        token = _current_span.set(span)
+                        try:
+                            item = next(generator)
+                        except StopIteration:
+                            break
+                        finally:
+                            _current_span.reset(token)
+                        items += 1
+                        yield item
+                except BaseException as e:
+                    _emit_observation(span, as_type, {"items": items}, error=None if isinstance(e, GeneratorExit) else e)
+                    raise
+                else:
+                    _emit_observation(span, as_type, {"items": items})
+                finally:
+                    token = _current_span.set(span)
+                    try:
+                        generator.close()  # Runs the body's cleanup under its own span
+                    finally:
+                        _current_span.reset(token)
+            return _generator_wrapper
 
+        @functools.wraps(func)
+        def _wrapper(*args, **kwargs):
+            span = _start_span(span_name, args, kwargs)
+            token = _current_span.set(span)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                _emit_observation(span, as_type, None, error=e)
+                raise
+            finally:
+                _current_span.reset(token)
+            _emit_observation(span, as_type, result)
+            return result
+        return _wrapper
+    return _decorator
 
 
 def trace_agent_call(name: str | None = None, as_type: str = "tool"):
     """
-    Decorator that instruments a function using Langfuse SDK v3.
+    Decorator that instruments a function with the Whiski telemetry exporter.
 
     Args:
         name: Optional explicit trace/span name. If None, uses "whiski_{func.__name__}".
         as_type: One of {"tool", "generation", "workflow"}. Defaults to "tool".
     """
     def _decorator(func):
-        trace_name = name or (lambda *a, **k: f"whiski_{func.__name__}")
-        observed_func = observe(name=trace_name, as_type=as_type)(func)
-        return observed_func
+        return observe(name=name or f"whiski_{func.__name__}", as_type=as_type)(func)
     return _decorator
 
+
+# ── Background exporter
+
+def _rejected_count(response, batch: list) -> int:
+    """Events a 207 (partial success) response dropped, from its "errors" array."""
+    try:
+        errors = response.json().get("errors") or []
+    except (ValueError, AttributeError):
+        return len(batch)  # Can't tell which went through, so count none as exported
+    return min(len(errors), len(batch))
+
+
+def _post_batch(batch: list):
+    started = time.perf_counter()
+    ok = False
+    rejected = 0
+    try:
+        auth = base64.b64encode(f"{public}:{secret}".encode()).decode()
+        response = http_client.post(
+            "telemetry",
+            INGESTION_URL,
+            json={"batch": batch},
+            headers={"Authorization": f"Basic {auth}"},
+        )
+        ok = response.status_code < 400
+        if response.status_code == 207:
+            rejected = _rejected_count(response, batch)
+    except requests.RequestException:
+        ok = False
+    with _stats_lock:
+        _export_latencies.append((time.perf_counter() - started) * 1000)
+        _stats["batches"] += 1
+        if ok:
+            _stats["exported"] += len(batch) - rejected
+            _stats["rejected"] += rejected
+        else:
+            _stats["failed"] += len(batch)
+
+
+def _drain(max_items: int) -> list:
+    batch = []
+    while len(batch) < max_items:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _export_loop():
+    while not _stop.is_set():
+        try:
+            first = _queue.get(timeout=TELEMETRY_FLUSH_INTERVAL)
+        except queue.Empty:
+            continue
+        # Give the batch a moment to fill so bursts go out as one request
+        _stop.wait(min(0.25, TELEMETRY_FLUSH_INTERVAL))
+        _post_batch([first] + _drain(TELEMETRY_BATCH_SIZE - 1))
+
+
+def _ensure_exporter():
+    global _exporter
+    if _exporter is not None:
+        return
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name="whiski-telemetry", daemon=True)
+            _exporter.start()
+
+
+def shutdown():
+    """Stop the exporter and flush what's queued, bounded by TELEMETRY_SHUTDOWN_TIMEOUT."""
+    if not TELEMETRY_ENABLED:
+        return
+    _stop.set()
+    deadline = time.time() + TELEMETRY_SHUTDOWN_TIMEOUT
+    while time.time() < deadline:
+        batch = _drain(TELEMETRY_BATCH_SIZE)
+        if not batch:
+            break
+        _post_batch(batch)
+
+
+atexit.register(shutdown)
+
+
+def get_telemetry_stats() -> dict:
+    """Exporter overhead: queue depth, drops, export counts (incl. events the API rejected) and latency."""
+    with _stats_lock:
+        stats = dict(_stats)
+        latencies = sorted(_export_latencies)
+    stats.update({
+        "enabled": TELEMETRY_ENABLED,
+        "queue_depth": _queue.qsize(),
+        "queue_capacity": TELEMETRY_QUEUE_SIZE,
+        "export_p50_ms": round(latencies[int(0.50 * (len(latencies) - 1))], 1) if latencies else 0.0,
+        "export_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 1) if latencies else 0.0,
+    })
+    return stats
+
 # Example usage:
 # @trace_agent_call(as_type="tool")
 # def fetch_cafes(location: str):
-#     ...
\ No newline at end of file
+#     ...
@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Keep tests out of the developer's cache file
+os.environ.setdefault("WHISKI_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="whiski-tests-"), "cache.sqlite3"))
+os.environ.setdefault("LANGFUSE_PUBLIC_KEY", "")
+os.environ.setdefault("LANGFUSE_SECRET_KEY", "")
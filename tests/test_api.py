@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("fastapi")
+from fastapi import HTTPException
+
+import api
+
+
+def test_timed_out_call_keeps_its_slot_until_the_worker_finishes(monkeypatch):
+    monkeypatch.setitem(api.API_TIMEOUTS, "cafes", 0.1)
+    monkeypatch.setattr(api, "API_QUEUE_TIMEOUT", 0.1)
+    release = threading.Event()
+
+    async def scenario():
+        monkeypatch.setattr(api, "_semaphore", asyncio.Semaphore(1))
+
+        with pytest.raises(HTTPException) as timed_out:
+            await api._run_blocking("cafes", release.wait, 5)
+        assert timed_out.value.status_code == 504
+
+        # The slow worker is still running, so the only slot is still taken
+        with pytest.raises(HTTPException) as busy:
+            await api._run_blocking("cafes", lambda: "ok")
+        assert busy.value.status_code == 503
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert await api._run_blocking("cafes", lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
+
+
+def test_chat_slot_is_freed_when_the_stream_is_never_iterated(monkeypatch):
+    import chat_service
+
+    def stream_chat(prompt):
+        yield ("final", "Hojicha is roasted green tea.")
+
+    monkeypatch.setattr(chat_service, "stream_chat", stream_chat)
+    monkeypatch.setattr(api, "API_QUEUE_TIMEOUT", 0.1)
+
+    async def scenario():
+        monkeypatch.setattr(api, "_semaphore", asyncio.Semaphore(1))
+        await api._chat_events("what is hojicha")  # Client disconnects before the first chunk
+        await asyncio.sleep(0.1)
+        assert await api._run_blocking("cafes", lambda: "ok") == "ok"
+
+    asyncio.run(scenario())
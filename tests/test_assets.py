@@ -0,0 +1,45 @@
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("streamlit")
+import tornado.testing
+import tornado.web
+from streamlit.web.server.app_static_file_handler import AppStaticFileHandler
+
+import assets
+
+
+@pytest.fixture(autouse=True)
+def static_dir(monkeypatch, tmp_path):
+    """Build variants into a temporary static/ so tests never write into the real one."""
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path))
+    monkeypatch.setattr(assets, "_variants", {})
+    return tmp_path
+
+
+def test_variants_use_only_statically_servable_formats():
+    assert set(assets.FORMATS) <= set(assets.STATIC_IMAGE_FORMATS)
+
+
+class StaticContentTypeTest(tornado.testing.AsyncHTTPTestCase):
+    """Variants must come back from Streamlit's static server with an image Content-Type."""
+
+    @pytest.fixture(autouse=True)
+    def _use_static_dir(self, static_dir):
+        self.static_dir = static_dir
+
+    def get_app(self):
+        return tornado.web.Application([
+            (r"/app/static/(.*)", AppStaticFileHandler, {"path": assets.STATIC_DIR}),
+        ])
+
+    def test_served_content_type(self):
+        variants = assets.get_variants("bot.png")
+        assert variants
+        assert {path.name for path in self.static_dir.iterdir()} == {variant.filename for variant in variants}
+        for variant in variants:
+            assert assets.static_file_exists(variant)
+            response = self.fetch(f"/{variant.url}")
+            assert response.code == 200
+            assert response.headers["Content-Type"] == variant.mime_type
+            assert response.headers["X-Content-Type-Options"] == "nosniff"
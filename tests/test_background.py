@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+_SCRIPT = """
+import threading
+import streamlit as st
+from ui.background import start_job, get_job_result
+
+def fail():
+    raise ValueError("Places is down")
+
+start_job('failing', ('x',), fail)
+start_job('slow', ('x',), threading.Event().wait, 5)
+for name in ('failing', 'slow'):
+    try:
+        get_job_result(name, ('x',), timeout=0.2)
+    except Exception as e:
+        st.error(f"{type(e).__name__}: {e}")
+st.write(repr(get_job_result('missing', ('x',))))
+"""
+
+
+def test_job_errors_and_timeouts_reach_the_scene():
+    app = AppTest.from_string(_SCRIPT)
+    app.run(timeout=10)
+    assert not app.exception
+    assert [error.value for error in app.error] == [
+        "ValueError: Places is down",
+        "TimeoutError: slow is taking longer than 0.2s, please try again",
+    ]
+    assert app.markdown[-1].value == "None"
+
+
+_CAFES_SCRIPT = """
+import streamlit as st
+import ui.scenes.cafe_details as scene
+from ui.background import get_job, start_job
+
+searches = []
+
+def get_cafe_page(location, radius=3500, page_token=None):
+    searches.append(location)
+    return [{"place_id": "p1", "name": "Leaf"}], None
+
+scene.get_cafe_page = get_cafe_page
+scene.order_cafes = lambda cafes, location, mood: cafes
+
+def fail():
+    raise ValueError("Places is down")
+
+start_job('cafes', ('Kyoto', 'chill'), fail)
+st.text(f"{scene.load_first_page('Kyoto', 'chill')} {len(searches)} {get_job('cafes', ('Kyoto', 'chill')) is None}")
+"""
+
+
+def test_failed_prefetch_is_dropped_and_searched_again():
+    app = AppTest.from_string(_CAFES_SCRIPT)
+    app.run(timeout=10)
+    assert not app.exception
+    assert not app.error
+    assert app.text[-1].value == "True 1 True"
@@ -0,0 +1,73 @@
+import threading
+import time
+
+import cache_warmer
+import http_client
+import recommendation
+from geocoding import LOCATION_PRESETS
+from recommendation_cache import invalidate_recommendations
+from response_parser import ParseResult
+
+
+def _no_weather(monkeypatch):
+    monkeypatch.setattr(cache_warmer, "_current_buckets", lambda: {location: None for location in LOCATION_PRESETS})
+
+
+def test_budget_is_charged_per_upstream_call(monkeypatch):
+    _no_weather(monkeypatch)
+    started = []
+
+    def warm_entry(task, weather):
+        started.append(task)
+        for _ in range(4):  # e.g. an agent run of several LLM steps
+            http_client.record_call()
+        return True
+
+    monkeypatch.setattr(cache_warmer, "_warm_entry", warm_entry)
+    result = cache_warmer.warm(concurrency=1, budget=10)
+
+    assert len(started) == 3
+    assert result["calls"] == 12
+    assert result["deferred"] == result["planned"] - 3
+
+
+def test_recommendation_that_stores_nothing_is_a_failure(monkeypatch):
+    invalidate_recommendations()
+    weather = {location: None for location in LOCATION_PRESETS}
+    # A snippet fallback: served to the caller but never cached
+    monkeypatch.setattr(
+        recommendation, "generate_recommendation",
+        lambda *args, **kwargs: ParseResult(drink="Matcha", vibe="?", method="snippet", confidence=0.3),
+    )
+    ok, calls = cache_warmer._run_task(("recommendation", "chill", LOCATION_PRESETS[0]), weather)
+    assert not ok and calls == 0
+
+    monkeypatch.setattr(
+        recommendation, "generate_recommendation",
+        lambda *args, **kwargs: ParseResult(drink="Usucha", vibe="Quiet", method="json", confidence=1.0),
+    )
+    assert cache_warmer._run_task(("recommendation", "chill", LOCATION_PRESETS[0]), weather) == (True, 0)
+    # The same variant again adds nothing
+    assert cache_warmer._run_task(("recommendation", "chill", LOCATION_PRESETS[0]), weather)[0] is False
+
+
+def test_recommendation_tasks_leave_agents_for_live_requests(monkeypatch):
+    _no_weather(monkeypatch)
+    monkeypatch.setattr(cache_warmer, "_agent_slots", threading.BoundedSemaphore(2))
+    lock = threading.Lock()
+    running = [0, 0]  # now, peak
+
+    def generate(*args, **kwargs):
+        with lock:
+            running[0] += 1
+            running[1] = max(running[1], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return ParseResult(drink="Matcha", vibe="?", method="snippet", confidence=0.3)
+
+    monkeypatch.setattr(recommendation, "generate_recommendation", generate)
+    monkeypatch.setattr(cache_warmer, "_plan", lambda report, weather: [("recommendation", "chill", LOCATION_PRESETS[0])] * 8)
+    cache_warmer.warm(concurrency=6, budget=100)
+
+    assert running[1] == 2
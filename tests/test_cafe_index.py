@@ -0,0 +1,36 @@
+from cafe_index import CafeIndex
+from disk_cache import DiskCache
+
+
+def _index(name, ttl_seconds=3600, max_cells=100):
+    store = DiskCache(f"test_{name}", ttl_seconds=ttl_seconds)
+    cells_store = DiskCache(f"test_{name}_cells", ttl_seconds=ttl_seconds)
+    store.invalidate()
+    cells_store.invalidate()
+    return CafeIndex(store=store, cells_store=cells_store, max_cells=max_cells)
+
+
+def _cafe(i, lat, lng):
+    return {"place_id": f"cafe-{i}", "name": f"Café {i}", "lat": lat, "lng": lng}
+
+
+def test_least_recently_used_cells_are_evicted():
+    index = _index("lru", max_cells=2)
+    index.upsert([_cafe(1, 40.001, -73.001), _cafe(2, 40.021, -73.001)])
+    assert index.nearby(40.001, -73.001, 300)  # cell 1 is now the most recently used
+    index.upsert([_cafe(3, 40.041, -73.001)])
+
+    assert index.nearby(40.021, -73.001, 300) == []
+    assert [c["place_id"] for c in index.nearby(40.001, -73.001, 300)] == ["cafe-1"]
+    stats = index.stats()
+    assert stats["cafe_cells"] == 2 and stats["cafes"] == 2 and stats["evicted_cells"] == 1
+
+
+def test_entries_expire_with_the_disk_ttl():
+    index = _index("ttl", ttl_seconds=0)
+    index.upsert([_cafe(1, 40.001, -73.001)])
+    index.mark_covered(40.001, -73.001, 1000)
+
+    assert index.coverage(40.001, -73.001) == "missing"
+    assert index.nearby(40.001, -73.001, 300) == []
+    assert index.stats()["cafes"] == 0
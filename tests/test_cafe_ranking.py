@@ -0,0 +1,64 @@
+import random
+
+import cafe_ranking
+from cafe_ranking import FEATURES, MOOD_WEIGHTS, describe_cafe, rank_cafes
+from mood_drink_map import MOODS
+
+
+def _cafe(place_id, **fields):
+    return {"place_id": place_id, "name": f"Cafe {place_id}", "rating": 4.5, "distance_m": 500, **fields}
+
+
+def test_every_mood_weights_every_feature():
+    assert set(MOOD_WEIGHTS) == set(MOODS.values())
+    for weights in MOOD_WEIGHTS.values():
+        assert set(weights) == set(FEATURES)
+
+
+def test_ties_break_on_distance_then_place_id_whatever_the_input_order():
+    cafes = [_cafe("b"), _cafe("a"), _cafe("c", distance_m=100), _cafe("d", rating=3.0)]
+    expected = ["c", "a", "b", "d"]
+    for seed in range(5):
+        shuffled = cafes[:]
+        random.Random(seed).shuffle(shuffled)
+        assert [cafe["place_id"] for cafe in rank_cafes(shuffled, "chill", "Brooklyn")] == expected
+
+
+def test_mood_weights_decide_between_quiet_and_lively():
+    quiet = _cafe("quiet", name="Moss Tea Room", user_ratings_total=5)
+    lively = _cafe("lively", name="Matcha Bar", types=["bar"], user_ratings_total=2000)
+    assert rank_cafes([lively, quiet], "anxious")[0]["place_id"] == "quiet"
+    assert rank_cafes([quiet, lively], "energized")[0]["place_id"] == "lively"
+    assert rank_cafes([quiet, lively], "anxious")[0]["atmosphere"] == "quiet"
+
+
+def test_closed_cafes_are_dropped_or_sunk():
+    cafes = [
+        _cafe("gone", rating=5.0, business_status="CLOSED_PERMANENTLY"),
+        _cafe("paused", rating=5.0, distance_m=10, business_status="CLOSED_TEMPORARILY"),
+        _cafe("open", rating=3.5, distance_m=2000),
+    ]
+    assert [cafe["place_id"] for cafe in rank_cafes(cafes, "cozy")] == ["open", "paused"]
+
+
+def test_unknown_mood_and_missing_fields_still_rank():
+    ranked = rank_cafes([{"name": "No data"}, _cafe("known")], "sleepy")
+    assert [cafe.get("place_id") for cafe in ranked] == ["known", None]
+
+
+def test_repeat_ranking_is_served_from_the_memo():
+    cafes = [_cafe("memo-a"), _cafe("memo-b", distance_m=900)]
+    first = rank_cafes(cafes, "creative", "Memo Town")
+    hits = cafe_ranking.get_ranking_stats()["hits"]
+    assert rank_cafes(cafes, "Creative", "memo town") == first
+    assert cafe_ranking.get_ranking_stats()["hits"] == hits + 1
+
+
+def test_describe_cafe_card_text():
+    card = describe_cafe({"name": "Kissa Tea House", "price_level": 3, "atmosphere": "quiet"})
+    assert card == {
+        "speciality": cafe_ranking.SPECIALITIES["ceremonial"],
+        "atmosphere": cafe_ranking.ATMOSPHERES["quiet"],
+        "price_range": "$$$",
+    }
+    assert describe_cafe({"name": "Plain"})["price_range"] == "$$"
@@ -0,0 +1,55 @@
+import time
+
+import cafe_search
+import http_client
+
+
+def _places(count):
+    return {
+        "status": "OK",
+        "results": [
+            {"name": f"Cafe {i}", "place_id": f"p{i}", "geometry": {"location": {"lat": 40.0, "lng": -73.0 - i / 100}}}
+            for i in range(count)
+        ],
+    }
+
+
+def _slowest_first_details(count):
+    """Details that finish in reverse order, metered like a real Places call."""
+    def details(place_id):
+        http_client.record_call()
+        index = int(place_id[1:])
+        time.sleep(0.03 * (count - index))
+        if index == 2:
+            return {}  # A failed lookup
+        return {"formatted_phone_number": f"phone-{place_id}", "business_status": "OPERATIONAL"}
+    return details
+
+
+def test_details_fan_out_keeps_result_order(monkeypatch):
+    monkeypatch.setattr(cafe_search, "GOOGLE_PLACES_API_KEY", "test-key")
+    monkeypatch.setattr(cafe_search, "_text_search", lambda location, radius, page_token=None: _places(6))
+    monkeypatch.setattr(cafe_search, "_get_place_details", _slowest_first_details(6))
+    monkeypatch.setattr(cafe_search, "_index_search_results", lambda *args: None)
+
+    with http_client.upstream_calls() as calls:
+        cafes = cafe_search._fetch_matcha_cafes("Brooklyn")
+
+    assert [cafe["place_id"] for cafe in cafes] == [f"p{i}" for i in range(6)]
+    assert cafes[0]["phone"] == "phone-p0" and cafes[5]["phone"] == "phone-p5"
+    assert cafes[2]["phone"] is None  # Kept, just without details
+    assert not any(cafe.get("details_pending") for cafe in cafes)
+    assert calls[0] == 6  # Lookups on the pool count toward the caller's meter
+
+
+def test_iter_cafe_details_yields_as_lookups_complete(monkeypatch):
+    monkeypatch.setattr(cafe_search, "GOOGLE_PLACES_API_KEY", "test-key")
+    monkeypatch.setattr(cafe_search, "_get_place_details", _slowest_first_details(4))
+    cafes = [cafe_search._cafe_from_place(place) for place in _places(4)["results"]]
+    cafes.append({**cafes[0], "place_id": None, "name": "No id"})
+    cafes[1] = {**cafes[1], "details_pending": False}
+
+    indexes = [index for index, _ in cafe_search.iter_cafe_details(cafes)]
+
+    # The café without an id is settled first, then lookups in completion order; done cafés are skipped
+    assert indexes == [4, 3, 2, 0]
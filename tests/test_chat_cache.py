@@ -0,0 +1,38 @@
+import pytest
+
+import chat_cache
+from chat_service import uses_chat_cache
+from conversation_memory import ConversationMemory
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    chat_cache.invalidate_chat_cache()
+    yield
+    chat_cache.invalidate_chat_cache()
+
+
+def test_near_duplicate_questions_hit():
+    chat_cache.store("What is hojicha?", "Hojicha is roasted green tea.")
+    assert chat_cache.lookup("whats hojicha") == "Hojicha is roasted green tea."
+    assert chat_cache.lookup("tell me what hojicha is") == "Hojicha is roasted green tea."
+
+
+def test_context_dependent_prompts_bypass_the_cache():
+    assert not chat_cache.is_cacheable("what about my drink?")
+    assert not chat_cache.is_cacheable("is it strong?")
+
+
+def test_cache_only_opens_a_conversation():
+    memory = ConversationMemory()
+    assert uses_chat_cache("What is hojicha?", memory)
+    memory.add_turn("What is hojicha?", "Hojicha is roasted green tea.")
+    # A follow-up may build on the earlier turn ("what about iced?"), so no lookup or store
+    assert not uses_chat_cache("What is ceremonial matcha?", memory)
+    assert uses_chat_cache("What is ceremonial matcha?")
+
+
+def test_reordered_comparison_is_not_a_hit():
+    chat_cache.store("is hojicha stronger than matcha", "No, hojicha has less caffeine.")
+    assert chat_cache.lookup("is matcha stronger than hojicha") is None
+    assert chat_cache.lookup("Is hojicha stronger than matcha?") == "No, hojicha has less caffeine."
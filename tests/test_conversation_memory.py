@@ -0,0 +1,63 @@
+from conversation_memory import (
+    FOLDED_MAX_CHARS, SUMMARY_SHARE, ConversationMemory, format_session_context,
+)
+
+
+def _chat(memory, turns, words=40):
+    for i in range(turns):
+        memory.add_turn(f"question {i} " + "tea " * words, f"answer {i} " + "matcha " * words)
+
+
+def test_history_stays_under_budget_however_long_the_chat():
+    memory = ConversationMemory(budget=400, recent_turns=4)
+    _chat(memory, 50)
+
+    stats = memory.stats()
+    assert stats["turns"] == 50
+    assert stats["recent_tokens"] <= 400 * (1 - SUMMARY_SHARE)
+    assert stats["summary_tokens"] <= 400 * SUMMARY_SHARE
+    assert stats["folded"] == 50 - stats["recent"]
+    assert stats["dropped"] > 0
+
+
+def test_oldest_turns_fold_into_clipped_summary_lines():
+    memory = ConversationMemory(budget=10_000, recent_turns=2)
+    _chat(memory, 3, words=100)
+
+    prompt = memory.build_prompt("what next?")
+    earlier, recent = prompt.split("Recent messages:")
+    assert "question 0" in earlier and "question 0" not in recent
+    assert "question 1" in recent and "question 2" in recent
+    summary_line = next(line for line in earlier.splitlines() if line.startswith("- User: question 0"))
+    user_part = summary_line.split(" / Whiski: ")[0][len("- User: "):]
+    assert len(user_part) <= FOLDED_MAX_CHARS + 1  # + the ellipsis
+    assert prompt.endswith("New message: what next?")
+
+
+def test_a_single_oversized_turn_is_kept_verbatim():
+    memory = ConversationMemory(budget=50, recent_turns=4)
+    _chat(memory, 1, words=200)
+    assert memory.stats()["recent"] == 1 and memory.stats()["folded"] == 0
+
+
+def test_prompt_is_unchanged_without_context_or_history():
+    memory = ConversationMemory()
+    assert memory.build_prompt("hi") == "hi"
+    assert not memory.has_turns
+
+    prompt = memory.build_prompt("hi", {"mood": "chill", "location": "", "drink": "Usucha"})
+    assert "Session: mood: chill; recommended drink: Usucha" in prompt
+
+
+def test_clear_forgets_everything():
+    memory = ConversationMemory(budget=200, recent_turns=2)
+    _chat(memory, 10)
+    memory.clear()
+    assert not memory.has_turns
+    assert memory.stats()["turns"] == memory.stats()["dropped"] == 0
+
+
+def test_session_context_skips_empty_values_and_clips_long_ones():
+    line = format_session_context({"mood": "cozy", "weather": None, "vibe": "word " * 100})
+    assert line.startswith("mood: cozy; café vibe: ")
+    assert line.endswith("…") and "weather" not in line
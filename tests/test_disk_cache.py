@@ -0,0 +1,18 @@
+import os
+
+from disk_cache import DiskCache
+
+
+def test_database_is_opened_on_first_use(tmp_path, monkeypatch):
+    monkeypatch.setenv("WHISKI_CACHE_PATH", str(tmp_path / "before.sqlite3"))
+    cache = DiskCache("lazy", ttl_seconds=60)
+    assert not os.path.exists(tmp_path / "before.sqlite3")
+
+    # Set after the cache was created (as at import time), still honoured
+    monkeypatch.setenv("WHISKI_CACHE_PATH", str(tmp_path / "after.sqlite3"))
+    cache.set("key", {"value": 1})
+
+    assert cache.get("key") == {"value": 1}
+    assert cache.path == str(tmp_path / "after.sqlite3")
+    assert os.path.exists(tmp_path / "after.sqlite3")
+    assert not os.path.exists(tmp_path / "before.sqlite3")
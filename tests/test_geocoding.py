@@ -0,0 +1,55 @@
+import geocoding
+from geocoding import geocode_location
+
+PARIS_CANDIDATES = [
+    {"name": "Paris", "latitude": 48.85, "longitude": 2.35, "admin1": "Île-de-France", "country": "France", "country_code": "FR"},
+    {"name": "Paris", "latitude": 33.66, "longitude": -95.56, "admin1": "Texas", "admin2": "Lamar", "country": "United States", "country_code": "US"},
+]
+
+
+class _Response:
+    def __init__(self, results):
+        self._results = results
+
+    def json(self):
+        return {"results": self._results}
+
+
+def _serve(monkeypatch, results):
+    requests = []
+
+    def get(endpoint, url, params=None, **kwargs):
+        requests.append(params)
+        return _Response(results)
+
+    monkeypatch.setattr(geocoding.http_client, "get", get)
+    return requests
+
+
+def test_state_and_country_pick_among_candidates(monkeypatch):
+    geocoding._geocode_cache.invalidate()
+    requests = _serve(monkeypatch, PARIS_CANDIDATES)
+
+    assert geocode_location("Paris, TX").latitude == 33.66
+    assert geocode_location("Paris, France").latitude == 48.85
+    assert requests[0]["name"] == "Paris" and requests[0]["count"] == geocoding.GEOCODE_CANDIDATES
+
+
+def test_unresolved_location_is_none_and_cached_briefly(monkeypatch):
+    geocoding._miss_cache.invalidate()
+    requests = _serve(monkeypatch, [])
+
+    assert geocode_location("Nowhereville, ZZ") is None
+    assert geocode_location("nowhereville,zz") is None
+    assert len(requests) == 1
+    assert geocoding._miss_cache.ttl_seconds == geocoding.GEOCODE_MISS_TTL
+
+
+def test_invalidate_drops_resolved_and_unresolved_geocodes(monkeypatch):
+    geocoding.invalidate_geocode_cache()
+    _serve(monkeypatch, PARIS_CANDIDATES[:1])
+    geocode_location("Paris")
+    _serve(monkeypatch, [])
+    geocode_location("Atlantis")
+
+    assert geocoding.invalidate_geocode_cache() == 2
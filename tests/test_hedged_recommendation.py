@@ -0,0 +1,124 @@
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import recommendation
+from agent_pool import AgentPool
+
+STRUCTURED = "**The Drink:** Iced matcha usucha **The Vibe:** A quiet corner seat"
+CONVERSATIONAL = "Glad I could help! Would you like another mood?"
+
+
+class FakeAgent:
+    """Replies per leg after a scripted delay; stops early when interrupted, like a CodeAgent step."""
+
+    def __init__(self, script):
+        self.script = script
+        self.interrupted = threading.Event()
+        self.finished = threading.Event()
+
+    def run(self, prompt):
+        self.interrupted.clear()
+        self.finished.clear()
+        delay, reply = self.script["direct" if "Format:" in prompt else "template"]
+        try:
+            if self.interrupted.wait(delay):
+                return "interrupted"
+            return reply
+        finally:
+            self.finished.set()
+
+    def interrupt(self):
+        self.interrupted.set()
+
+    @property
+    def monitor(self):
+        return types.SimpleNamespace(get_total_token_counts=lambda: {"input": 10, "output": 5})
+
+
+def _use_pool(monkeypatch, script, size=2):
+    agents = []
+
+    def factory():
+        agents.append(FakeAgent(script))
+        return agents[-1]
+
+    pool = AgentPool(factory, size=size, wait_timeout=2)
+    monkeypatch.setitem(sys.modules, "whiski_agent", types.SimpleNamespace(agent_pool=pool))
+    return pool, agents
+
+
+def _stats_delta(before):
+    after = recommendation.get_hedge_stats()
+    return {key: after[key] - before[key] for key in before if isinstance(before[key], (int, float))}
+
+
+def test_fast_structured_leg_wins_and_the_loser_is_interrupted(monkeypatch):
+    _, agents = _use_pool(monkeypatch, {"template": (0.01, STRUCTURED), "direct": (5, STRUCTURED)})
+    before = recommendation.get_hedge_stats()
+
+    started = time.perf_counter()
+    result = recommendation.get_hedged_agent_recommendation("chill", "Brooklyn", "12°C, clear")
+
+    assert result.drink == "Iced matcha usucha"
+    assert time.perf_counter() - started < 2
+    loser = next(agent for agent in agents if agent.interrupted.is_set())
+    assert loser.finished.wait(2)
+    # The loser's cost is recorded by a done callback once its leg returns
+    deadline = time.perf_counter() + 2
+    while _stats_delta(before)["loser_tokens"] == 0 and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    delta = _stats_delta(before)
+    assert delta["races"] == 1
+    assert delta["wins_template"] == 1
+    assert delta["losers_interrupted"] == 1
+    assert delta["loser_tokens"] == 15
+    assert delta["loser_agent_seconds"] < 2
+
+
+def test_conversational_reply_loses_to_the_direct_leg(monkeypatch):
+    _use_pool(monkeypatch, {"template": (0.01, CONVERSATIONAL), "direct": (0.1, STRUCTURED)})
+    before = recommendation.get_hedge_stats()
+
+    result = recommendation.get_hedged_agent_recommendation("chill", "Brooklyn", "12°C, clear")
+
+    assert result.structured
+    delta = _stats_delta(before)
+    assert delta["wins_direct"] == 1
+    assert delta["losers_interrupted"] == 0  # The template leg had already finished
+
+
+def test_direct_leg_is_skipped_when_no_agent_is_free(monkeypatch):
+    monkeypatch.setattr(recommendation, "HEDGE_CHECKOUT_TIMEOUT", 0.05)
+    pool, _ = _use_pool(monkeypatch, {"template": (0.01, STRUCTURED), "direct": (0.01, STRUCTURED)}, size=1)
+    before = recommendation.get_hedge_stats()
+
+    # A live request holds the only agent until after the direct leg has given up waiting
+    held = threading.Event()
+
+    def live_request():
+        with pool.checkout():
+            held.set()
+            time.sleep(0.3)
+
+    threading.Thread(target=live_request).start()
+    assert held.wait(1)
+    result = recommendation.get_hedged_agent_recommendation("chill", "Brooklyn", "12°C, clear")
+
+    assert result.structured
+    delta = _stats_delta(before)
+    assert delta["hedge_skipped"] == 1
+    assert delta["wins_template"] == 1
+
+
+def test_no_parseable_reply_raises(monkeypatch):
+    _use_pool(monkeypatch, {"template": (0.01, CONVERSATIONAL), "direct": (0.01, CONVERSATIONAL)})
+    before = recommendation.get_hedge_stats()
+
+    with pytest.raises(recommendation.RecommendationParseError):
+        recommendation.get_hedged_agent_recommendation("chill", "Brooklyn", "12°C, clear")
+
+    assert _stats_delta(before)["no_structured_winner"] == 1
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket
+
+
+class FakeSession:
+    """Plays back scripted outcomes: a status code or an exception to raise."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        return response
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Fresh places breaker (threshold 3), no backoff sleeps; returns a session installer."""
+    monkeypatch.setitem(http_client._breakers, "places", CircuitBreaker(3, 60))
+    monkeypatch.setattr(http_client, "RETRY_BASE_DELAY", 0.0)
+
+    def install(*outcomes):
+        session = FakeSession(*outcomes)
+        monkeypatch.setattr(http_client, "_session", session)
+        return session
+
+    return install
+
+
+def test_token_bucket_serves_the_burst_then_paces():
+    bucket = TokenBucket(rate=20, capacity=2)
+    assert bucket.acquire(max_wait=1) == 0.0
+    assert bucket.acquire(max_wait=1) == 0.0
+    with pytest.raises(RateLimitedError):
+        bucket.acquire(max_wait=0.01)
+    started = time.monotonic()
+    waited = bucket.acquire(max_wait=1)
+    assert 0 < waited <= 0.05
+    assert time.monotonic() - started >= waited * 0.9
+
+
+def test_breaker_opens_then_lets_one_trial_through():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.allow() and not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+    assert breaker.opened_count == 1
+
+    time.sleep(0.06)
+    assert breaker.current_state() == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one trial at a time
+
+    breaker.record_failure()  # Failed trial re-opens immediately
+    assert breaker.is_open and breaker.opened_count == 2
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.current_state() == "closed" and breaker.allow()
+
+
+def test_backoff_is_full_jitter_under_the_cap(monkeypatch):
+    monkeypatch.setattr(http_client, "RETRY_BASE_DELAY", 0.2)
+    monkeypatch.setattr(http_client, "RETRY_MAX_DELAY", 1.0)
+    for attempt, ceiling in ((0, 0.2), (1, 0.4), (2, 0.8), (5, 1.0)):
+        delays = [http_client._backoff(attempt) for _ in range(200)]
+        assert all(0 <= d <= ceiling for d in delays)
+        assert max(delays) > ceiling / 2
+
+
+def test_retryable_status_is_retried_and_metered(upstream):
+    session = upstream(503, 429, 200)
+    before = http_client.get_http_stats()["endpoints"]["places_text"]
+
+    with http_client.upstream_calls() as calls:
+        response = http_client.get("places_text", "https://places.test/search")
+
+    assert response.status_code == 200
+    assert session.calls == 3 and calls[0] == 3
+    after = http_client.get_http_stats()["endpoints"]["places_text"]
+    assert after["retries"] - before["retries"] == 2
+    assert after["failures"] - before["failures"] == 2
+
+
+def test_client_error_is_returned_without_retrying(upstream):
+    session = upstream(404)
+    assert http_client.get("places_text", "https://places.test/search").status_code == 404
+    assert session.calls == 1
+
+
+def test_last_error_is_raised_once_retries_are_spent(upstream):
+    session = upstream(requests.Timeout("slow"), requests.ConnectionError("reset"))
+    with pytest.raises(requests.ConnectionError):
+        http_client.get("places_details", "https://places.test/details")  # retries=1
+    assert session.calls == 2
+
+
+def test_open_breaker_fails_fast_without_sending(upstream):
+    session = upstream(503, 503, 503, 200)
+    with pytest.raises(requests.HTTPError):
+        http_client.get("places_text", "https://places.test/search")
+    assert session.calls == 3
+    assert not http_client.is_available("places_details")  # Same upstream, same breaker
+
+    with pytest.raises(CircuitOpenError):
+        http_client.get("places_details", "https://places.test/details")
+    assert session.calls == 3
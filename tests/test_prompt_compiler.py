@@ -0,0 +1,37 @@
+import pytest
+
+import prompt_compiler
+from prompt_compiler import PromptBudgetExceeded, compile_messages, estimate_tokens
+
+
+def _messages(step_text="Thought: search cafés\nCode: search_matcha_cafes('Kyoto')"):
+    return [
+        {"role": "system", "content": "You are Whiski."},
+        {"role": "user", "content": "New task:\nwhat is hojicha? " + "earlier " * 40},
+        {"role": "assistant", "content": "Hojicha is roasted green tea. " + "answer " * 40},
+        {"role": "user", "content": "New task:\nfind matcha cafés in Kyoto"},
+        {"role": "assistant", "content": step_text},
+        {"role": "user", "content": "Observation: 3 cafés found"},
+    ]
+
+
+def _budget(monkeypatch, tokens):
+    monkeypatch.setitem(prompt_compiler.PROMPT_BUDGETS, "test", tokens)
+
+
+def test_only_memory_before_the_task_is_trimmed(monkeypatch):
+    messages = _messages()
+    kept_tokens = sum(estimate_tokens(m["content"]) for m in messages[:1] + messages[3:])
+    _budget(monkeypatch, kept_tokens + 5)
+
+    compiled, breakdown = compile_messages(messages, "test")
+
+    assert compiled == messages[:1] + messages[3:]
+    assert breakdown.trimmed_messages == 2
+    assert breakdown.sections["steps"] == sum(estimate_tokens(m["content"]) for m in messages[4:])
+
+
+def test_request_over_budget_with_its_steps_is_rejected(monkeypatch):
+    _budget(monkeypatch, 60)
+    with pytest.raises(PromptBudgetExceeded):
+        compile_messages(_messages(step_text="Thought: " + "long step " * 100), "test")
@@ -0,0 +1,25 @@
+import pytest
+
+litellm = pytest.importorskip("litellm")
+
+import recommendation
+from response_parser import ParseResult
+
+
+def test_direct_mode_falls_back_to_the_agent_when_the_call_fails(monkeypatch):
+    def failing_completion(**kwargs):
+        raise litellm.exceptions.Timeout("timed out", model="test", llm_provider="test")
+
+    agent_calls = []
+
+    def agent_recommendation(mood, location, weather_context):
+        agent_calls.append(mood)
+        return ParseResult(drink="Iced matcha latte", vibe="Slow and sunny", method="json")
+
+    monkeypatch.setattr(litellm, "completion", failing_completion)
+    monkeypatch.setattr(recommendation, "get_agent_recommendation", agent_recommendation)
+
+    result = recommendation.get_recommendation("chill", "Brooklyn", "12°C, clear", mode="direct", refresh=True)
+
+    assert agent_calls == ["chill"]
+    assert result["drink"] == "Iced matcha latte"
@@ -0,0 +1,40 @@
+import recommendation_cache
+from recommendation_cache import get_cached_recommendation, invalidate_recommendations, store_recommendation
+
+
+def _variant(i):
+    return {"drink": f"Matcha {i}", "vibe": f"Vibe {i}"}
+
+
+def test_storing_variants_does_not_count_as_lookups():
+    invalidate_recommendations()
+    before = recommendation_cache._cache.stats()
+    for i in range(recommendation_cache.RECOMMENDATION_VARIANTS):
+        store_recommendation("chill", "Kyoto", "mild", _variant(i))
+    after = recommendation_cache._cache.stats()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+
+
+def test_expired_entry_starts_over_instead_of_being_extended(monkeypatch):
+    invalidate_recommendations()
+    for i in range(recommendation_cache.RECOMMENDATION_VARIANTS):
+        store_recommendation("cozy", "Oslo", "cold", _variant(i))
+    assert get_cached_recommendation("cozy", "Oslo", "cold") is not None
+
+    monkeypatch.setattr(recommendation_cache, "RECOMMENDATION_CACHE_TTL", -1)
+    monkeypatch.setattr(recommendation_cache._cache, "ttl_seconds", -1)
+    store_recommendation("cozy", "Oslo", "cold", _variant(99))
+    entry, _ = recommendation_cache._cache.peek(
+        recommendation_cache.make_cache_key("cozy", "Oslo", "cold"), include_expired=True
+    )
+    assert entry["variants"] == [_variant(99)]
+
+
+def test_rotation_cursors_are_bounded(monkeypatch):
+    invalidate_recommendations()
+    monkeypatch.setattr(recommendation_cache, "RECOMMENDATION_VARIANTS", 1)
+    monkeypatch.setattr(recommendation_cache, "RECOMMENDATION_CACHE_MAX_ENTRIES", 2)
+    for location in ("Lima", "Quito", "Bogota"):
+        store_recommendation("creative", location, "hot", _variant(0))
+        get_cached_recommendation("creative", location, "hot")
+    assert len(recommendation_cache._rotation) == 2
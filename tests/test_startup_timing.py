@@ -0,0 +1,72 @@
+import importlib
+import sys
+
+import pytest
+
+import startup_timing
+
+
+@pytest.fixture
+def timing(monkeypatch, tmp_path):
+    """Enabled profiler with empty records; the finder is removed again afterwards."""
+    monkeypatch.setattr(startup_timing, "STARTUP_TIMING_ENABLED", True)
+    monkeypatch.setattr(startup_timing, "_import_records", [])
+    monkeypatch.setattr(startup_timing, "_timings", {})
+    monkeypatch.setattr(startup_timing, "_reported", False)
+    monkeypatch.setattr(sys, "meta_path", list(sys.meta_path))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield tmp_path
+    for name in [name for name in sys.modules if name.startswith("timed_")]:
+        del sys.modules[name]
+
+
+def test_nested_imports_are_recorded_like_importtime(timing):
+    (timing / "timed_child.py").write_text("import time\ntime.sleep(0.02)\n")
+    (timing / "timed_parent.py").write_text("import timed_child\n")
+    startup_timing.enable()
+    startup_timing.enable()  # Reruns don't stack finders
+    assert sum(isinstance(f, startup_timing._TimingFinder) for f in sys.meta_path) == 1
+
+    module = importlib.import_module("timed_parent")
+
+    records = {name: (self_us, cumulative_us, depth) for name, self_us, cumulative_us, depth in startup_timing._import_records}
+    child, parent = records["timed_child"], records["timed_parent"]
+    assert [name for name, *_ in startup_timing._import_records][-2:] == ["timed_child", "timed_parent"]
+    assert child[2] == 1 and parent[2] == 0
+    assert child[1] >= 20_000
+    assert parent[1] >= child[1] and parent[0] < child[1]  # The child's time isn't the parent's own
+    assert not isinstance(module.__loader__, startup_timing._TimedLoader)
+    assert not isinstance(module.__spec__.loader, startup_timing._TimedLoader)
+
+
+def test_phases_keep_their_first_time(timing):
+    startup_timing.mark_phase("first_paint")
+    first = startup_timing._timings["first_paint"]
+    startup_timing.mark_phase("first_paint")
+    startup_timing.record_timing("scene_import:chat", 0.25)
+    startup_timing.record_timing("scene_import:chat", 1.0)
+
+    assert startup_timing._timings == {"first_paint": first, "scene_import:chat": 250.0}
+
+
+def test_disabled_profiler_records_nothing(monkeypatch, timing):
+    monkeypatch.setattr(startup_timing, "STARTUP_TIMING_ENABLED", False)
+    startup_timing.enable()
+    startup_timing.mark_phase("first_paint")
+    startup_timing.report_once()
+    assert not any(isinstance(f, startup_timing._TimingFinder) for f in sys.meta_path)
+    assert startup_timing._timings == {}
+
+
+def test_report_is_printed_and_saved_once(monkeypatch, timing, capsys):
+    report_path = timing / "startup.txt"
+    monkeypatch.setattr(startup_timing, "STARTUP_REPORT_PATH", str(report_path))
+    startup_timing.record_timing("first_paint", 0.5)
+
+    startup_timing.report_once()
+    startup_timing.report_once()
+
+    printed = capsys.readouterr().err
+    assert printed.count("[startup] phases (ms):") == 1
+    assert "first_paint" in printed
+    assert report_path.read_text() == printed
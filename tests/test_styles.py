@@ -0,0 +1,41 @@
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+
+def _render(script):
+    app = AppTest.from_string(script)
+    app.run()
+    assert not app.exception
+    return [element.body for element in app.markdown]
+
+
+def test_inject_styles_emits_one_inline_style_block():
+    bodies = _render(
+        "import styles\n"
+        "styles.inject_styles('global', 'hide_ui', 'loading')\n"
+    )
+    assert len(bodies) == 1
+    assert bodies[0].startswith("<style>") and bodies[0].endswith("</style>")
+    assert "<link" not in bodies[0]
+    # hide_ui is part of the global bundle and isn't repeated
+    assert bodies[0].count("#MainMenu") == 1
+
+
+def test_inject_styles_emits_style_with_static_serving_on():
+    from streamlit import config
+
+    previous = config.get_option("server.enableStaticServing")
+    config.set_option("server.enableStaticServing", True)
+    try:
+        bodies = _render("import styles\nstyles.apply_global_styles()\n")
+    finally:
+        config.set_option("server.enableStaticServing", previous)
+    assert bodies and bodies[0].startswith("<style>")
+
+
+def test_minify_css_keeps_selector_spaces():
+    from styles import minify_css
+
+    assert minify_css("a :hover { color : red ; }  /* c */") == "a :hover{color :red}"
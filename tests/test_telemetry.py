@@ -0,0 +1,48 @@
+import contextvars
+
+import telemetry
+
+
+def _traced(monkeypatch, func, **kwargs):
+    events = []
+    monkeypatch.setattr(telemetry, "TELEMETRY_ENABLED", True)
+    monkeypatch.setattr(telemetry, "_enqueue", events.append)
+    return telemetry.observe(**kwargs)(func), events
+
+
+def test_generator_span_is_current_only_while_the_body_runs(monkeypatch):
+    seen = []
+
+    def chunks():
+        for chunk in ("a", "b", "c"):
+            seen.append(telemetry._current_span.get())
+            yield chunk
+
+    traced, events = _traced(monkeypatch, chunks, name="stream")
+    stream = traced()
+    assert next(stream) == "a"
+    assert telemetry._current_span.get() is None
+    assert next(stream) == "b"
+
+    # Closing from another context (a new Streamlit rerun) must not touch this one's span
+    contextvars.copy_context().run(stream.close)
+
+    assert [span["name"] for span in seen] == ["stream", "stream"]
+    assert telemetry._current_span.get() is None
+    assert [event["body"]["output"] for event in events if event["type"] == "span-create"] == ['{"items": 2}']
+
+
+def test_partially_rejected_batch_counts_rejected_events(monkeypatch):
+    class Response:
+        status_code = 207
+
+        def json(self):
+            return {"successes": [{"id": "1", "status": 201}], "errors": [{"id": "2", "status": 400}]}
+
+    monkeypatch.setattr(telemetry.http_client, "post", lambda *args, **kwargs: Response())
+    before = telemetry.get_telemetry_stats()
+    telemetry._post_batch([{"id": "1"}, {"id": "2"}])
+    after = telemetry.get_telemetry_stats()
+
+    assert after["exported"] - before["exported"] == 1
+    assert after["rejected"] - before["rejected"] == 1
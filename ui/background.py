@@ -0,0 +1,90 @@
+"""
+Background Jobs for Whiski App
+Runs slow backend work (agent, weather, café search) off the script thread.
+
+Futures are stored in the session so a later scene (or rerun) can pick up a result
+that was started earlier. Jobs must not call Streamlit APIs; they return plain data
+and the scene that consumes the result renders any errors, including ones the job
+raised (get_job_result re-raises them) and jobs that don't finish in time.
+"""
+
+import os
+import streamlit as st
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Shared by all sessions in the process; two jobs per session at most
+BACKGROUND_MAX_WORKERS = int(os.getenv("WHISKI_BACKGROUND_WORKERS", "16"))
+_executor = ThreadPoolExecutor(max_workers=BACKGROUND_MAX_WORKERS, thread_name_prefix="whiski-bg")
+# Longest a scene waits for a job's result before showing a timeout error
+BACKGROUND_RESULT_TIMEOUT = float(os.getenv("WHISKI_BACKGROUND_RESULT_TIMEOUT", "60"))
+
+_JOBS_KEY = 'background_jobs'
+
+def start_job(name, key, func, *args, **kwargs):
+    """
+    Start a background job for this session unless one with the same key exists
+
+    Args:
+        name (str): Job name, e.g. 'recommendation'
+        key (tuple): Inputs identifying the job; a different key replaces the old job
+        func (callable): Streamlit-free function to run
+
+    Returns:
+        Future: The running (or already finished) job
+    """
+    jobs = st.session_state.setdefault(_JOBS_KEY, {})
+    existing = jobs.get(name)
+    if existing is not None and existing[0] == key:
+        return existing[1]
+    if existing is not None:
+        existing[1].cancel()
+
+    future = _executor.submit(func, *args, **kwargs)
+    jobs[name] = (key, future)
+    return future
+
+def get_job(name, key):
+    """Return the session's future for `name` if it was started with `key`, else None"""
+    job = st.session_state.get(_JOBS_KEY, {}).get(name)
+    if job is None or job[0] != key:
+        return None
+    return job[1]
+
+def get_job_result(name, key, timeout=BACKGROUND_RESULT_TIMEOUT):
+    """
+    Wait for a background job and return its result
+
+    Args:
+        name (str): Job name
+        key (tuple): Inputs the job must have been started with
+        timeout (float): Seconds to wait; None waits as long as the job runs
+
+    Returns:
+        The job's result, or None if there is no matching job (or it was cancelled)
+
+    Raises:
+        TimeoutError: If the job is still running after `timeout`
+        Exception: Whatever the job raised, for the scene to show
+    """
+    future = get_job(name, key)
+    if future is None:
+        return None
+    try:
+        return future.result(timeout=timeout)
+    except CancelledError:
+        return None
+    except FutureTimeoutError:
+        raise TimeoutError(f"{name} is taking longer than {timeout:g}s, please try again") from None
+
+def forget_job(name):
+    """Drop the session's `name` job (cancelling it if it hasn't started) so the next start_job runs anew"""
+    job = st.session_state.get(_JOBS_KEY, {}).pop(name, None)
+    if job is not None:
+        job[1].cancel()
+
+def cancel_session_jobs():
+    """Forget all of this session's jobs, cancelling any that haven't started yet"""
+    jobs = st.session_state.get(_JOBS_KEY, {})
+    for _, future in jobs.values():
+        future.cancel()
+    jobs.clear()
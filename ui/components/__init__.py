@@ -8,6 +8,7 @@ from .progress_bar import render_progress_bar
 from .navigation import render_navigation_buttons, render_action_buttons, render_reset_button
 from .cards import render_recommendation_card, render_cafe_card, render_loading_card
 from .buttons import render_mood_button_grid, render_location_button_list, render_action_button, render_start_button
+from .images import render_image
 
 __all__ = [
     'render_progress_bar',
@@ -20,5 +21,6 @@ __all__ = [
     'render_mood_button_grid',
     'render_location_button_list',
     'render_action_button',
-    'render_start_button'
+    'render_start_button',
+    'render_image'
 ]
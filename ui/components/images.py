@@ -0,0 +1,62 @@
+"""
+Image Components for Whiski App
+Renders the app's images from the pre-sized WebP variants built by assets.py.
+"""
+
+import streamlit as st
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from assets import STATIC_IMAGE_FORMATS, get_variants, static_file_exists
+
+def _picture_html(variants, width=None, caption=None):
+    """<picture> element letting the browser pick the right width from static/"""
+    sizes = f"(max-width: {width}px) 100vw, {width}px" if width else "100vw"
+    sources = []
+    for fmt in dict.fromkeys(v.format for v in variants):
+        candidates = [v for v in variants if v.format == fmt]
+        srcset = ", ".join(f"{v.url} {v.width}w" for v in candidates)
+        sources.append(f'<source type="{candidates[0].mime_type}" srcset="{srcset}" sizes="{sizes}">')
+    fallback = max(variants, key=lambda v: v.width)
+    img_style = f"width: {width}px; max-width: 100%;" if width else "width: 100%;"
+    caption_html = (
+        f'<figcaption style="color: rgba(49, 51, 63, 0.6); font-size: 14px; text-align: center;">{caption}</figcaption>'
+        if caption else ""
+    )
+    return (
+        '<figure style="margin: 0; text-align: center;"><picture>'
+        + "".join(sources)
+        + f'<img src="{fallback.url}" alt="{caption or ""}" loading="eager" decoding="async" style="{img_style} height: auto;">'
+        + f"</picture>{caption_html}</figure>"
+    )
+
+def render_image(source, width=None, caption=None, use_container_width=False):
+    """
+    Render one of the app's images at its display size
+
+    Served from static/ as a <picture> when static serving is on and the variants are on disk
+    (only formats Streamlit serves with an image Content-Type), otherwise as cached WebP bytes
+    through st.image, and as the original PNG until the variants
+    are built (in the background, on first view) or if Pillow is missing.
+
+    Args:
+        source (str): Source PNG filename (e.g. "bot.png")
+        width (int): Display width in pixels
+        caption (str): Optional caption
+        use_container_width (bool): Stretch to the container instead of a fixed width
+    """
+    variants = get_variants(source, wait=False)
+    static = [v for v in variants if v.format in STATIC_IMAGE_FORMATS]
+    if static and st.get_option("server.enableStaticServing") and all(static_file_exists(v) for v in static):
+        st.markdown(_picture_html(static, None if use_container_width else width, caption), unsafe_allow_html=True)
+        return
+
+    webp = [v for v in variants if v.format == "webp"]
+    if webp:
+        # Smallest variant that still covers the display width
+        target = width or max(v.width for v in webp)
+        variant = min((v for v in webp if v.width >= target), key=lambda v: v.width, default=webp[-1])
+        st.image(variant.data, width=width, caption=caption, use_container_width=use_container_width)
+        return
+
+    st.image(source, width=width, caption=caption, use_container_width=use_container_width)
@@ -0,0 +1,94 @@
+"""
+Render Metrics for Whiski App
+Measures how many bytes of markdown/HTML each scene emits per rerun.
+
+Streamlit reruns the whole script on every interaction and resends every element, so these
+bytes are paid again on each click. st.markdown / st.html calls (including on columns and
+containers) are counted while a scene renders inside measure_scene().
+
+Off by default, since it wraps Streamlit's markdown/HTML calls; set WHISKI_RENDER_METRICS=true
+to enable it (benchmarks/e2e_bench.py does).
+"""
+
+import os
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import streamlit as st
+from streamlit.delta_generator import DeltaGenerator
+
+RENDER_METRICS_ENABLED = os.getenv("WHISKI_RENDER_METRICS", "false").lower() == "true"
+
+_RERUN_WINDOW = 200
+_local = threading.local()  # Each session's script runs on its own thread
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=_RERUN_WINDOW))  # scene -> [(bytes, elements)]
+_installed = False
+
+def _counted(method):
+    def _wrapper(*args, **kwargs):
+        counter = getattr(_local, 'counter', None)
+        if counter is not None:
+            # First positional argument is the body (after self for unbound DeltaGenerator methods)
+            body = kwargs.get('body')
+            if body is None:
+                body = next((a for a in args if isinstance(a, str)), "")
+            counter[0] += len(str(body).encode())
+            counter[1] += 1
+        return method(*args, **kwargs)
+    _wrapper.__wrapped__ = method
+    return _wrapper
+
+def install():
+    """Count markdown/HTML output from st.* and from columns/containers; idempotent"""
+    global _installed
+    with _lock:
+        if _installed or not RENDER_METRICS_ENABLED:
+            return
+        for name in ('markdown', 'html'):
+            if hasattr(DeltaGenerator, name):
+                setattr(DeltaGenerator, name, _counted(getattr(DeltaGenerator, name)))
+            # st.markdown is a method bound at import time, separate from the class attribute
+            if hasattr(st, name):
+                setattr(st, name, _counted(getattr(st, name)))
+        _installed = True
+
+@contextmanager
+def measure_scene(scene_name):
+    """
+    Count the markdown/HTML bytes emitted inside this block as one rerun of `scene_name`
+
+    Also recorded when the block exits through st.rerun() (scene transitions).
+    """
+    if not RENDER_METRICS_ENABLED:
+        yield
+        return
+    install()
+    _local.counter = [0, 0]
+    try:
+        yield
+    finally:
+        size, elements = _local.counter
+        _local.counter = None
+        with _lock:
+            _samples[scene_name].append((size, elements))
+
+def get_render_stats():
+    """
+    Per-scene markdown/HTML output over recent reruns
+
+    Returns:
+        dict: {scene: {'reruns', 'avg_bytes', 'max_bytes', 'last_bytes', 'avg_elements'}}
+    """
+    with _lock:
+        snapshot = {scene: list(samples) for scene, samples in _samples.items()}
+    return {
+        scene: {
+            'reruns': len(samples),
+            'avg_bytes': round(sum(s[0] for s in samples) / len(samples)),
+            'max_bytes': max(s[0] for s in samples),
+            'last_bytes': samples[-1][0],
+            'avg_elements': round(sum(s[1] for s in samples) / len(samples), 1),
+        }
+        for scene, samples in snapshot.items() if samples
+    }
@@ -1,18 +1,72 @@
 """
 Scenes Module Initialization
-Imports all scene modules for the Whiski app.
+Lazy scene registry for the Whiski app.
+
+Scene modules are imported the first time they are rendered, so a user on the
+welcome screen never pays for the agent, weather or café search imports.
 """
 
-# Import scene render functions
-from .welcome import render_welcome_scene
-from .mood_selection import render_mood_selection_scene
-from .location_input import render_location_input_scene, render_custom_location_scene
-from .loading import render_loading_scene
-from .results import render_results_scene
-from .cafe_details import render_cafe_details_scene
-from .chat import render_chat_scene
+import importlib
+import time
+import startup_timing
+from ..utils import SCENES
+
+# Scene name -> (module, render function)
+SCENE_REGISTRY = {
+    SCENES['WELCOME']: ('welcome', 'render_welcome_scene'),
+    SCENES['MOOD_SELECTION']: ('mood_selection', 'render_mood_selection_scene'),
+    SCENES['LOCATION_INPUT']: ('location_input', 'render_location_input_scene'),
+    SCENES['CUSTOM_LOCATION']: ('location_input', 'render_custom_location_scene'),
+    SCENES['LOADING']: ('loading', 'render_loading_scene'),
+    SCENES['RESULTS']: ('results', 'render_results_scene'),
+    SCENES['CAFE_DETAILS']: ('cafe_details', 'render_cafe_details_scene'),
+    SCENES['CHAT']: ('chat', 'render_chat_scene'),
+}
+
+def get_scene_renderer(scene_name):
+    """
+    Import a scene's module on first use and return its render function
+
+    Args:
+        scene_name (str): One of the SCENES values
+
+    Returns:
+        callable | None: The render function, or None for an unknown scene
+    """
+    entry = SCENE_REGISTRY.get(scene_name)
+    if entry is None:
+        return None
+    module_name, function_name = entry
+
+    started = time.perf_counter()
+    module = importlib.import_module(f".{module_name}", __name__)
+    startup_timing.record_timing(f"scene import: {module_name}", time.perf_counter() - started)
+    return getattr(module, function_name)
+
+def render_scene(scene_name):
+    """
+    Render a scene by name
+
+    Returns:
+        bool: False if the scene is unknown
+    """
+    renderer = get_scene_renderer(scene_name)
+    if renderer is None:
+        return False
+    renderer()
+    return True
+
+def __getattr__(name):
+    """Keep `from ui.scenes import render_x_scene` working without eager imports"""
+    for module_name, function_name in SCENE_REGISTRY.values():
+        if function_name == name:
+            return getattr(importlib.import_module(f".{module_name}", __name__), function_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
+    'SCENE_REGISTRY',
+    'get_scene_renderer',
+    'render_scene',
     'render_welcome_scene',
     'render_mood_selection_scene',
     'render_location_input_scene',
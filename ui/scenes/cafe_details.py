@@ -12,78 +12,150 @@ from ..components.progress_bar import render_progress_bar
 from ..components.cards import render_cafe_card
 from ..components.navigation import render_action_buttons
 from ..utils import SCENES, navigate_to_scene
+from ..background import get_job_result, forget_job, cancel_session_jobs
 
 # Import real backend modules
 try:
-    from cafe_search import search_matcha_cafes
+    from cafe_search import get_cafe_page, iter_cafe_details, add_distances
+    from cafe_ranking import rank_cafes, describe_cafe
     CAFE_SEARCH_AVAILABLE = True
 except ImportError:
     CAFE_SEARCH_AVAILABLE = False
     # Warning will be shown in the scene function if needed
 
-def get_real_cafe_results(location, mood=None):
+# Cards revealed initially and per "show more"; details are only looked up for shown cards
+CAFES_PER_PAGE = int(os.getenv("WHISKI_CAFES_PER_PAGE", "5"))
+
+def order_cafes(cafes, location, mood):
+    """Distance from the user's location on every café, best match for the mood first"""
+    return rank_cafes(add_distances(cafes, location), mood, location)
+
+def prefetch_cafe_page(location, mood):
+    """
+    First page of cafés, ranked, with details for the cards shown first; runs as a background job
+    
+    Returns:
+        tuple: (list of café dicts, next_page_token or None)
     """
-    Get real café search results using backend integration
+    cafes, next_page_token = get_cafe_page(location)
+    cafes = order_cafes(cafes, location, mood)
+    for index, cafe in iter_cafe_details(cafes[:CAFES_PER_PAGE]):
+        cafes[index] = cafe
+    return cafes, next_page_token
+
+def format_distance(distance_m):
+    """Distance for a card, in miles (blank if unknown)"""
+    if distance_m is None:
+        return ''
+    return f"{distance_m / 1609.344:.1f} mi"
+
+def format_cafe(cafe):
+    """
+    Format a ranked café for render_cafe_card
     
     Args:
-        location (str): User location
-        mood (str): User mood for filtering
+        cafe (dict): Café from order_cafes
+    
+    Returns:
+        dict: Card fields
+    """
+    if cafe.get('details_pending'):
+        phone = 'Loading…'
+    else:
+        phone = cafe.get('phone') or 'Phone not available'
+    return {
+        **describe_cafe(cafe),
+        'name': cafe.get('name', 'Unknown Café'),
+        'address': cafe.get('address', 'Address not available'),
+        'rating': cafe.get('rating', 4.0),
+        'distance': format_distance(cafe.get('distance_m')),
+        'phone': phone
+    }
+
+def load_first_page(location, mood):
+    """
+    Fetch the first page of cafés into the session (no details wait)
     
     Returns:
-        list: List of café dictionaries
+        bool: True if any cafés were found
     """
     if not CAFE_SEARCH_AVAILABLE:
         st.error("Café search service is not available. Please check your configuration.")
-        return []
+        return False
     
     try:
-        # Use real café search
-        cafes = search_matcha_cafes(location)
-        
-        if not cafes:
-            st.warning("No cafés found in this location. Please try a different area.")
-            return []
-        
-        # Limit to 5 results and format for display
-        limited_cafes = cafes[:5]
-        formatted_cafes = []
-        
-        # Varied speciality descriptions
-        specialities = [
-            "Premium matcha lattes & ceremonial grade tea",
-            "Artisanal matcha drinks & Japanese sweets", 
-            "Traditional matcha ceremonies & modern beverages",
-            "Organic matcha & plant-based milk options",
-            "Signature matcha blends & seasonal specialties"
-        ]
-        
-        # Varied atmosphere descriptions
-        atmospheres = [
-            "Zen-inspired space perfect for mindful sipping",
-            "Modern café with traditional Japanese touches",
-            "Cozy corner spot ideal for creative work", 
-            "Bright, minimalist space with calming vibes",
-            "Warm gathering place for matcha enthusiasts"
-        ]
-        
-        for i, cafe in enumerate(limited_cafes):
-            formatted_cafe = {
-                'name': cafe.get('name', 'Unknown Café'),
-                'address': cafe.get('address', 'Address not available'),
-                'rating': cafe.get('rating', 4.0),
-                'distance': '',  # Remove distance text
-                'speciality': specialities[i % len(specialities)],
-                'atmosphere': atmospheres[i % len(atmospheres)],
-                'price_range': '$$',  # Use dollar signs instead of $3-8
-                'phone': cafe.get('phone') or 'Phone not available'
-            }
-            formatted_cafes.append(formatted_cafe)
-        
-        return formatted_cafes
-        
+        # Use the page prefetched during the loading scene; one that failed, timed out or
+        # came back empty is dropped and the search runs again here (its errors shown below)
+        try:
+            page = get_job_result('cafes', (location, mood))
+        except Exception:
+            page = None
+        if not page or not page[0]:
+            forget_job('cafes')
+            cafes, next_page_token = get_cafe_page(location)
+            cafes = order_cafes(cafes, location, mood)
+        else:
+            cafes, next_page_token = page
     except Exception as e:
         st.error(f"Error searching for cafés: {e}")
-        return []
+        return False
+    
+    if not cafes:
+        st.warning("No cafés found in this location. Please try a different area.")
+        return False
+    
+    st.session_state.cafe_results = list(cafes)
+    st.session_state.cafe_next_page_token = next_page_token
+    st.session_state.cafes_shown = min(CAFES_PER_PAGE, len(cafes))
+    return True
+
+def show_more_cafes(location, mood):
+    """Reveal the next cards, following next_page_token once the fetched results run out"""
+    cafes = st.session_state.cafe_results
+    shown = st.session_state.get('cafes_shown', 0)
+    next_page_token = st.session_state.get('cafe_next_page_token')
+    if shown + CAFES_PER_PAGE > len(cafes) and next_page_token:
+        try:
+            with st.spinner("Finding more cafés..."):
+                more, next_page_token = get_cafe_page(location, page_token=next_page_token)
+        except Exception as e:
+            st.error(f"Error loading more cafés: {e}")
+            return
+        # Cards already on screen keep their place; the rest are re-ordered with the new page
+        cafes[shown:] = order_cafes(cafes[shown:] + more, location, mood)
+        st.session_state.cafe_next_page_token = next_page_token
+    st.session_state.cafes_shown = min(shown + CAFES_PER_PAGE, len(cafes))
+
+def render_cafe_cards(cafes, count):
+    """
+    Render the first `count` café cards straight away, details or not
+    
+    Returns:
+        list: One placeholder per card, for fill_cafe_details
+    """
+    placeholders = []
+    for i, cafe in enumerate(cafes[:count]):
+        placeholder = st.empty()
+        with placeholder:
+            render_cafe_card(format_cafe(cafe), i)
+        placeholders.append(placeholder)
+        
+        # Add spacing between café cards
+        if i < count - 1:
+            st.markdown("<br>", unsafe_allow_html=True)
+    return placeholders
+
+def fill_cafe_details(cafes, placeholders):
+    """
+    Re-render each card as its details lookup completes
+    
+    Cafés are replaced in place in the session's list, so later reruns show them finished.
+    """
+    shown = cafes[:len(placeholders)]
+    for i, cafe in iter_cafe_details(shown):
+        cafes[i] = cafe
+        with placeholders[i]:
+            render_cafe_card(format_cafe(cafe), i)
 
 def render_cafe_details_scene():
     """Render the café search results scene"""
@@ -100,30 +172,35 @@ def render_cafe_details_scene():
         font_size="42px"
     ), unsafe_allow_html=True)
     
-    # Force regenerate café results if empty or not present
-    if 'cafe_results' not in st.session_state or not st.session_state.cafe_results:
+    # Search if results are empty or not present; only the Text Search is waited on
+    if not st.session_state.get('cafe_results'):
         with st.spinner("Finding the best matcha cafés for you..."):
-            cafe_results = get_real_cafe_results(location, mood)
-            st.session_state.cafe_results = cafe_results
+            load_first_page(location, mood)
     
-    cafes = st.session_state.cafe_results
+    cafes = st.session_state.get('cafe_results') or []
+    shown = st.session_state.get('cafes_shown', min(CAFES_PER_PAGE, len(cafes)))
     
     # Display café cards
+    placeholders = []
     if cafes:
-        for i, cafe in enumerate(cafes):
-            render_cafe_card(cafe, i)
-            
-            # Add spacing between café cards
-            if i < len(cafes) - 1:
-                st.markdown("<br>", unsafe_allow_html=True)
+        placeholders = render_cafe_cards(cafes, shown)
+        
+        if shown < len(cafes) or st.session_state.get('cafe_next_page_token'):
+            st.markdown("<br>", unsafe_allow_html=True)
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col2:
+                if st.button("Show more cafés", key="show_more_cafes", use_container_width=True):
+                    show_more_cafes(location, mood)
+                    st.rerun()
     else:
         st.error("Unable to load café results. Please try again.")
         
         # Add a button to force refresh
         if st.button("🔄 Refresh Café Search", key="force_refresh_cafes"):
-            # Clear the café results and reload
+            # Clear the café results and the prefetch job, then search again
             if 'cafe_results' in st.session_state:
                 del st.session_state['cafe_results']
+            forget_job('cafes')
             st.rerun()
     
     # Navigation buttons
@@ -147,9 +224,15 @@ def render_cafe_details_scene():
     ]
     
     render_action_buttons(actions, "cafe_details")
+    
+    # Last, so the buttons are usable while phone numbers stream in
+    if placeholders:
+        fill_cafe_details(cafes, placeholders)
 
 def reset_and_restart():
     """Reset session and start over"""
+    cancel_session_jobs()
+    
     # Clear all session data
     for key in list(st.session_state.keys()):
         if key not in ['current_scene']:  # Keep navigation state
@@ -10,17 +10,51 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from styles import get_scene_header_style
 from ..components.progress_bar import render_progress_bar
 from ..components.navigation import render_action_buttons
+from ..components.images import render_image
 from ..utils import SCENES, navigate_to_scene
-from telemetry import langfuse
-from langfuse import observe, get_client
+from ..background import cancel_session_jobs
+from telemetry import observe
+from contextlib import closing
+from agent_pool import AgentPoolTimeout
+import chat_cache
+from chat_service import stream_chat, uses_chat_cache, visible_text, CHAT_STREAMING_ENABLED
+from conversation_memory import ConversationMemory
+from prompt_compiler import request_type
 
-# Import real backend modules
-try:
-    from whiski_agent import agent  # Import the agent instance directly like in original
-    AGENT_AVAILABLE = True
-except ImportError:
-    AGENT_AVAILABLE = False
-    st.warning("Whiski agent not available - using fallback mode")
+PREFIX = '<span style="color: black;">**Whiski 🧠:**</span>'
+
+def load_agent_pool():
+    """
+    Import the Whiski agent pool on first chat message rather than when the scene loads
+
+    Returns:
+        AgentPool | None: The shared agent pool, or None if the backend isn't installed
+    """
+    try:
+        from whiski_agent import agent_pool
+        return agent_pool
+    except ImportError:
+        return None
+
+def get_chat_memory():
+    """This session's conversation memory, created on first use"""
+    if st.session_state.get('chat_memory') is None:
+        st.session_state.chat_memory = ConversationMemory()
+    return st.session_state.chat_memory
+
+def get_session_context():
+    """The user's selections so far, for the top of every chat prompt"""
+    drink = st.session_state.get('drink_recommendation')
+    # Failed recommendations leave error text in the session; don't feed it to the agent
+    if drink and drink.startswith(("Agent ", "Matcha recommendation loading")):
+        drink = None
+    return {
+        'mood': st.session_state.get('selected_mood'),
+        'location': st.session_state.get('user_location'),
+        'weather': st.session_state.get('weather_data'),
+        'drink': drink,
+        'vibe': st.session_state.get('vibe_description') if drink else None,
+    }
 
 @observe(name="chat.get_ai_response", as_type="generation")
 def get_ai_response(prompt, context=None):
@@ -29,25 +63,81 @@ def get_ai_response(prompt, context=None):
     
     Args:
         prompt (str): User's message
-        context (dict): Current session context
+        context (dict): Current session context (mood, location, weather, drink, vibe)
     
     Returns:
         str: AI response
     """
-    if not AGENT_AVAILABLE:
+    agent_pool = load_agent_pool()
+    if agent_pool is None:
         st.error("Whiski agent is not available. Please check your configuration.")
         return "Sorry, I'm not available right now. Please try again later."
     
     try:
-        # Use agent directly
-        response = agent.run(prompt)
+        memory = get_chat_memory()
+        # General questions asked before (in any wording) skip the agent
+        cacheable = uses_chat_cache(prompt, memory)
+        response = chat_cache.lookup(prompt) if cacheable else None
+        if response is None:
+            # Borrow an agent for this message so concurrent sessions never share one
+            with agent_pool.checkout() as agent, request_type("chat"):
+                response = agent.run(memory.build_prompt(prompt, context))
+            if cacheable:
+                chat_cache.store(prompt, str(response))
+        memory.add_turn(prompt, str(response))
         return response
         
+    except AgentPoolTimeout:
+        st.warning("Whiski is busy with other guests right now. Please try again in a moment.")
+        return "I'm a little swamped right now - ask me again in a moment!"
+        
     except Exception as e:
         st.error(f"Error getting AI response: {e}")
         return "I'm having trouble responding right now. Please try again."
-langfuse = get_client()
-langfuse.flush()
+
+def stream_ai_response(prompt, placeholder, context=None):
+    """
+    Stream the agent's reply into a placeholder as it is generated
+    
+    If the user navigates away mid-answer, Streamlit stops this script run at the next
+    placeholder update; closing the stream then interrupts the agent.
+    
+    Args:
+        prompt (str): User's message
+        placeholder: st.empty() inside the assistant chat message
+        context (dict): Current session context (mood, location, weather, drink, vibe)
+    
+    Returns:
+        str: Final AI response
+    """
+    try:
+        buffer = ""
+        response = ""
+        with closing(stream_chat(prompt, get_chat_memory(), context)) as stream:
+            for kind, text in stream:
+                if kind == "delta":
+                    buffer += text
+                    preview = visible_text(buffer)
+                    if preview:
+                        placeholder.markdown(f'{PREFIX} {preview} ▌', unsafe_allow_html=True)
+                else:
+                    response = text
+        
+    except ImportError:
+        st.error("Whiski agent is not available. Please check your configuration.")
+        response = "Sorry, I'm not available right now. Please try again later."
+        
+    except AgentPoolTimeout:
+        st.warning("Whiski is busy with other guests right now. Please try again in a moment.")
+        response = "I'm a little swamped right now - ask me again in a moment!"
+        
+    except Exception as e:
+        st.error(f"Error getting AI response: {e}")
+        response = "I'm having trouble responding right now. Please try again."
+    
+    placeholder.markdown(f'{PREFIX} {response}', unsafe_allow_html=True)
+    return response
+
 
 
 
@@ -68,24 +158,43 @@ def render_chat_scene():
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
         try:
-            st.image("bot.png", width=700, output_format="PNG")
+            render_image("bot.png", width=700)
         except:
             st.error("Bot image (bot.png) not found. Please check your assets.")
     
     # Add some spacing
     st.markdown("<br>", unsafe_allow_html=True)
     
+    # Earlier messages this session (the agent sees them through the conversation memory)
+    chat_history = st.session_state.setdefault('chat_history', [])
+    for message in chat_history:
+        if message['role'] == 'user':
+            st.chat_message("user").write(message['content'])
+        else:
+            st.chat_message("assistant").markdown(f"{PREFIX} {message['content']}", unsafe_allow_html=True)
+    
     # Chat input at the bottom (matching original backup style)
     if prompt := st.chat_input("Ask me about Matcha!"):
         # Display user message using Streamlit's chat components (like original)
         st.chat_message("user").write(prompt)
+        context = get_session_context()
         
-        # Get AI response
-        with st.spinner("Whiski is thinking..."):
-            response = get_ai_response(prompt)
+        if CHAT_STREAMING_ENABLED:
+            # Stream the reply into the assistant message as tokens arrive
+            with st.chat_message("assistant"):
+                placeholder = st.empty()
+                placeholder.markdown("*Whiski is thinking...*")
+                response = stream_ai_response(prompt, placeholder, context)
+        else:
+            # Get AI response
+            with st.spinner("Whiski is thinking..."):
+                response = get_ai_response(prompt, context)
+            
+            # Display assistant response using Streamlit's chat components (like original)  
+            st.chat_message("assistant").markdown(f'{PREFIX} {response}', unsafe_allow_html=True)
         
-        # Display assistant response using Streamlit's chat components (like original)  
-        st.chat_message("assistant").markdown(f'<span style="color: black;">**Whiski 🧠:**</span> {response}', unsafe_allow_html=True)
+        chat_history.append({'role': 'user', 'content': prompt})
+        chat_history.append({'role': 'assistant', 'content': response})
     
     # Navigation buttons matching mockup style (3 buttons in a row)
     st.markdown("<br><br>", unsafe_allow_html=True)
@@ -105,6 +214,8 @@ def render_chat_scene():
 
 def reset_chat_and_restart():
     """Reset session including chat history and start over"""
+    cancel_session_jobs()
+    
     # Clear all session data
     for key in list(st.session_state.keys()):
         if key not in ['current_scene']:  # Keep navigation state
@@ -4,13 +4,29 @@ Displays the "Whiski is thinking..." animation while processing recommendations.
 """
 
 import streamlit as st
-import time
 import sys
 import os
+from concurrent.futures import wait
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from styles import get_scene_header_style
+from styles import get_scene_header_style, inject_styles
 from ..components.progress_bar import render_progress_bar
 from ..utils import SCENES, navigate_to_scene
+from ..background import start_job
+from .results import fetch_recommendation, BACKEND_AVAILABLE
+from .cafe_details import prefetch_cafe_page, CAFE_SEARCH_AVAILABLE
+
+# Longest the loading scene waits for the recommendation before showing results anyway
+LOADING_MAX_WAIT = float(os.getenv("WHISKI_LOADING_MAX_WAIT", "20"))
+
+def start_background_work(mood, location):
+    """Kick off the recommendation and café search concurrently for this session"""
+    futures = []
+    if BACKEND_AVAILABLE:
+        futures.append(start_job('recommendation', (mood, location), fetch_recommendation, mood, location))
+    if CAFE_SEARCH_AVAILABLE:
+        # First page (and the first cards' details) ready by the time the user opens the café scene
+        start_job('cafes', (location, mood), prefetch_cafe_page, location, mood)
+    return futures
 
 def render_loading_scene():
     """Render the loading/processing scene"""
@@ -21,37 +37,9 @@ def render_loading_scene():
     # Render the green step progress bar (Step 3 of 4)
     render_progress_bar(3)
     
-    # Add targeted CSS to hide specific remnant elements
+    # Hide remnant elements from previous scenes and style the spinner (loading bundle)
+    inject_styles("loading")
     st.markdown("""
-    <style>
-    /* Hide specific UI elements from previous scenes */
-    .stButton:not([data-testid*="progress"]) {
-        display: none !important;
-    }
-    
-    /* Hide any text inputs or form elements */
-    [data-testid="stTextInput"], 
-    [data-testid="stSelectbox"],
-    .stRadio {
-        display: none !important;
-    }
-    
-    .loading-spinner {
-        width: 60px;
-        height: 60px;
-        border: 4px solid #f3f3f3;
-        border-top: 4px solid #557937ff;
-        border-radius: 50%;
-        animation: spin 1s linear infinite;
-        margin: 0 auto;
-    }
-    
-    @keyframes spin {
-        0% { transform: rotate(0deg); }
-        100% { transform: rotate(360deg); }
-    }
-    </style>
-    
     <div style="text-align: center; padding: 50px 20px; min-height: 60vh; display: flex; flex-direction: column; justify-content: center;">
         <h2 style="font-size: 48px; margin-bottom: 30px; color: #557937ff;">🧠 Whiski is thinking...</h2>
         <p style="font-size: 20px; color: #666; margin-bottom: 40px;">
@@ -61,8 +49,11 @@ def render_loading_scene():
     </div>
     """, unsafe_allow_html=True)
     
-    # Wait for processing
-    time.sleep(3)
+    # Start the agent and café search in the background, then wait only for the recommendation
+    mood = st.session_state.get('selected_mood', 'chill')
+    location = st.session_state.get('user_location', 'Unknown')
+    recommendation_jobs = start_background_work(mood, location)
+    wait(recommendation_jobs, timeout=LOADING_MAX_WAIT)
     
-    # Navigate to results
+    # Navigate to results (it keeps waiting on the job if we hit the max wait)
     navigate_to_scene(SCENES['RESULTS'])
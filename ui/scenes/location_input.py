@@ -8,6 +8,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from styles import get_scene_header_style
+from geocoding import LOCATION_PRESETS
 from ..components.progress_bar import render_progress_bar
 from ..components.buttons import render_location_button_list
 from ..components.navigation import render_navigation_buttons
@@ -24,7 +25,7 @@ def render_location_input_scene():
     ), unsafe_allow_html=True)
     
     # Location options
-    locations = ["Brooklyn, NY", "Manhattan, NY", "Queens, NY", "Other Location"]
+    locations = [*LOCATION_PRESETS, "Other Location"]
     
     # Render location button list
     render_location_button_list(
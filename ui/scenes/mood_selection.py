@@ -8,6 +8,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from styles import get_scene_header_style
+from mood_drink_map import MOODS
 from ..components.progress_bar import render_progress_bar
 from ..components.buttons import render_mood_button_grid
 from ..utils import SCENES
@@ -22,15 +23,5 @@ def render_mood_selection_scene():
         "Choose the mood that best describes how you're feeling right now"
     ), unsafe_allow_html=True)
     
-    # Mood options
-    vibes = {
-        "😌": "chill",
-        "😰": "anxious", 
-        "🎨": "creative",
-        "🧘": "reflective",
-        "⚡": "energized",
-        "☕": "cozy"
-    }
-    
     # Render mood button grid
-    render_mood_button_grid(vibes, SCENES['LOCATION_INPUT'])
+    render_mood_button_grid(MOODS, SCENES['LOCATION_INPUT'])
@@ -12,92 +12,59 @@ from styles import get_scene_header_style
 from ..components.progress_bar import render_progress_bar
 from ..components.cards import render_recommendation_card, render_loading_card
 from ..components.navigation import render_action_buttons
+from ..components.images import render_image
 from ..utils import SCENES, navigate_to_scene
-from telemetry import langfuse
-from langfuse import observe, get_client
+from ..background import get_job, get_job_result, cancel_session_jobs
 
 # Import real backend modules
 try:
-    from whiski_agent import agent  # Import the actual agent instance
-    from weather_api import get_nyc_weather
+    from recommendation import recommend, RecommendationParseError
+    from weather_api import get_weather
     # from mood_drink_map import get_drink_for_mood  # No longer needed since agent provides drink
     BACKEND_AVAILABLE = True
 except ImportError as e:
     BACKEND_AVAILABLE = False
     # Backend modules not available - will use fallback mode
 
-@observe(name="agent_generation", as_type="generation")
-def call_whiski_agent(prompt: str) -> str:
+def fetch_recommendation(mood, location, weather_data=None):
     """
-    Child span: encapsulates the LLM/agent call so Langfuse records a 'generation'
-    with input prompt and raw output.
-    """
-    return agent.run(prompt)
-
-
-@observe(name="parse_response", as_type="tool")
-def parse_agent_response(response: str, mood: str, location: str):
-    """
-    Child span: encapsulates parsing/formatting logic so Langfuse records a 'tool'
-    with the unstructured LLM text as input and the structured drink/vibe dict as output.
-
+    Streamlit-free part of the recommendation flow, safe to run as a background job
+    
+    Args:
+        mood (str): Selected mood
+        location (str): User location
+        weather_data (WeatherReport): Current conditions, fetched if not provided
+    
     Returns:
-        dict | None: {'drink': str, 'vibe': str} if parsed, otherwise None
+        dict: 'drink' and 'vibe', the 'weather' report used, and an 'error' message to show (or None)
     """
-    import re
-
-    # Method 1: Extract drink and vibe from the structured format
-    drink_match = re.search(r'\*\*(?:The )?Drink:\*\*\s*(.*?)(?=\*\*(?:The )?Vibe:|\n\n|$)', response, re.DOTALL | re.IGNORECASE)
-    vibe_match = re.search(r'\*\*(?:The )?Vibe:\*\*\s*(.*?)(?=$)', response, re.DOTALL | re.IGNORECASE)
-
-    if drink_match and vibe_match:
-        drink_text = drink_match.group(1).strip()
-        vibe_text = vibe_match.group(1).strip()
-
-        # Clean up the text (remove extra asterisks and formatting)
-        drink_clean = re.sub(r'\*\*([^*]+)\*\*', r'\1', drink_text)
-        vibe_clean = re.sub(r'\*\*([^*]+)\*\*', r'\1', vibe_text)
-
-        # Validate that we got actual recommendations, not questions
-        if (len(drink_clean.strip()) > 10 and 
-            "matcha" in drink_clean.lower() and 
-            len(vibe_clean.strip()) > 10 and
-            not any(pattern in drink_clean.lower() for pattern in ["another", "other", "would you", "anything else"])):
-            return {
-                "drink": drink_clean.strip(),
-                "vibe": vibe_clean.strip()
-            }
-
-    # Method 2: Try alternative patterns (fallback)
-    drink_alt = re.search(r'drink:\s*(.*?)(?=vibe:|$)', response, re.DOTALL | re.IGNORECASE)
-    vibe_alt = re.search(r'vibe:\s*(.*?)(?=$)', response, re.DOTALL | re.IGNORECASE)
-
-    if drink_alt and vibe_alt:
-        drink_text = drink_alt.group(1).strip()
-        vibe_text = vibe_alt.group(1).strip()
-
-        if (len(drink_text) > 10 and "matcha" in drink_text.lower() and len(vibe_text) > 10):
-            return {
-                "drink": drink_text,
-                "vibe": vibe_text
-            }
-
-    # Method 3: If response contains matcha content but no clear structure
-    if "matcha" in response.lower():
-        # Extract any matcha-related content but provide a generic structure
-        import re as _re
-        matcha_content = _re.findall(r'[^.]*matcha[^.]*\.?', response, _re.IGNORECASE)
-        if matcha_content:
-            snippet = matcha_content[0]
-            return {
-                "drink": snippet[:80] + ("..." if len(snippet) > 80 else ""),
-                "vibe": f"A perfect {mood} atmosphere in {location} to enjoy your matcha! 🍵"
-            }
+    weather_report = weather_data
+    try:
+        # Get weather context
+        if weather_report is None:
+            weather_report = get_weather(location)
+        
+        # Agent or direct structured-output path, per WHISKI_RECOMMENDATION_MODE
+        recommendation, weather_report = recommend(mood, location, weather_report)
+        return {**recommendation, "weather": weather_report, "error": None}
 
-    # Parsing failed
-    return None
+    except RecommendationParseError as e:
+        # If all parsing fails, show what the agent actually returned
+        return {
+            "drink": "Agent parsing failed",
+            "vibe": "Agent did not provide proper format",
+            "weather": weather_report,
+            "error": f"Agent did not provide structured recommendation ({e.reason}). Raw response: {e.response[:200]}..."
+        }
+        
+    except Exception as e:
+        return {
+            "drink": "Error occurred",
+            "vibe": "Please try again",
+            "weather": weather_report,
+            "error": f"Error getting AI recommendation: {e}"
+        }
 
-@observe(name="agent_result_pairing_workflow", as_type="workflow")
 def get_ai_recommendation(mood, location, weather_data=None):
     """
     Get AI recommendation using real Whiski agent and the proper template
@@ -105,7 +72,7 @@ def get_ai_recommendation(mood, location, weather_data=None):
     Args:
         mood (str): Selected mood
         location (str): User location
-        weather_data (dict): Weather information
+        weather_data (WeatherReport): Current conditions, fetched if not provided
     
     Returns:
         dict: Recommendation with 'drink' and 'vibe' keys
@@ -115,63 +82,11 @@ def get_ai_recommendation(mood, location, weather_data=None):
         st.error("Whiski agent is not available. Please check your configuration.")
         return {"drink": "Agent unavailable", "vibe": "Please try again later"}
     
-    try:
-        # Get weather context
-        weather_context = get_nyc_weather() if weather_data is None else weather_data
-        
-        # Load and fill the prompt template
-        import os
-        template_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "templates", "prompt_template_gemini.txt")
-        with open(template_path, "r") as tf:
-            template = tf.read()
-            
-        # Fill template with actual values
-        filled_task = template.format(
-            mood=mood,
-            location=location,
-            weather=weather_context
-        )
-        
-        # Get response from agent (child span for generation)
-        response = call_whiski_agent(filled_task)
-
-        # Check if this is a conversational response rather than a recommendation
-        import re
-        conversational_patterns = [
-            r"glad i could help",
-            r"is there another",
-            r"would you like",
-            r"anything else",
-            r"other mood",
-            r"follow.?up"
-        ]
-        is_conversational = any(re.search(pattern, response, re.IGNORECASE) for pattern in conversational_patterns)
+    result = fetch_recommendation(mood, location, weather_data)
+    if result['error']:
+        st.error(result['error'])
+    return {"drink": result['drink'], "vibe": result['vibe']}
 
-        if is_conversational:
-            # This is a conversational response, not a recommendation
-            # Try to re-prompt with a more direct approach
-            direct_prompt = (
-                f"Recommend a specific matcha drink and café vibe for someone feeling {mood} "
-                f"in {location} with {weather_context} weather. "
-                f"Format: **The Drink:** [recommendation] **The Vibe:** [description]"
-            )
-            response = call_whiski_agent(direct_prompt)
-
-        # Parse (child span for tool)
-        parsed = parse_agent_response(response, mood, location)
-        if parsed is not None:
-            return parsed
-
-        # If all parsing fails, show what the agent actually returned
-        st.error(f"Agent did not provide structured recommendation. Raw response: {response[:200]}...")
-        return {"drink": "Agent parsing failed", "vibe": "Agent did not provide proper format"}
-        
-    except Exception as e:
-        st.error(f"Error getting AI recommendation: {e}")
-        return {"drink": "Error occurred", "vibe": "Please try again"}
-
-langfuse = get_client()
-langfuse.flush()
 
 
 def show_loading_process():
@@ -207,19 +122,28 @@ def render_results_scene():
         mood = st.session_state.get('selected_mood', 'chill')
         location = st.session_state.get('user_location', 'Unknown')
         
-        # Get weather data
-        weather_data = None
-        if BACKEND_AVAILABLE:
-            try:
-                weather_data = get_nyc_weather()  # Get current NYC weather
-                st.session_state.weather_data = weather_data
-            except Exception as e:
-                # Weather API failed - continue without weather data
-                pass
-        
         # Get AI recommendation
         try:
-            recommendation = get_ai_recommendation(mood, location, weather_data)
+            # Prefer the job started by the loading scene; it may still be finishing
+            recommendation = None
+            if get_job('recommendation', (mood, location)) is not None:
+                with st.spinner("Whiski is still brewing your recommendation..."):
+                    # A job that raised or timed out re-raises here and is shown as an agent error below
+                    result = get_job_result('recommendation', (mood, location))
+                if result is not None:
+                    if result['error']:
+                        st.error(result['error'])
+                    st.session_state.weather_data = result['weather']
+                    recommendation = {"drink": result['drink'], "vibe": result['vibe']}
+            
+            if recommendation is None:
+                # Get weather data once per session location (cached per area in weather_api)
+                weather_data = st.session_state.get('weather_data')
+                if weather_data is None and BACKEND_AVAILABLE:
+                    weather_data = get_weather(location)
+                    st.session_state.weather_data = weather_data
+                
+                recommendation = get_ai_recommendation(mood, location, weather_data)
             if recommendation and 'drink' in recommendation and 'vibe' in recommendation:
                 # Validate we got actual recommendations, not error messages
                 drink = recommendation['drink']
@@ -276,7 +200,7 @@ def render_results_scene():
     with col2:
         # Display matcha image
         try:
-            st.image("matcha_cafe.png", caption="Matcha Vibe", width=400)
+            render_image("matcha_cafe.png", width=400, caption="Matcha Vibe")
         except:
             st.error("Matcha image (matcha_cafe.png) not found. Please check your assets.")
     
@@ -304,6 +228,9 @@ def render_results_scene():
 
 def reset_and_restart():
     """Reset session and start over"""
+    # Drop background jobs so a retry asks the agent again
+    cancel_session_jobs()
+    
     # Clear recommendation data
     for key in ['drink_recommendation', 'vibe_description', 'weather_data']:
         if key in st.session_state:
@@ -9,6 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 from styles import apply_welcome_styles
 from ..components.buttons import render_start_button
+from ..components.images import render_image
 from ..utils import SCENES
 
 def render_welcome_scene():
@@ -18,7 +19,7 @@ def render_welcome_scene():
     
     # Full-screen splash image
     try:
-        st.image("welcome_image.png", use_container_width=True)
+        render_image("welcome_image.png", use_container_width=True)
     except:
         st.error("Welcome image (welcome_image.png) not found. Please check your assets.")
 
@@ -4,6 +4,7 @@ Contains shared utility functions for navigation, session state, and UI helpers.
 """
 
 import streamlit as st
+from .background import cancel_session_jobs
 
 # Scene constants
 SCENES = {
@@ -84,6 +85,8 @@ def get_progress_by_scene(scene_name):
 
 def reset_session():
     """Reset all session state to start over"""
+    cancel_session_jobs()
+    
     keys_to_keep = ['current_scene']  # Keep navigation state
     keys_to_clear = [key for key in st.session_state.keys() if key not in keys_to_keep]
     
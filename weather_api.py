@@ -1,22 +1,149 @@
+import os
+import threading
+import time
 import requests
-import streamlit as st
+from concurrent.futures import Future
+from dataclasses import dataclass
 from dotenv import load_dotenv
-from telemetry import langfuse       
-from langfuse import observe, get_client  
+import http_client
+from geocoding import geocode_location
+from telemetry import observe
 
 load_dotenv()
 
+FORECAST_URL = os.getenv("OPEN_METEO_FORECAST_URL", "https://api.open-meteo.com/v1/forecast")
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL_SECONDS", "600"))
+# Older conditions are still served while Open-Meteo is failing, up to this age
+WEATHER_STALE_MAX_AGE = float(os.getenv("WEATHER_STALE_MAX_AGE_SECONDS", str(3 * 60 * 60)))
+
+# Coordinates are rounded to this many decimals to form a cache cell (~11 km at 1)
+WEATHER_CELL_PRECISION = int(os.getenv("WEATHER_CELL_PRECISION", "1"))
+
+# Temperature bucket boundaries in °C: below COLD is "cold", at/above HOT is "hot"
+COLD_BELOW_C = float(os.getenv("WEATHER_COLD_BELOW_C", "12"))
+HOT_FROM_C = float(os.getenv("WEATHER_HOT_FROM_C", "24"))
+
+# WMO weather interpretation codes used by Open-Meteo
+WEATHER_CONDITIONS = {
+    0: "clear sky",
+    1: "mainly clear", 2: "partly cloudy", 3: "overcast",
+    45: "foggy", 48: "foggy",
+    51: "light drizzle", 53: "drizzle", 55: "heavy drizzle",
+    56: "freezing drizzle", 57: "freezing drizzle",
+    61: "light rain", 63: "rain", 65: "heavy rain",
+    66: "freezing rain", 67: "freezing rain",
+    71: "light snow", 73: "snow", 75: "heavy snow", 77: "snow grains",
+    80: "rain showers", 81: "rain showers", 82: "heavy rain showers",
+    85: "snow showers", 86: "snow showers",
+    95: "thunderstorm", 96: "thunderstorm with hail", 99: "thunderstorm with hail",
+}
+
+
+@dataclass(frozen=True)
+class WeatherReport:
+    temperature: float
+    condition: str
+    bucket: str
+    latitude: float
+    longitude: float
+    fetched_at: float
+
+    def __str__(self):
+        return f"{self.temperature}°C, {self.condition}"
+
+
+def get_weather_bucket(temperature: float) -> str:
+    """Classify a temperature (°C) as 'cold', 'mild' or 'hot'."""
+    if temperature < COLD_BELOW_C:
+        return "cold"
+    if temperature >= HOT_FROM_C:
+        return "hot"
+    return "mild"
+
+
+# Per-cell cache of recent reports plus in-flight fetches, so concurrent
+# sessions asking about the same cell share one Open-Meteo call
+_cache_lock = threading.Lock()
+_weather_cache = {}
+_inflight = {}
+
+
+def _fetch_current_weather(latitude: float, longitude: float) -> WeatherReport:
+    response = http_client.get(
+        "weather",
+        FORECAST_URL,
+        params={"latitude": latitude, "longitude": longitude, "current_weather": "true"},
+    )
+    current = response.json()["current_weather"]
+    temperature = current["temperature"]
+    return WeatherReport(
+        temperature=temperature,
+        condition=WEATHER_CONDITIONS.get(current.get("weathercode"), "unknown conditions"),
+        bucket=get_weather_bucket(temperature),
+        latitude=latitude,
+        longitude=longitude,
+        fetched_at=time.time(),
+    )
+
+
+def clear_weather_cache():
+    """Forget cached conditions for every cell."""
+    with _cache_lock:
+        _weather_cache.clear()
+
+
+#🌤️ Weather for the user's location
+@observe(name="api.get_weather", as_type="tool")
+def get_weather(location: str):
+    """
+    Get current conditions for a location.
+
+    Args:
+        location: Location string from the session (e.g. "Queens, NY")
+
+    Returns:
+        WeatherReport | None: Current conditions, or None if weather is unavailable
+        (including when the location can't be geocoded)
+    """
+    point = geocode_location(location)
+    if point is None:
+        return None
+    cell = (round(point.latitude, WEATHER_CELL_PRECISION), round(point.longitude, WEATHER_CELL_PRECISION))
+
+    with _cache_lock:
+        cached = _weather_cache.get(cell)
+        if cached is not None and time.time() - cached.fetched_at < WEATHER_CACHE_TTL:
+            return cached
+        future = _inflight.get(cell)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[cell] = future
+
+    if not is_leader:
+        try:
+            return future.result(timeout=http_client.ENDPOINTS["weather"].max_duration)
+        except Exception:
+            return None
+
+    report = None
+    try:
+        report = _fetch_current_weather(*cell)
+        with _cache_lock:
+            _weather_cache[cell] = report
+    except (requests.RequestException, ValueError, KeyError):
+        # Degrade to the last known conditions for this cell rather than none at all
+        if cached is not None and time.time() - cached.fetched_at < WEATHER_STALE_MAX_AGE:
+            report = cached
+    finally:
+        with _cache_lock:
+            _inflight.pop(cell, None)
+        future.set_result(report)
+    return report
+
+
 #🌤️ Weather in NYC
-@observe(name="api.get_nyc_weather", as_type="generation")
 def get_nyc_weather():
-    try:
-        weather_resp = requests.get(
-            "https://api.open-meteo.com/v1/forecast?latitude=40.7128&longitude=-74.0060&current_weather=true"
-        ).json()
-        temp = weather_resp["current_weather"]["temperature"]
-        return f"{temp}°C"
-    except Exception:
-        return "Weather unavailable"
-
-langfuse = get_client()
-langfuse.flush()
\ No newline at end of file
+    """Legacy helper: current NYC weather as a display string."""
+    report = get_weather("New York, NY")
+    return str(report) if report else "Weather unavailable"
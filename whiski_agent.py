@@ -5,17 +5,36 @@ from smolagents import CodeAgent, tool, LiteLLMModel, DuckDuckGoSearchTool, Plan
 from mood_drink_map import get_drink_for_mood
 from cafe_search import search_matcha_cafes
 from templates.main_system_prompt import WHISKI_SYSTEM_PROMPT
-from telemetry import langfuse
-from langfuse import observe, get_client
+from agent_pool import AGENT_POOL_SIZE, AgentPool
+from model_config import MODEL_ID, MODEL_API_KEY, MODEL_API_BASE, MODEL_TIMEOUT, MODEL_MAX_RETRIES
+import http_client
+from prompt_compiler import compile_messages
+from telemetry import observe
+
+
+class BudgetedLiteLLMModel(LiteLLMModel):
+    """LiteLLMModel that sizes every request against its prompt budget before sending it."""
+
+    def generate(self, messages, *args, **kwargs):
+        messages, _ = compile_messages(messages, tools=kwargs.get("tools_to_call_from"))
+        http_client.record_call()  # LLM requests go through LiteLLM, not http_client
+        return super().generate(messages, *args, **kwargs)
+
+    def generate_stream(self, messages, *args, **kwargs):
+        messages, _ = compile_messages(messages, tools=kwargs.get("tools_to_call_from"))
+        http_client.record_call()
+        return super().generate_stream(messages, *args, **kwargs)
 
 
 # ── Wire up Gemini 2.5 as the LLM backend
-model = LiteLLMModel(
-    system_prompt=WHISKI_SYSTEM_PROMPT,
-    model_id="gemini/gemini-2.5-flash",  # Upgraded for better prompt adherence
-    api_key=os.getenv("GOOGLE_GEMINI_API_KEY"),
-    timeout=30,  # 30 second timeout
-    max_retries=3,  # Retry up to 3 times on failure
+# The system prompt reaches the model through my_templates; extra model kwargs are forwarded
+# to every completion call, so passing it here as well would send it twice
+model = BudgetedLiteLLMModel(
+    model_id=MODEL_ID,  # gemini/gemini-2.5-flash by default for better prompt adherence
+    api_key=MODEL_API_KEY,
+    api_base=MODEL_API_BASE,
+    timeout=MODEL_TIMEOUT,  # 30 second timeout by default
+    max_retries=MODEL_MAX_RETRIES,  # Retry up to 3 times on failure
 )
 
 
@@ -32,8 +51,6 @@ def get_drink_for_mood_tool(mood: str) -> str:
     """
     return get_drink_for_mood(mood)
 
-langfuse = get_client()
-langfuse.flush()
 
 
 @tool
@@ -48,8 +65,6 @@ def search_matcha_cafes_tool(location: str) -> list[dict]:
     """
     return search_matcha_cafes(location)
 
-langfuse = get_client()
-langfuse.flush()
 
 @tool
 @observe(name="tool.web_search_tool", as_type="tool")
@@ -71,8 +86,6 @@ def web_search_tool(query: str) -> str:
     except Exception as e:
         return f"Search failed: {str(e)}"
 
-langfuse = get_client()
-langfuse.flush()
 
 my_templates = {
     "system_prompt": WHISKI_SYSTEM_PROMPT,
@@ -100,21 +113,42 @@ my_templates = {
 
 
 
-agent = CodeAgent(
-    tools=[get_drink_for_mood_tool, search_matcha_cafes_tool, web_search_tool],
-    model=model,
-    max_steps=2,
-    verbosity_level=1, #controls how much "thinking" info the agent logs 0-3, 3 is most verbose
-    max_print_outputs_length = 500,  # maximum length of the output before truncating,
-    prompt_templates=my_templates,  
+def build_agent() -> CodeAgent:
+    """
+    Create a fresh CodeAgent with its own memory and executor state.
+
+    The LiteLLM model client, tools and templates are shared, so each agent is cheap.
+    """
+    return CodeAgent(
+        tools=[get_drink_for_mood_tool, search_matcha_cafes_tool, web_search_tool],
+        model=model,
+        max_steps=2,
+        verbosity_level=1, #controls how much "thinking" info the agent logs 0-3, 3 is most verbose
+        max_print_outputs_length = 500,  # maximum length of the output before truncating,
+        prompt_templates=my_templates,  
+    )
+
+
+# ── One agent per in-flight request; sessions check agents out instead of sharing one
+agent_pool = AgentPool(
+    build_agent,
+    size=AGENT_POOL_SIZE,
+    wait_timeout=float(os.getenv("AGENT_POOL_WAIT_TIMEOUT", "30")),
 )
 
 
+def run_agent(prompt: str, **run_kwargs):
+    """Run a prompt on an agent checked out from the pool."""
+    with agent_pool.checkout() as agent:
+        return agent.run(prompt, **run_kwargs)
+
+
 # Enhanced test to see formatting in action
 if __name__ == "__main__":
     print("=== Testing Whiski Agent Formatting ===\n")
     
     # Test 1: Simple greeting
     print("Test 1: Simple greeting")
-    resp1 = agent.run("What is your name?")
+    resp1 = run_agent("What is your name?")
     print(f"Response: {resp1}\n")
+    print(f"Pool: {agent_pool.stats()}")